@@ -5,10 +5,11 @@ Accounts API Endpoints
 import logging
 from typing import Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from supabase import Client
 
 from ...core.database import get_db
+from ...core.http_cache import conditional_response, make_etag
 from ...services.api.account_service import create_account_service, AccountService
 from ...schemas.instagram_account_schema import (
     AccountListResponse,
@@ -44,6 +45,8 @@ async def options_accounts():
     description="Instagram アカウントの一覧を取得します。"
 )
 async def get_accounts(
+    request: Request,
+    response: Response,
     active_only: bool = Query(True, description="アクティブアカウントのみ取得"),
     include_metrics: bool = Query(False, description="統計情報を含む"),
     db: Client = Depends(get_db)
@@ -53,14 +56,30 @@ async def get_accounts(
     
     - **active_only**: アクティブなアカウントのみ取得するか
     - **include_metrics**: フォロワー数などの統計情報を含むか
+    
+    ETag（各アカウントの data_version などから計算）が If-None-Match と一致する場合は 304 を返します。
     """
     try:
         logger.info(f"GET /accounts - active_only={active_only}, include_metrics={include_metrics}")
         
         account_service = create_account_service(db)
+        accounts = await account_service.list_accounts(active_only)
+        
+        # 統計情報の集計前に、アカウント行だけで変更の有無を判定
+        etag = make_etag(
+            "accounts",
+            active_only,
+            include_metrics,
+            [account_service.fingerprint(account) for account in accounts]
+        )
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        
         result = await account_service.get_accounts(
             active_only=active_only,
-            include_metrics=include_metrics
+            include_metrics=include_metrics,
+            accounts=accounts
         )
         
         return result
@@ -81,18 +100,31 @@ async def get_accounts(
 )
 async def get_account_details(
     account_id: str,
+    request: Request,
+    response: Response,
     db: Client = Depends(get_db)
 ) -> AccountDetailResponse:
     """
     アカウント詳細取得
     
     - **account_id**: アカウントID (UUID または Instagram User ID)
+    
+    ETag（アカウントの data_version などから計算）が If-None-Match と一致する場合は 304 を返します。
     """
     try:
         logger.info(f"GET /accounts/{account_id}")
         
         account_service = create_account_service(db)
-        result = await account_service.get_account_details(account_id)
+        account = await account_service.get_account(account_id)
+        
+        if account:
+            etag = make_etag("account", account_service.fingerprint(account))
+            not_modified = conditional_response(request, response, etag)
+            if not_modified:
+                return not_modified
+            result = await account_service.get_account_details(account_id, account=account)
+        else:
+            result = None
         
         if not result:
             raise HTTPException(
@@ -5,17 +5,25 @@ Cloud Scheduler 等からの定期実行・手動更新を受け付けます。
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
-from datetime import date, datetime, timezone
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import APIRouter, BackgroundTasks, Body, Depends, Header, HTTPException, status
 from pydantic import BaseModel, Field
 
-from ...services.data_collection.daily_collector_service import create_daily_collector
 from ...services.data_collection.recent_post_sync_service import create_recent_post_sync_service
+from ...services.jobs.collection_jobs import (
+    DAILY_COLLECTION,
+    RECENT_POST_SYNC,
+    account_run_name,
+    run_daily_collection,
+    run_recent_post_sync,
+)
+from ...services.jobs.handlers import JobConflictError
+from ...services.jobs.job_queue import Job, get_job_queue, queue_mode
+from ...services.jobs.run_store import EMPTY_STATUS, Lease, LeaseLostError, get_run_store
 
 logger = logging.getLogger(__name__)
 
@@ -23,25 +31,93 @@ router = APIRouter(prefix="/collection", tags=["collection"])
 
 _COLLECTION_TOKEN_ENV = "COLLECTION_TRIGGER_TOKEN"
 
-# 1プロセス内の重複実行防止（Railway等の単一インスタンス前提の軽量ロック）
-_daily_lock = asyncio.Lock()
-_daily_last_status: Dict[str, Any] = {
-    "running": False,
-    "started_at": None,
-    "completed_at": None,
-    "last_error": None,
-    "last_summary": None,
-}
-
-_account_locks: Dict[str, asyncio.Lock] = {}
-_recent_lock = asyncio.Lock()
-_recent_last_status: Dict[str, Any] = {
-    "running": False,
-    "started_at": None,
-    "completed_at": None,
-    "last_error": None,
-    "last_summary": None,
-}
+# 重複実行防止のリース名（RunStore 経由。COLLECTION_RUN_STORE=supabase で複数レプリカ間でも共有）
+_DAILY_RUN = DAILY_COLLECTION
+_RECENT_RUN = RECENT_POST_SYNC
+
+
+async def _save_run_status(name: str, job_status: Dict[str, Any]) -> None:
+    """ジョブステータスの保存（保存失敗でジョブは止めない）"""
+    try:
+        await get_run_store().set_status(name, job_status)
+    except Exception as e:
+        logger.warning(f"Failed to save status for {name}: {e}")
+
+
+async def _load_run_status(name: str) -> Dict[str, Any]:
+    """ジョブステータスの取得（running は有効なリースの有無で判定）"""
+    store = get_run_store()
+    job_status = await store.get_status(name)
+    job_status["running"] = bool(job_status.get("running")) and await store.is_locked(name)
+    return job_status
+
+
+async def _run_inline_job(
+    name: str,
+    run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    params: Dict[str, Any],
+    lease: Lease,
+) -> None:
+    """API プロセス内でジョブを実行（COLLECTION_QUEUE_MODE=inline）
+
+    ステータスは開始時・終了時に新しいスナップショットを保存するだけで、
+    実行中のジョブとステータス参照が同じ dict を共有することはない。
+    """
+    started = {**EMPTY_STATUS, "running": True, "started_at": datetime.utcnow().isoformat()}
+    summary: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    try:
+        async with get_run_store().hold(lease):
+            try:
+                await _save_run_status(name, started)
+                summary = await run(params)
+            except Exception as e:
+                logger.error(f"{name} job failed: {e}", exc_info=True)
+                error = str(e)
+            # リースを失って中断した場合は、新しい保持者のステータスを上書きしない
+            await _save_run_status(
+                name,
+                {
+                    **started,
+                    "running": False,
+                    "completed_at": datetime.utcnow().isoformat(),
+                    "last_error": error,
+                    "last_summary": summary,
+                },
+            )
+    except LeaseLostError as e:
+        logger.error(f"{name} job stopped: {e}")
+
+
+async def _start_job(
+    name: str,
+    run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    request: BaseModel,
+    background_tasks: BackgroundTasks,
+    conflict_detail: str,
+) -> Optional[Job]:
+    """ジョブ開始（worker モードはキュー登録、inline モードはバックグラウンド実行）"""
+    if queue_mode() == "worker":
+        # 同種ジョブの有無の確認と登録はキュー側で不可分に行う（レプリカ・同時リクエスト間でも重複しない）
+        try:
+            return await get_job_queue().enqueue(name, request.model_dump(mode="json"))
+        except JobConflictError:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+
+    # ここでリースを獲得してからバックグラウンドに渡すことで、同時リクエストの二重起動を防ぐ
+    lease = await get_run_store().acquire(name)
+    if not lease:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict_detail)
+    background_tasks.add_task(_run_inline_job, name, run, request.model_dump(), lease)
+    return None
+
+
+async def _job_status(name: str) -> Dict[str, Any]:
+    """直近の実行状況（worker モードはジョブキューの最新ジョブ）"""
+    if queue_mode() == "worker":
+        job = await get_job_queue().latest(name)
+        return job.to_status() if job else dict(EMPTY_STATUS)
+    return await _load_run_status(name)
 
 
 def _extract_bearer_token(authorization: Optional[str]) -> Optional[str]:
@@ -97,48 +173,6 @@ class DailyCollectionTriggerRequest(BaseModel):
     dry_run: bool = Field(default=False, description="true の場合DB保存を行わない")
 
 
-async def _run_daily_collection_job(req: DailyCollectionTriggerRequest) -> None:
-    global _daily_last_status
-    try:
-        _daily_last_status.update(
-            {
-                "running": True,
-                "started_at": datetime.utcnow().isoformat(),
-                "completed_at": None,
-                "last_error": None,
-                "last_summary": None,
-            }
-        )
-
-        collector = create_daily_collector()
-        summary = await collector.collect_daily_data(
-            target_date=req.target_date,
-            account_filter=req.account_filter,
-            dry_run=req.dry_run,
-        )
-
-        _daily_last_status["last_summary"] = {
-            "target_date": summary.target_date.isoformat(),
-            "total_accounts": summary.total_accounts,
-            "successful_accounts": summary.successful_accounts,
-            "failed_accounts": summary.failed_accounts,
-            "started_at": summary.started_at.isoformat(),
-            "completed_at": summary.completed_at.isoformat() if summary.completed_at else None,
-            "total_duration_seconds": summary.total_duration_seconds,
-        }
-    except Exception as e:
-        logger.error(f"Daily collection job failed: {e}", exc_info=True)
-        _daily_last_status["last_error"] = str(e)
-    finally:
-        _daily_last_status["running"] = False
-        _daily_last_status["completed_at"] = datetime.utcnow().isoformat()
-        try:
-            _daily_lock.release()
-        except RuntimeError:
-            # 既にrelease済みなど
-            pass
-
-
 @router.post(
     "/daily",
     summary="日次データ収集トリガー（Cloud Scheduler 用）",
@@ -149,17 +183,14 @@ async def trigger_daily_collection(
     request: DailyCollectionTriggerRequest = Body(default_factory=DailyCollectionTriggerRequest),
     _: None = Depends(require_collection_token),
 ) -> Dict[str, Any]:
-    if _daily_lock.locked():
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Daily collection is already running")
-
-    # ここでロックを獲得してからバックグラウンドに渡すことで、同時リクエストの二重起動を防ぐ
-    await _daily_lock.acquire()
-
-    background_tasks.add_task(_run_daily_collection_job, request)
+    job = await _start_job(
+        _DAILY_RUN, run_daily_collection, request, background_tasks, "Daily collection is already running"
+    )
 
     return {
         "accepted": True,
-        "job": "daily_collection",
+        "job": _DAILY_RUN,
+        "job_id": job.id if job else None,
         "queued_at": datetime.utcnow().isoformat(),
         "requested_target_date": request.target_date.isoformat() if request.target_date else None,
         "dry_run": request.dry_run,
@@ -169,12 +200,12 @@ async def trigger_daily_collection(
 @router.get(
     "/daily/status",
     summary="日次データ収集ステータス",
-    description="直近の実行状況（同一プロセス内）を返します。",
+    description="直近の実行状況を返します。",
 )
 async def get_daily_collection_status(
     _: None = Depends(require_collection_token),
 ) -> Dict[str, Any]:
-    return _daily_last_status
+    return await _job_status(_DAILY_RUN)
 
 
 class AccountRefreshRequest(BaseModel):
@@ -182,6 +213,7 @@ class AccountRefreshRequest(BaseModel):
     max_posts: int = Field(default=50, ge=1, le=200, description="更新対象の最大投稿数（レート制限対策）")
     dry_run: bool = Field(default=False, description="true の場合DB保存を行わない")
     force: bool = Field(default=False, description="最終更新からの間隔チェックを無視して実行")
+    ignore_schedule: bool = Field(default=False, description="投稿ごとの再取得スケジュールを無視して全投稿のインサイトを再取得")
 
 
 @router.post(
@@ -194,11 +226,31 @@ async def refresh_account_recent_posts(
     request: AccountRefreshRequest = Body(default_factory=AccountRefreshRequest),
     _: None = Depends(require_collection_token),
 ) -> Dict[str, Any]:
-    # 1アカウント同時実行防止（同一プロセス内）
-    lock = _account_locks.setdefault(account_id, asyncio.Lock())
-    if lock.locked():
+    # 1アカウント同時実行防止
+    store = get_run_store()
+    lease = await store.acquire(account_run_name(account_id))
+    if not lease:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This account refresh is already running")
 
+    async with store.hold(lease):
+        result = await _refresh_account(account_id, request)
+
+    if not result.success:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=result.error_message or "Sync failed")
+
+    return {
+        "success": True,
+        "account_id": result.account_id,
+        "instagram_user_id": result.instagram_user_id,
+        "collected_at": result.collected_at.isoformat(),
+        "posts_processed": result.posts_processed,
+        "metrics_saved": result.metrics_saved,
+        "posts_skipped": result.posts_skipped,
+        "skipped_writes": result.skipped_writes,
+    }
+
+
+async def _refresh_account(account_id: str, request: AccountRefreshRequest):
     # 直近更新の間隔チェック（過度な手動更新を抑制）
     min_interval_seconds = int(os.getenv("MANUAL_REFRESH_MIN_INTERVAL_SECONDS", "60"))
 
@@ -221,25 +273,13 @@ async def refresh_account_recent_posts(
                     headers={"Retry-After": str(retry_after)},
                 )
 
-    async with lock:
-        result = await service.sync_recent_posts(
-            account_id=account_id,
-            window_days=request.window_days,
-            max_posts=request.max_posts,
-            dry_run=request.dry_run,
-        )
-
-    if not result.success:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=result.error_message or "Sync failed")
-
-    return {
-        "success": True,
-        "account_id": result.account_id,
-        "instagram_user_id": result.instagram_user_id,
-        "collected_at": result.collected_at.isoformat(),
-        "posts_processed": result.posts_processed,
-        "metrics_saved": result.metrics_saved,
-    }
+    return await service.sync_recent_posts(
+        account_id=account_id,
+        window_days=request.window_days,
+        max_posts=request.max_posts,
+        dry_run=request.dry_run,
+        ignore_schedule=request.ignore_schedule,
+    )
 
 
 class RecentPostSyncTriggerRequest(BaseModel):
@@ -252,144 +292,10 @@ class RecentPostSyncTriggerRequest(BaseModel):
     dry_run: bool = Field(default=False, description="true の場合DB保存を行わない")
     force: bool = Field(default=False, description="最終更新からの間隔チェックを無視して実行")
     per_post_delay_seconds: float = Field(default=0.2, ge=0, le=10, description="投稿間ディレイ（秒）")
+    ignore_schedule: bool = Field(default=False, description="投稿ごとの再取得スケジュールを無視して全投稿のインサイトを再取得")
     per_account_delay_seconds: float = Field(default=1.0, ge=0, le=60, description="アカウント間ディレイ（秒）")
 
 
-async def _run_recent_post_sync_job(req: RecentPostSyncTriggerRequest) -> None:
-    global _recent_last_status
-    try:
-        _recent_last_status.update(
-            {
-                "running": True,
-                "started_at": datetime.utcnow().isoformat(),
-                "completed_at": None,
-                "last_error": None,
-                "last_summary": None,
-            }
-        )
-
-        min_interval_seconds = int(os.getenv("SCHEDULED_REFRESH_MIN_INTERVAL_SECONDS", "0"))
-
-        service = create_recent_post_sync_service()
-        service.init_repositories()
-        assert service.account_repo is not None
-
-        accounts = (
-            await service.account_repo.get_accounts_for_collection(req.account_filter)
-            if req.account_filter
-            else await service.account_repo.get_active_accounts()
-        )
-
-        total = len(accounts)
-        success = 0
-        failed = 0
-        skipped = 0
-        results: List[Dict[str, Any]] = []
-
-        now_utc = datetime.now(timezone.utc)
-
-        for account in accounts:
-            instagram_user_id = account.get("instagram_user_id")
-            if not instagram_user_id:
-                failed += 1
-                results.append({"success": False, "error": "Missing instagram_user_id"})
-                continue
-
-            # 同一プロセス内の手動更新と衝突した場合はスキップ
-            account_lock = _account_locks.setdefault(str(instagram_user_id), asyncio.Lock())
-            if account_lock.locked():
-                skipped += 1
-                results.append(
-                    {
-                        "instagram_user_id": str(instagram_user_id),
-                        "success": False,
-                        "skipped": True,
-                        "error": "Account refresh is already running",
-                    }
-                )
-                continue
-
-            if not req.force and min_interval_seconds > 0:
-                last_synced_at = _parse_dt(account.get("last_synced_at"))
-                if last_synced_at:
-                    base_now = now_utc
-                    try:
-                        # last_synced_at が tz-aware の場合は tz を合わせる
-                        base_now = now_utc.astimezone(last_synced_at.tzinfo) if last_synced_at.tzinfo else now_utc
-                    except Exception:
-                        base_now = now_utc
-                    elapsed = (base_now - last_synced_at).total_seconds()
-                    if elapsed < min_interval_seconds:
-                        skipped += 1
-                        results.append(
-                            {
-                                "instagram_user_id": str(instagram_user_id),
-                                "success": True,
-                                "skipped": True,
-                                "reason": f"Within min interval ({int(elapsed)}s < {min_interval_seconds}s)",
-                            }
-                        )
-                        continue
-
-            async with account_lock:
-                result = await service.sync_recent_posts(
-                    account_id=str(instagram_user_id),
-                    window_days=req.window_days,
-                    max_posts=req.max_posts,
-                    dry_run=req.dry_run,
-                    per_post_delay_seconds=req.per_post_delay_seconds,
-                )
-
-            if result.success:
-                success += 1
-                results.append(
-                    {
-                        "instagram_user_id": result.instagram_user_id,
-                        "success": True,
-                        "collected_at": result.collected_at.isoformat(),
-                        "posts_processed": result.posts_processed,
-                        "metrics_saved": result.metrics_saved,
-                    }
-                )
-            else:
-                failed += 1
-                results.append(
-                    {
-                        "instagram_user_id": result.instagram_user_id,
-                        "success": False,
-                        "error": result.error_message,
-                    }
-                )
-
-            if req.per_account_delay_seconds > 0:
-                await asyncio.sleep(req.per_account_delay_seconds)
-
-        _recent_last_status["last_summary"] = {
-            "total_accounts": total,
-            "successful_accounts": success,
-            "failed_accounts": failed,
-            "skipped_accounts": skipped,
-            "window_days": req.window_days,
-            "max_posts": req.max_posts,
-            "dry_run": req.dry_run,
-            "per_post_delay_seconds": req.per_post_delay_seconds,
-            "per_account_delay_seconds": req.per_account_delay_seconds,
-            "min_interval_seconds": min_interval_seconds,
-            "results": results,
-        }
-
-    except Exception as e:
-        logger.error(f"Recent post sync job failed: {e}", exc_info=True)
-        _recent_last_status["last_error"] = str(e)
-    finally:
-        _recent_last_status["running"] = False
-        _recent_last_status["completed_at"] = datetime.utcnow().isoformat()
-        try:
-            _recent_lock.release()
-        except RuntimeError:
-            pass
-
-
 @router.post(
     "/recent-posts",
     summary="直近投稿同期トリガー（全アクティブ / フィルタ指定）",
@@ -400,15 +306,14 @@ async def trigger_recent_post_sync(
     request: RecentPostSyncTriggerRequest = Body(default_factory=RecentPostSyncTriggerRequest),
     _: None = Depends(require_collection_token),
 ) -> Dict[str, Any]:
-    if _recent_lock.locked():
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Recent post sync is already running")
-
-    await _recent_lock.acquire()
-    background_tasks.add_task(_run_recent_post_sync_job, request)
+    job = await _start_job(
+        _RECENT_RUN, run_recent_post_sync, request, background_tasks, "Recent post sync is already running"
+    )
 
     return {
         "accepted": True,
-        "job": "recent_post_sync",
+        "job": _RECENT_RUN,
+        "job_id": job.id if job else None,
         "queued_at": datetime.utcnow().isoformat(),
         "account_filter": request.account_filter,
         "window_days": request.window_days,
@@ -420,9 +325,35 @@ async def trigger_recent_post_sync(
 @router.get(
     "/recent-posts/status",
     summary="直近投稿同期ステータス",
-    description="直近の実行状況（同一プロセス内）を返します。",
+    description="直近の実行状況を返します。",
 )
 async def get_recent_post_sync_status(
     _: None = Depends(require_collection_token),
 ) -> Dict[str, Any]:
-    return _recent_last_status
+    return await _job_status(_RECENT_RUN)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="収集ジョブの状態",
+    description="COLLECTION_QUEUE_MODE=worker で登録したジョブの状態・進捗・結果を返します。",
+)
+async def get_collection_job(
+    job_id: str,
+    _: None = Depends(require_collection_token),
+) -> Dict[str, Any]:
+    job = await get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job not found: {job_id}")
+    return job.to_status()
+
+
+@router.get(
+    "/locks/metrics",
+    summary="収集ジョブロックのメトリクス",
+    description="このプロセスでの実行ロック（リース）の獲得・競合・解放件数と保持数を返します。",
+)
+async def get_collection_lock_metrics(
+    _: None = Depends(require_collection_token),
+) -> Dict[str, Any]:
+    return get_run_store().metrics()
@@ -2,15 +2,29 @@
 Post Insights API Endpoints
 投稿インサイトAPIエンドポイント
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from supabase import Client
 from typing import Optional
-from datetime import date
+from datetime import date, datetime, timezone
+import json
 import logging
 
 from ...core.database import get_db
-from ...services.api.post_insight_service import create_post_insight_service
-from ...schemas.post_insight_schema import PostInsightResponse, ErrorResponse
+from ...core.http_cache import conditional_response, make_etag
+from ...core.response_cache import get_response_cache
+from ...services.api.post_insight_service import (
+    DEFAULT_TIME_SERIES_METRICS,
+    TIME_SERIES_METRICS,
+    InvalidCursorError,
+    create_post_insight_service,
+)
+from ...schemas.post_insight_schema import (
+    ErrorResponse,
+    MediaTypeSummaryResponse,
+    PostInsightResponse,
+    PostTimeSeriesResponse,
+)
 
 # ログ設定
 logger = logging.getLogger(__name__)
@@ -35,19 +49,29 @@ router = APIRouter(prefix="/posts", tags=["Post Insights"])
     - `to_date`: 終了日付（YYYY-MM-DD形式、オプション）
     - `media_type`: メディアタイプフィルター（IMAGE, VIDEO, CAROUSEL_ALBUM, STORY、オプション）
     - `limit`: 最大取得件数（1-1000、オプション）
+    - `page_size`: 1ページの件数（1-500、オプション。指定するとキーセットページング）
+    - `cursor`: 前ページの `pagination.next_cursor`（オプション）
     
     **レスポンス:**
     - 投稿データリスト
-    - サマリー統計
+    - サマリー統計（ページング時もページではなく条件全体の集計）
     - メタデータ
+    - ページング情報（`page_size` / `cursor` 指定時）
+    
+    **キャッシュ:** `ETag`（アカウントの data_version と条件から計算）を返し、`If-None-Match` が一致すれば 304 を返します。
+    304 の場合も期限切れ間近のメディア URL があれば更新を依頼し、更新後は ETag が変わります。
     """
 )
 async def get_post_insights(
+    request: Request,
+    response: Response,
     account_id: str = Query(..., description="アカウントID（UUIDまたはInstagram User ID）"),
     from_date: Optional[date] = Query(None, description="開始日付（YYYY-MM-DD）"),
     to_date: Optional[date] = Query(None, description="終了日付（YYYY-MM-DD）"),
     media_type: Optional[str] = Query(None, description="メディアタイプフィルター", pattern="^(IMAGE|VIDEO|CAROUSEL_ALBUM|STORY)$"),
     limit: Optional[int] = Query(None, description="最大取得件数", ge=1, le=1000),
+    page_size: Optional[int] = Query(None, description="1ページの件数（キーセットページング）", ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="前ページの pagination.next_cursor"),
     db: Client = Depends(get_db)
 ):
     """投稿インサイトデータを取得"""
@@ -60,20 +84,55 @@ async def get_post_insights(
                 status_code=400,
                 detail="from_date must be earlier than or equal to to_date"
             )
+        if limit is not None and (page_size is not None or cursor is not None):
+            raise HTTPException(
+                status_code=400,
+                detail="limit cannot be combined with page_size / cursor"
+            )
         
-        # サービス呼び出し
+        # サービス呼び出し（集計の前にアカウントの data_version だけで変更の有無を判定）
         service = create_post_insight_service(db)
+        account = await service.get_account(account_id)
+        if not account:
+            raise ValueError(f"Account not found: {account_id}")
+        
+        etag = make_etag(
+            "post_insights",
+            service.fingerprint(account),
+            from_date,
+            to_date,
+            media_type,
+            limit,
+            page_size,
+            cursor
+        )
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            # 304 でもクライアントの保持する URL は期限切れになるため、期限が近ければ更新を依頼する
+            await service.schedule_expiring_media_url_refresh(account)
+            return not_modified
+        
         result = await service.get_post_insights(
             account_id=account_id,
             from_date=from_date,
             to_date=to_date,
             media_type=media_type,
-            limit=limit
+            limit=limit,
+            page_size=page_size,
+            cursor=cursor,
+            account=account
         )
         
         logger.info(f"Successfully retrieved {result['meta']['total_posts']} post insights")
         return result
         
+    except HTTPException:
+        raise
+    
+    except InvalidCursorError as e:
+        logger.warning(f"Invalid cursor: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
     except ValueError as e:
         logger.warning(f"Invalid parameter: {str(e)}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -85,34 +144,214 @@ async def get_post_insights(
             detail="Internal server error occurred while fetching post insights"
         )
 
-# 個別投稿の詳細取得（将来拡張用）
+@router.get(
+    "/insights/export",
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "1行1投稿の NDJSON"},
+        404: {"model": ErrorResponse, "description": "Account not found"},
+        400: {"model": ErrorResponse, "description": "Invalid parameters"},
+    },
+    summary="投稿インサイトのエクスポート（NDJSON）",
+    description="""
+    条件に合う全投稿のインサイトを新しい順に NDJSON（1行1投稿、`/insights` の `posts` 要素と同じ形）でストリーミングします。
+    投稿はキーセットで一定件数ずつ取得して送出するため、投稿数が多いアカウントでもメモリを消費しません。
+    サマリーが必要な場合は `/insights` を `page_size=1` で呼び出してください。
+    """
+)
+async def export_post_insights(
+    account_id: str = Query(..., description="アカウントID（UUIDまたはInstagram User ID）"),
+    from_date: Optional[date] = Query(None, description="開始日付（YYYY-MM-DD）"),
+    to_date: Optional[date] = Query(None, description="終了日付（YYYY-MM-DD）"),
+    media_type: Optional[str] = Query(None, description="メディアタイプフィルター", pattern="^(IMAGE|VIDEO|CAROUSEL_ALBUM|STORY)$"),
+    db: Client = Depends(get_db)
+):
+    """投稿インサイトを NDJSON でストリーミング"""
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=400,
+            detail="from_date must be earlier than or equal to to_date"
+        )
+    
+    service = create_post_insight_service(db)
+    try:
+        rows = await service.stream_post_insights(
+            account_id=account_id,
+            from_date=from_date,
+            to_date=to_date,
+            media_type=media_type
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    async def ndjson():
+        count = 0
+        try:
+            async for row in rows:
+                count += 1
+                yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            # ヘッダー送信後のため HTTP エラーにはできない（途中で切断される）
+            logger.error(f"Post insights export failed after {count} rows: {str(e)}", exc_info=True)
+            raise
+        logger.info(f"Exported {count} post insights for account {account_id}")
+    
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="post_insights_{account_id}.ndjson"'}
+    )
+
+@router.get(
+    "/insights/cache/stats",
+    summary="投稿インサイトキャッシュの統計",
+    description="このプロセスの投稿インサイトレスポンスキャッシュのヒット率・件数を返します。"
+)
+async def get_post_insights_cache_stats():
+    """投稿インサイトキャッシュの統計"""
+    return get_response_cache("post_insights").stats()
+
 @router.get(
     "/{post_id}/insights",
-    summary="個別投稿インサイト取得",
-    description="指定された投稿の詳細インサイトを取得します（将来実装予定）"
+    response_model=PostTimeSeriesResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Post not found"},
+        400: {"model": ErrorResponse, "description": "Invalid parameters"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
+    summary="個別投稿インサイト（時系列）取得",
+    description=f"""
+    指定された投稿のメトリクス履歴をグラフ表示用の時系列で返します。
+    
+    **パラメータ:**
+    - `post_id`: 投稿ID（Instagram Post ID または UUID）
+    - `from_date` / `to_date`: 記録日の範囲（YYYY-MM-DD、オプション）
+    - `metrics`: 返すメトリクス（カンマ区切り、{', '.join(TIME_SERIES_METRICS)}。デフォルト: {','.join(DEFAULT_TIME_SERIES_METRICS)}）
+    - `resolution`: `daily`（日ごとの最終値、欠けた日は前日の値で補完、デフォルト）/ `raw`（記録そのまま）
+    - `max_points`: 点数の上限（超える場合は LTTB で形状を保って間引く、3-1000）
+    - `downsample_by`: 間引きで形状を保つメトリクス（デフォルト: metrics の先頭）
+    - `include_deltas`: 直前の点からの増分（`delta`）と1時間あたりの増加速度（`velocity_per_hour`）を付与
+    
+    **キャッシュ:** `ETag`（投稿のアカウントの data_version と条件から計算）を返し、`If-None-Match` が一致すれば 304 を返します。
+    """
 )
 async def get_single_post_insights(
     post_id: str,
+    request: Request,
+    response: Response,
+    from_date: Optional[date] = Query(None, description="開始日付（YYYY-MM-DD）"),
+    to_date: Optional[date] = Query(None, description="終了日付（YYYY-MM-DD）"),
+    metrics: Optional[str] = Query(None, description="メトリクス（カンマ区切り）"),
+    resolution: str = Query("daily", description="集約単位", pattern="^(daily|raw)$"),
+    max_points: Optional[int] = Query(None, description="点数の上限（LTTB で間引き）", ge=3, le=1000),
+    downsample_by: Optional[str] = Query(None, description="間引きで形状を保つメトリクス"),
+    include_deltas: bool = Query(False, description="増分・増加速度を付与"),
     db: Client = Depends(get_db)
 ):
-    """個別投稿のインサイト取得（将来実装）"""
-    raise HTTPException(
-        status_code=501,
-        detail="Single post insights endpoint is not implemented yet"
-    )
+    """個別投稿のメトリクス時系列を取得"""
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(
+            status_code=400,
+            detail="from_date must be earlier than or equal to to_date"
+        )
+    
+    metric_list = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else list(DEFAULT_TIME_SERIES_METRICS)
+    unknown = [m for m in metric_list + ([downsample_by] if downsample_by else []) if m not in TIME_SERIES_METRICS]
+    if unknown or not metric_list:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown metrics: {', '.join(unknown) or '(empty)'} (available: {', '.join(TIME_SERIES_METRICS)})"
+        )
+    
+    try:
+        service = create_post_insight_service(db)
+        post, account = await service.get_post_with_account(post_id)
+        if not post:
+            raise ValueError(f"Post not found: {post_id}")
+        
+        if account:
+            # daily は当日まで前日の値で補完するため日付も含める
+            etag = make_etag(
+                "post_time_series",
+                service.fingerprint(account),
+                str(post["id"]),
+                from_date,
+                to_date,
+                metric_list,
+                resolution,
+                max_points,
+                downsample_by,
+                include_deltas,
+                datetime.now(timezone.utc).date() if resolution == "daily" else None
+            )
+            not_modified = conditional_response(request, response, etag)
+            if not_modified:
+                return not_modified
+        
+        return await service.get_post_time_series(
+            post_id=post_id,
+            from_date=from_date,
+            to_date=to_date,
+            metrics=list(dict.fromkeys(metric_list)),
+            resolution=resolution,
+            max_points=max_points,
+            downsample_by=downsample_by,
+            include_deltas=include_deltas,
+            post=post
+        )
+    
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    except Exception as e:
+        logger.error(f"Failed to get post time series: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error occurred while fetching post time series"
+        )
 
-# メディアタイプ別サマリー取得（将来拡張用）
 @router.get(
     "/insights/summary",
+    response_model=MediaTypeSummaryResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Account not found"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    },
     summary="メディアタイプ別サマリー取得",
-    description="アカウントのメディアタイプ別パフォーマンスサマリーを取得します（将来実装予定）"
+    description="""
+    アカウントのメディアタイプ別パフォーマンスサマリー（投稿数、最新メトリクスの合計・平均）を取得します。
+    収集時に再集計されるロールアップを参照するため、投稿数に関わらず高速に返ります（`meta.refreshed_at` が最終集計日時）。
+    `ETag`（アカウントの data_version から計算）を返し、`If-None-Match` が一致すれば 304 を返します。
+    """
 )
 async def get_media_type_summary(
-    account_id: str = Query(..., description="アカウントID"),
+    request: Request,
+    response: Response,
+    account_id: str = Query(..., description="アカウントID（UUIDまたはInstagram User ID）"),
     db: Client = Depends(get_db)
 ):
-    """メディアタイプ別サマリー取得（将来実装）"""
-    raise HTTPException(
-        status_code=501,
-        detail="Media type summary endpoint is not implemented yet"
-    )
+    """メディアタイプ別サマリー取得"""
+    try:
+        service = create_post_insight_service(db)
+        account = await service.get_account(account_id)
+        if not account:
+            raise ValueError(f"Account not found: {account_id}")
+        
+        etag = make_etag("media_type_summary", service.fingerprint(account))
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        
+        return await service.get_media_type_summary(account_id, account=account)
+    
+    except ValueError as e:
+        logger.warning(f"Invalid parameter: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    except Exception as e:
+        logger.error(f"Failed to get media type summary: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error occurred while fetching media type summary"
+        )
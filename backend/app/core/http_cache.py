@@ -0,0 +1,59 @@
+"""
+HTTP conditional GET helpers (ETag / If-None-Match + Cache-Control).
+
+ETags are fingerprints of what a response is derived from, not of the rendered body:
+per-account `data_version` / `data_updated_at` (bumped by triggers whenever collectors
+write posts, metrics, daily stats or rollups) plus the request parameters. They can
+therefore be checked with a single account lookup, before any expensive query runs,
+and a matching If-None-Match is answered with an empty 304.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Bump when a response shape changes so clients don't revalidate old bodies as current.
+ETAG_SCHEMA_VERSION = "1"
+
+# Store, but revalidate on every use (cheap thanks to 304). Override per deployment,
+# e.g. "public, max-age=0, s-maxage=30, stale-while-revalidate=300" behind a CDN.
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def cache_control() -> str:
+    """Cache-Control value for revalidatable read endpoints (API_CACHE_CONTROL)."""
+    return os.getenv("API_CACHE_CONTROL", DEFAULT_CACHE_CONTROL)
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over JSON-serialisable parts (datetimes / UUIDs are stringified)."""
+    payload = json.dumps([ETAG_SCHEMA_VERSION, *parts], default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header (RFC 9110 section 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 if the client already has `etag`; otherwise set ETag / Cache-Control on `response`.
+
+    `response` is the Response parameter FastAPI injects into the endpoint, so the headers
+    end up on the normally rendered body.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control()}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -104,6 +104,10 @@ class InstagramConfig:
         """メディア情報フィールド"""
         return "id,media_type,caption,media_url,thumbnail_url,timestamp,permalink,username,like_count,comments_count,is_comment_enabled,shortcode"
     
+    def get_media_id_fields(self) -> str:
+        """メディア一覧の軽量フィールド（新規判定用）"""
+        return "id,timestamp"
+    
     def get_available_insights_metrics(self) -> Dict[str, list]:
         """利用可能なインサイトメトリクス（検証済み）"""
         return {
@@ -0,0 +1,106 @@
+"""
+In-process response cache (TTL + LRU).
+
+Keys should include a data version (e.g. instagram_accounts.data_version) so that
+entries become unreachable as soon as collectors write new data; the TTL only bounds
+staleness when no version is available.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """TTL + LRU cache with hit/miss counters (single event loop, no locking needed)."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_caches: Dict[str, ResponseCache] = {}
+
+
+def get_response_cache(name: str, default_max_entries: int = 256, default_ttl_seconds: float = 300) -> ResponseCache:
+    """Return the process-wide cache for `name`.
+
+    Size and TTL are read once from <NAME>_CACHE_MAX_ENTRIES / <NAME>_CACHE_TTL_SECONDS
+    (0 disables the cache).
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        prefix = name.upper()
+        cache = ResponseCache(
+            name,
+            max_entries=int(os.getenv(f"{prefix}_CACHE_MAX_ENTRIES", str(default_max_entries))),
+            ttl_seconds=float(os.getenv(f"{prefix}_CACHE_TTL_SECONDS", str(default_ttl_seconds))),
+        )
+        _caches[name] = cache
+        logger.info(f"Response cache '{name}': max_entries={cache.max_entries}, ttl={cache.ttl_seconds}s")
+    return cache
+
+
+def response_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of all caches created in this process."""
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from typing import Any, Mapping, Optional
 
+_query_executor: Optional[ThreadPoolExecutor] = None
+_query_executor_lock = threading.Lock()
+
 
 def raise_for_error(response: Any) -> None:
     """Raise a RuntimeError if the Supabase response contains an error."""
@@ -57,3 +64,35 @@ def to_jsonable(value: Any) -> Any:
 def prepare_record(data: Mapping[str, Any]) -> dict:
     """Prepare a dict for Supabase insert/update/upsert (datetime/date to ISO)."""
     return {k: to_jsonable(v) for k, v in data.items()}
+
+
+def get_query_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool used to run blocking supabase-py calls.
+
+    Pool size is read from SUPABASE_MAX_WORKERS (default 16) on first use.
+    """
+    global _query_executor
+    if _query_executor is None:
+        with _query_executor_lock:
+            if _query_executor is None:
+                max_workers = max(1, int(os.getenv("SUPABASE_MAX_WORKERS", "16")))
+                _query_executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix="supabase-query",
+                )
+    return _query_executor
+
+
+async def execute_async(query: Any) -> Any:
+    """Run a query builder's blocking ``.execute()`` off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_query_executor(), query.execute)
+
+
+def shutdown_query_executor() -> None:
+    """Shut down the query thread pool (used on application shutdown)."""
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is not None:
+            _query_executor.shutdown(wait=False)
+            _query_executor = None
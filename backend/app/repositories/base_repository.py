@@ -0,0 +1,24 @@
+"""
+Base Repository
+Supabase リポジトリ共通の基底クラス
+"""
+from typing import Any
+
+from supabase import Client
+
+from ..core.supabase_utils import execute_async
+
+
+class BaseRepository:
+    """Supabase リポジトリ基底クラス
+
+    supabase-py の同期 ``.execute()`` をスレッドプールへ退避し、
+    イベントループをブロックせずにクエリを実行する。
+    """
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    async def _execute(self, query: Any) -> Any:
+        """クエリビルダーを非同期に実行"""
+        return await execute_async(query)
@@ -0,0 +1,64 @@
+"""
+Collection Freshness Repository
+Supabase (PostgREST) 経由で collection_freshness を操作するデータアクセス層
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .base_repository import BaseRepository
+from ..core.supabase_utils import get_data, prepare_record, raise_for_error
+
+
+class CollectionFreshnessRepository(BaseRepository):
+    """収集鮮度台帳リポジトリ"""
+    
+    async def get_fetched_at(
+        self,
+        account_id: str,
+        data_kind: str,
+        subject_ids: List[str],
+        exclude_fetched_by: Optional[str] = None
+    ) -> Dict[str, str]:
+        """対象ごとの最終取得時刻（subject_id -> fetched_at 文字列、exclude_fetched_by のジョブが取得した行は除く）"""
+        if not subject_ids:
+            return {}
+        res = await self._execute(
+            self.supabase.table("collection_freshness")
+            .select("subject_id,fetched_at,fetched_by")
+            .eq("account_id", account_id)
+            .eq("data_kind", data_kind)
+            .in_("subject_id", list(subject_ids))
+        )
+        raise_for_error(res)
+        return {
+            row["subject_id"]: row["fetched_at"]
+            for row in get_data(res)
+            if exclude_fetched_by is None or row.get("fetched_by") != exclude_fetched_by
+        }
+    
+    async def mark_fetched(
+        self,
+        account_id: str,
+        data_kind: str,
+        subject_ids: List[str],
+        fetched_at: datetime,
+        fetched_by: Optional[str] = None
+    ) -> None:
+        """対象の最終取得時刻を一括記録"""
+        if not subject_ids:
+            return
+        rows = [
+            prepare_record({
+                "account_id": account_id,
+                "data_kind": data_kind,
+                "subject_id": subject_id,
+                "fetched_at": fetched_at,
+                "fetched_by": fetched_by,
+            })
+            for subject_id in dict.fromkeys(subject_ids)
+        ]
+        res = await self._execute(
+            self.supabase.table("collection_freshness")
+            .upsert(rows, on_conflict="account_id,data_kind,subject_id")
+        )
+        raise_for_error(res)
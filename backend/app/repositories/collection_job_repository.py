@@ -0,0 +1,96 @@
+"""
+Collection Job Repository
+Supabase (PostgREST) 経由で collection_jobs を操作するデータアクセス層
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .base_repository import BaseRepository
+from ..core.records import Record, to_record
+from ..core.supabase_utils import get_single_data, prepare_record, raise_for_error
+
+
+class CollectionJobRepository(BaseRepository):
+    """収集ジョブキュー用リポジトリ"""
+    
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        max_attempts: int = 1,
+        dedupe_key: str = ""
+    ) -> Optional[Record]:
+        """ジョブ登録（同種の待機中・実行中ジョブがあれば登録せず None）"""
+        res = await self._execute(
+            self.supabase.rpc(
+                "enqueue_collection_job",
+                {
+                    "p_job_type": job_type,
+                    "p_payload": payload,
+                    "p_max_attempts": max_attempts,
+                    "p_dedupe_key": dedupe_key,
+                },
+            )
+        )
+        raise_for_error(res)
+        return to_record(get_single_data(res))
+    
+    async def claim(self, worker_id: str, lease_seconds: int, job_types: Optional[List[str]] = None) -> Optional[Record]:
+        """実行可能なジョブを1件取得してロック"""
+        res = await self._execute(
+            self.supabase.rpc(
+                "claim_collection_job",
+                {"p_worker": worker_id, "p_lease_seconds": lease_seconds, "p_job_types": job_types},
+            )
+        )
+        raise_for_error(res)
+        return to_record(get_single_data(res))
+    
+    async def heartbeat(
+        self,
+        job_id: str,
+        worker_id: str,
+        lease_seconds: int,
+        progress: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """リース延長と進捗保存（保持ワーカーでなくなっていれば False）"""
+        res = await self._execute(
+            self.supabase.rpc(
+                "heartbeat_collection_job",
+                {
+                    "p_id": job_id,
+                    "p_worker": worker_id,
+                    "p_lease_seconds": lease_seconds,
+                    "p_progress": progress,
+                },
+            )
+        )
+        raise_for_error(res)
+        # スカラー関数のため data は真偽値そのもの
+        return getattr(res, "data", None) is True
+    
+    async def finish(self, job_id: str, worker_id: str, changes: Dict[str, Any]) -> None:
+        """ジョブの終了状態を保存（保持ワーカーのみ）"""
+        changes = {**changes, "locked_by": None, "locked_until": None, "updated_at": datetime.now(timezone.utc)}
+        res = await self._execute(
+            self.supabase.table("collection_jobs")
+            .update(prepare_record(changes))
+            .eq("id", job_id)
+            .eq("locked_by", worker_id)
+        )
+        raise_for_error(res)
+    
+    async def get_by_id(self, job_id: str) -> Optional[Record]:
+        """ID によるジョブ取得"""
+        res = await self._execute(self.supabase.table("collection_jobs").select("*").eq("id", job_id).limit(1))
+        raise_for_error(res)
+        return to_record(get_single_data(res))
+    
+    async def get_latest(self, job_type: str, statuses: Optional[List[str]] = None) -> Optional[Record]:
+        """ジョブ種別の最新ジョブ取得"""
+        query = self.supabase.table("collection_jobs").select("*").eq("job_type", job_type)
+        if statuses:
+            query = query.in_("status", statuses)
+        res = await self._execute(query.order("created_at", desc=True).limit(1))
+        raise_for_error(res)
+        return to_record(get_single_data(res))
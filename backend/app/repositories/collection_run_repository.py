@@ -0,0 +1,66 @@
+"""
+Collection Run Repository
+Supabase (PostgREST) 経由で collection_runs を操作するデータアクセス層
+"""
+from typing import Any, Dict, Optional
+
+from .base_repository import BaseRepository
+from ..core.records import Record, to_record
+from ..core.supabase_utils import get_data, get_single_data, prepare_record, raise_for_error
+
+
+class CollectionRunRepository(BaseRepository):
+    """収集ジョブのリース・ステータス用リポジトリ"""
+    
+    async def acquire(self, name: str, owner: str, ttl_seconds: int) -> Optional[Record]:
+        """リース獲得（既に有効なリースがある場合は None）"""
+        res = await self._execute(
+            self.supabase.rpc(
+                "acquire_collection_run",
+                {"p_name": name, "p_owner": owner, "p_ttl_seconds": ttl_seconds},
+            )
+        )
+        raise_for_error(res)
+        data = get_data(res)
+        return to_record(data[0]) if data else None
+    
+    async def renew(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        """リース延長（保持者でなくなっていれば False）"""
+        res = await self._execute(
+            self.supabase.rpc(
+                "renew_collection_run",
+                {"p_name": name, "p_owner": owner, "p_ttl_seconds": ttl_seconds},
+            )
+        )
+        raise_for_error(res)
+        # スカラー関数のため data は真偽値そのもの
+        return getattr(res, "data", None) is True
+    
+    async def release(self, name: str, owner: str) -> None:
+        """リース解放（保持者のみ）"""
+        res = await self._execute(
+            self.supabase.table("collection_runs")
+            .update({"owner": None, "lease_expires_at": None})
+            .eq("name", name)
+            .eq("owner", owner)
+        )
+        raise_for_error(res)
+    
+    async def get(self, name: str) -> Optional[Record]:
+        """ジョブ行の取得"""
+        res = await self._execute(
+            self.supabase.table("collection_runs")
+            .select("name,owner,lease_expires_at,status")
+            .eq("name", name)
+            .limit(1)
+        )
+        raise_for_error(res)
+        return to_record(get_single_data(res))
+    
+    async def set_status(self, name: str, status: Dict[str, Any]) -> None:
+        """ステータスの保存"""
+        res = await self._execute(
+            self.supabase.table("collection_runs")
+            .upsert(prepare_record({"name": name, "status": status}), on_conflict="name")
+        )
+        raise_for_error(res)
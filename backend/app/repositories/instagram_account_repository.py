@@ -5,63 +5,57 @@ Supabase (PostgREST) 経由で instagram_accounts を操作するデータアク
 from typing import List, Optional
 from datetime import datetime
 
-from supabase import Client
-
+from .base_repository import BaseRepository
 from ..core.records import Record, to_record, to_records
 from ..core.supabase_utils import get_data, get_single_data, prepare_record, raise_for_error
 
 
-class InstagramAccountRepository:
+class InstagramAccountRepository(BaseRepository):
     """Instagram アカウント専用リポジトリ"""
     
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
-    
     async def get_all(self) -> List[Record]:
         """全アカウント取得"""
-        res = self.supabase.table("instagram_accounts").select("*").order("created_at", desc=False).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").select("*").order("created_at", desc=False))
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_active_accounts(self) -> List[Record]:
         """アクティブなアカウント取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_accounts")
             .select("*")
             .eq("is_active", True)
             .order("created_at", desc=False)
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_id(self, account_id: str) -> Optional[Record]:
         """ID によるアカウント取得"""
-        res = self.supabase.table("instagram_accounts").select("*").eq("id", account_id).limit(1).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").select("*").eq("id", account_id).limit(1))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def get_by_instagram_user_id(self, instagram_user_id: str) -> Optional[Record]:
         """Instagram User ID によるアカウント取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_accounts")
             .select("*")
             .eq("instagram_user_id", instagram_user_id)
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def get_by_username(self, username: str) -> Optional[Record]:
         """ユーザーネームによるアカウント取得"""
-        res = self.supabase.table("instagram_accounts").select("*").eq("username", username).limit(1).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").select("*").eq("username", username).limit(1))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def create(self, account_data: dict) -> Record:
         """新規アカウント作成"""
-        res = self.supabase.table("instagram_accounts").insert(prepare_record(account_data)).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").insert(prepare_record(account_data)))
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(account_data)
     
@@ -69,7 +63,7 @@ class InstagramAccountRepository:
         """アカウント情報更新"""
         # 更新時刻を設定
         account_data["updated_at"] = datetime.now().isoformat()
-        res = self.supabase.table("instagram_accounts").update(prepare_record(account_data)).eq("id", account_id).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").update(prepare_record(account_data)).eq("id", account_id))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
@@ -115,7 +109,7 @@ class InstagramAccountRepository:
     
     async def delete(self, account_id: str) -> bool:
         """アカウント削除"""
-        res = self.supabase.table("instagram_accounts").delete().eq("id", account_id).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").delete().eq("id", account_id))
         raise_for_error(res)
         return bool(get_data(res))
     
@@ -124,12 +118,11 @@ class InstagramAccountRepository:
         from datetime import timedelta
         threshold_date = datetime.now() + timedelta(days=days_threshold)
         
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_accounts")
             .select("*")
             .eq("is_active", True)
             .lte("token_expires_at", threshold_date.isoformat())
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
@@ -144,6 +137,21 @@ class InstagramAccountRepository:
             },
         )
     
+    async def update_post_watermark(
+        self,
+        account_id: str,
+        last_seen_post_at: datetime,
+        last_seen_post_id: str
+    ) -> Optional[Record]:
+        """新規投稿検出の高水位マーク（最新処理済み投稿）更新"""
+        return await self.update(
+            account_id,
+            {
+                "last_seen_post_at": last_seen_post_at.isoformat(),
+                "last_seen_post_id": last_seen_post_id,
+            },
+        )
+    
     async def update_collection_status(
         self, 
         account_id: str, 
@@ -161,7 +169,7 @@ class InstagramAccountRepository:
         query = self.supabase.table("instagram_accounts").select("*").eq("is_active", True)
         if account_filter:
             query = query.in_("instagram_user_id", account_filter)
-        res = query.execute()
+        res = await self._execute(query)
         raise_for_error(res)
         return to_records(get_data(res))
     
@@ -170,6 +178,6 @@ class InstagramAccountRepository:
         if not account_ids:
             return 0
         update_data = {"last_synced_at": sync_time.isoformat(), "updated_at": datetime.now().isoformat()}
-        res = self.supabase.table("instagram_accounts").update(update_data).in_("id", account_ids).execute()
+        res = await self._execute(self.supabase.table("instagram_accounts").update(update_data).in_("id", account_ids))
         raise_for_error(res)
         return len(get_data(res))
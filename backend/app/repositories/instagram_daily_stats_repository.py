@@ -2,21 +2,17 @@
 Instagram Daily Stats Repository
 Supabase (PostgREST) 経由で instagram_daily_stats を操作するデータアクセス層
 """
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 from datetime import date, datetime
 
-from supabase import Client
-
+from .base_repository import BaseRepository
 from ..core.records import Record, to_record, to_records
 from ..core.supabase_utils import get_data, get_single_data, prepare_record, raise_for_error
 
 
-class InstagramDailyStatsRepository:
+class InstagramDailyStatsRepository(BaseRepository):
     """Instagram 日次統計専用リポジトリ"""
     
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
-    
     async def get_all(self, account_id: str = None, limit: int = None) -> List[Record]:
         """日次統計一覧取得"""
         query = self.supabase.table("instagram_daily_stats").select("*")
@@ -25,13 +21,13 @@ class InstagramDailyStatsRepository:
         query = query.order("stats_date", desc=True)
         if limit:
             query = query.limit(limit)
-        res = query.execute()
+        res = await self._execute(query)
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_id(self, stats_id: str) -> Optional[Record]:
         """ID による日次統計取得"""
-        res = self.supabase.table("instagram_daily_stats").select("*").eq("id", stats_id).limit(1).execute()
+        res = await self._execute(self.supabase.table("instagram_daily_stats").select("*").eq("id", stats_id).limit(1))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
@@ -46,44 +42,41 @@ class InstagramDailyStatsRepository:
         end_date: date
     ) -> List[Record]:
         """日付範囲による日次統計取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_daily_stats")
             .select("*")
             .eq("account_id", account_id)
             .gte("stats_date", start_date.isoformat())
             .lte("stats_date", end_date.isoformat())
             .order("stats_date", desc=True)
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_specific_date(self, account_id: str, target_date: date) -> Optional[Record]:
         """特定日の日次統計取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_daily_stats")
             .select("*")
             .eq("account_id", account_id)
             .eq("stats_date", target_date.isoformat())
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def create(self, stats_data: dict) -> Record:
         """新規日次統計作成"""
-        res = self.supabase.table("instagram_daily_stats").insert(prepare_record(stats_data)).execute()
+        res = await self._execute(self.supabase.table("instagram_daily_stats").insert(prepare_record(stats_data)))
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(stats_data)
     
     async def create_or_update(self, stats_data: dict) -> Record:
         """日次統計作成または更新（アカウントIDと日付で判定）"""
         # on_conflict はDB側のユニーク制約 (account_id, stats_date) に依存
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_daily_stats")
             .upsert(prepare_record(stats_data), on_conflict="account_id,stats_date")
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(stats_data)
@@ -94,25 +87,24 @@ class InstagramDailyStatsRepository:
     
     async def update(self, stats_id: str, stats_data: dict) -> Optional[Record]:
         """日次統計情報更新"""
-        res = self.supabase.table("instagram_daily_stats").update(prepare_record(stats_data)).eq("id", stats_id).execute()
+        res = await self._execute(self.supabase.table("instagram_daily_stats").update(prepare_record(stats_data)).eq("id", stats_id))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def delete(self, stats_id: str) -> bool:
         """日次統計削除"""
-        res = self.supabase.table("instagram_daily_stats").delete().eq("id", stats_id).execute()
+        res = await self._execute(self.supabase.table("instagram_daily_stats").delete().eq("id", stats_id))
         raise_for_error(res)
         return bool(get_data(res))
     
     async def get_latest_by_account(self, account_id: str) -> Optional[Record]:
         """アカウントの最新日次統計取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_daily_stats")
             .select("*")
             .eq("account_id", account_id)
             .order("stats_date", desc=True)
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
@@ -194,6 +186,76 @@ class InstagramDailyStatsRepository:
         """一括作成"""
         if not stats_list:
             return []
-        res = self.supabase.table("instagram_daily_stats").insert([prepare_record(s) for s in stats_list]).execute()
+        res = await self._execute(self.supabase.table("instagram_daily_stats").insert([prepare_record(s) for s in stats_list]))
         raise_for_error(res)
         return to_records(get_data(res))
+    
+    async def bulk_upsert(self, stats_list: List[dict], chunk_size: int = 500) -> List[Record]:
+        """一括作成または更新（アカウントIDと日付で判定、chunk_size 件ずつ1リクエスト）"""
+        records: List[Record] = []
+        for i in range(0, len(stats_list), chunk_size):
+            chunk = [prepare_record(s) for s in stats_list[i:i + chunk_size]]
+            res = await self._execute(
+                self.supabase.table("instagram_daily_stats")
+                .upsert(chunk, on_conflict="account_id,stats_date")
+            )
+            raise_for_error(res)
+            records.extend(to_records(get_data(res)))
+        return records
+    
+    async def merge_upsert_range(
+        self,
+        account_id: str,
+        rows: List[dict],
+        merge_fields: Sequence[str]
+    ) -> List[Record]:
+        """
+        日付範囲の行を1回の upsert でマージ保存
+        
+        既存行は merge_fields のみ上書きし、その他の列は既存値を維持する。
+        新規行は rows の値をそのまま作成する。
+        
+        Args:
+            account_id: アカウントID
+            rows: stats_date を含む行（新規作成時の値を含める）
+            merge_fields: 既存行で上書きする列
+            
+        Returns:
+            List[Record]: 保存後の行
+        """
+        if not rows:
+            return []
+        
+        dates = [self._as_date(row["stats_date"]) for row in rows]
+        existing_by_date: Dict[date, Record] = {
+            self._as_date(stats.stats_date): stats
+            for stats in await self.get_by_date_range(account_id, min(dates), max(dates))
+        }
+        
+        # PostgREST の一括 upsert は全行で同じ列を送る必要があるため列を揃える
+        columns = ["account_id", "stats_date"]
+        for row in rows:
+            columns.extend(k for k in row if k not in columns)
+        
+        merged_rows = []
+        for row, stats_date in zip(rows, dates):
+            existing = existing_by_date.get(stats_date)
+            if existing:
+                merged = {column: existing.get(column) for column in columns}
+                merged.update({field: row[field] for field in merge_fields if field in row})
+            else:
+                merged = {column: row.get(column) for column in columns}
+            merged["account_id"] = account_id
+            merged["stats_date"] = stats_date
+            merged_rows.append(merged)
+        
+        return await self.bulk_upsert(merged_rows)
+    
+    @staticmethod
+    def _as_date(value) -> date:
+        """stats_date 値を date に変換"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(str(value)[:10])
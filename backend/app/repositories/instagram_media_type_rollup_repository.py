@@ -0,0 +1,35 @@
+"""
+Instagram Media Type Rollup Repository
+Supabase (PostgREST) 経由で instagram_media_type_rollups を操作するデータアクセス層
+"""
+from typing import List
+
+from .base_repository import BaseRepository
+from ..core.records import Record, to_records
+from ..core.supabase_utils import get_data, raise_for_error
+
+
+class InstagramMediaTypeRollupRepository(BaseRepository):
+    """メディアタイプ別ロールアップ専用リポジトリ"""
+    
+    async def get_by_account(self, account_id: str) -> List[Record]:
+        """アカウントのメディアタイプ別ロールアップ取得（主キーで検索）"""
+        res = await self._execute(
+            self.supabase.table("instagram_media_type_rollups")
+            .select("*")
+            .eq("account_id", account_id)
+            .order("media_type")
+        )
+        raise_for_error(res)
+        return to_records(get_data(res))
+    
+    async def refresh(self, account_id: str) -> int:
+        """アカウントのロールアップを再集計（refresh_media_type_rollups RPC）
+
+        Returns:
+            int: メディアタイプ数
+        """
+        res = await self._execute(self.supabase.rpc("refresh_media_type_rollups", {"p_account_id": account_id}))
+        raise_for_error(res)
+        count = getattr(res, "data", None)
+        return count if isinstance(count, int) else 0
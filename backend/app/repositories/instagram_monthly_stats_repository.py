@@ -5,18 +5,14 @@ Supabase (PostgREST) 経由で instagram_monthly_stats を操作するデータ
 from typing import List, Optional
 from datetime import date
 
-from supabase import Client
-
+from .base_repository import BaseRepository
 from ..core.records import Record, to_record, to_records
 from ..core.supabase_utils import get_data, get_single_data, prepare_record, raise_for_error
 
 
-class InstagramMonthlyStatsRepository:
+class InstagramMonthlyStatsRepository(BaseRepository):
     """Instagram 月次統計専用リポジトリ"""
     
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
-    
     async def get_all(self, account_id: str = None, limit: int = None) -> List[Record]:
         """月次統計一覧取得"""
         query = self.supabase.table("instagram_monthly_stats").select("*")
@@ -25,13 +21,13 @@ class InstagramMonthlyStatsRepository:
         query = query.order("stats_month", desc=True)
         if limit:
             query = query.limit(limit)
-        res = query.execute()
+        res = await self._execute(query)
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_id(self, stats_id: str) -> Optional[Record]:
         """ID による月次統計取得"""
-        res = self.supabase.table("instagram_monthly_stats").select("*").eq("id", stats_id).limit(1).execute()
+        res = await self._execute(self.supabase.table("instagram_monthly_stats").select("*").eq("id", stats_id).limit(1))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
@@ -46,68 +42,64 @@ class InstagramMonthlyStatsRepository:
         end_month: date
     ) -> List[Record]:
         """月範囲による月次統計取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_monthly_stats")
             .select("*")
             .eq("account_id", account_id)
             .gte("stats_month", start_month.isoformat())
             .lte("stats_month", end_month.isoformat())
             .order("stats_month", desc=True)
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_specific_month(self, account_id: str, target_month: date) -> Optional[Record]:
         """特定月の月次統計取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_monthly_stats")
             .select("*")
             .eq("account_id", account_id)
             .eq("stats_month", target_month.isoformat())
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def create(self, stats_data: dict) -> Record:
         """新規月次統計作成"""
-        res = self.supabase.table("instagram_monthly_stats").insert(prepare_record(stats_data)).execute()
+        res = await self._execute(self.supabase.table("instagram_monthly_stats").insert(prepare_record(stats_data)))
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(stats_data)
     
     async def create_or_update(self, stats_data: dict) -> Record:
         """月次統計作成または更新（アカウントIDと月で判定）"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_monthly_stats")
             .upsert(prepare_record(stats_data), on_conflict="account_id,stats_month")
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(stats_data)
     
     async def update(self, stats_id: str, stats_data: dict) -> Optional[Record]:
         """月次統計情報更新"""
-        res = self.supabase.table("instagram_monthly_stats").update(prepare_record(stats_data)).eq("id", stats_id).execute()
+        res = await self._execute(self.supabase.table("instagram_monthly_stats").update(prepare_record(stats_data)).eq("id", stats_id))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def delete(self, stats_id: str) -> bool:
         """月次統計削除"""
-        res = self.supabase.table("instagram_monthly_stats").delete().eq("id", stats_id).execute()
+        res = await self._execute(self.supabase.table("instagram_monthly_stats").delete().eq("id", stats_id))
         raise_for_error(res)
         return bool(get_data(res))
     
     async def get_latest_by_account(self, account_id: str) -> Optional[Record]:
         """アカウントの最新月次統計取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_monthly_stats")
             .select("*")
             .eq("account_id", account_id)
             .order("stats_month", desc=True)
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
@@ -196,13 +188,12 @@ class InstagramMonthlyStatsRepository:
         }
         order_metric = metric if metric in allowed_metrics else "avg_engagement_rate"
 
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_monthly_stats")
             .select("*")
             .eq("account_id", account_id)
             .order(order_metric, desc=True)
             .limit(limit)
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
@@ -250,6 +241,6 @@ class InstagramMonthlyStatsRepository:
         """一括作成"""
         if not stats_list:
             return []
-        res = self.supabase.table("instagram_monthly_stats").insert([prepare_record(s) for s in stats_list]).execute()
+        res = await self._execute(self.supabase.table("instagram_monthly_stats").insert([prepare_record(s) for s in stats_list]))
         raise_for_error(res)
         return to_records(get_data(res))
@@ -2,33 +2,70 @@
 Instagram Post Metrics Repository
 Supabase (PostgREST) 経由で instagram_post_metrics を操作するデータアクセス層
 """
+import logging
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime, time, timedelta, timezone
 
 from supabase import Client
 
+from .base_repository import BaseRepository
 from ..core.records import Record, to_record, to_records
 from ..core.supabase_utils import get_data, get_single_data, prepare_record, raise_for_error
 
+logger = logging.getLogger(__name__)
 
-class InstagramPostMetricsRepository:
+# 変化検出に使うカウンタ系カラム
+_COUNTER_FIELDS = (
+    "likes",
+    "comments",
+    "saved",
+    "shares",
+    "views",
+    "reach",
+    "total_interactions",
+    "follows",
+    "profile_visits",
+    "profile_activity",
+    "video_view_total_time",
+    "avg_watch_time",
+)
+
+# 投稿ごとの最新メトリクス（latest_post_metrics ビュー）
+_LATEST_VIEW = "latest_post_metrics"
+# in_() の URL 長を抑えるための1リクエストあたりの投稿ID数
+_LATEST_CHUNK_SIZE = 200
+# 履歴取得の1リクエストあたりの行数（PostgREST の max-rows（Supabase 既定 1000）以下にする）
+_HISTORY_PAGE_SIZE = 1000
+# get_metrics_summary の合計値キー（total_<メトリクス列名>）
+_SUMMARY_TOTALS = (
+    "total_likes",
+    "total_comments",
+    "total_saved",
+    "total_shares",
+    "total_views",
+    "total_reach",
+)
+
+
+class InstagramPostMetricsRepository(BaseRepository):
     """Instagram 投稿メトリクス専用リポジトリ"""
     
     def __init__(self, supabase: Client):
-        self.supabase = supabase
+        super().__init__(supabase)
+        self.skipped_writes = 0
     
     async def get_all(self, post_id: str = None) -> List[Record]:
         """メトリクス一覧取得"""
         query = self.supabase.table("instagram_post_metrics").select("*")
         if post_id:
             query = query.eq("post_id", post_id)
-        res = query.order("recorded_at", desc=True).execute()
+        res = await self._execute(query.order("recorded_at", desc=True))
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_id(self, metrics_id: str) -> Optional[Record]:
         """ID によるメトリクス取得"""
-        res = self.supabase.table("instagram_post_metrics").select("*").eq("id", metrics_id).limit(1).execute()
+        res = await self._execute(self.supabase.table("instagram_post_metrics").select("*").eq("id", metrics_id).limit(1))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
@@ -38,13 +75,12 @@ class InstagramPostMetricsRepository:
     
     async def get_latest_by_post(self, post_id: str) -> Optional[Record]:
         """投稿の最新メトリクス取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_post_metrics")
             .select("*")
             .eq("post_id", post_id)
             .order("recorded_at", desc=True)
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
@@ -58,23 +94,49 @@ class InstagramPostMetricsRepository:
         """日付範囲によるメトリクス取得"""
         start_dt = datetime.combine(start_date, time.min).replace(tzinfo=timezone.utc)
         end_dt = datetime.combine(end_date + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_post_metrics")
             .select("*")
             .eq("post_id", post_id)
             .gte("recorded_at", start_dt.isoformat())
             .lt("recorded_at", end_dt.isoformat())
             .order("recorded_at", desc=True)
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
     
+    async def get_history(
+        self,
+        post_id: str,
+        columns: str = "*",
+        start_dt: Optional[datetime] = None,
+        end_dt: Optional[datetime] = None
+    ) -> List[Record]:
+        """投稿のメトリクス履歴を記録順（昇順）に取得（(post_id, recorded_at) インデックスを使用）
+
+        max-rows で新しい行が切り捨てられないよう、短いページが返るまでページングして取得する。
+        """
+        rows: List[Dict[str, Any]] = []
+        while True:
+            query = self.supabase.table("instagram_post_metrics").select(columns).eq("post_id", post_id)
+            if start_dt:
+                query = query.gte("recorded_at", start_dt.isoformat())
+            if end_dt:
+                query = query.lt("recorded_at", end_dt.isoformat())
+            res = await self._execute(
+                query.order("recorded_at").order("id").range(len(rows), len(rows) + _HISTORY_PAGE_SIZE - 1)
+            )
+            raise_for_error(res)
+            page = get_data(res)
+            rows.extend(page)
+            if len(page) < _HISTORY_PAGE_SIZE:
+                return to_records(rows)
+    
     async def get_by_specific_date(self, post_id: str, target_date: date) -> Optional[Record]:
         """特定日のメトリクス取得"""
         start_dt = datetime.combine(target_date, time.min).replace(tzinfo=timezone.utc)
         end_dt = datetime.combine(target_date + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_post_metrics")
             .select("*")
             .eq("post_id", post_id)
@@ -82,7 +144,20 @@ class InstagramPostMetricsRepository:
             .lt("recorded_at", end_dt.isoformat())
             .order("recorded_at", desc=True)
             .limit(1)
-            .execute()
+        )
+        raise_for_error(res)
+        return to_record(get_single_data(res))
+    
+    async def get_latest_until(self, post_id: str, target_date: date) -> Optional[Record]:
+        """target_date（UTC）の終わりまでで最新のメトリクス取得（(post_id, recorded_at) インデックスを使用）"""
+        end_dt = datetime.combine(target_date + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
+        res = await self._execute(
+            self.supabase.table("instagram_post_metrics")
+            .select("*")
+            .eq("post_id", post_id)
+            .lt("recorded_at", end_dt.isoformat())
+            .order("recorded_at", desc=True)
+            .limit(1)
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
@@ -93,36 +168,59 @@ class InstagramPostMetricsRepository:
         if 'engagement_rate' not in metrics_data or metrics_data['engagement_rate'] == 0:
             metrics_data['engagement_rate'] = self._calculate_engagement_rate(metrics_data)
         
-        res = self.supabase.table("instagram_post_metrics").insert(prepare_record(metrics_data)).execute()
+        res = await self._execute(self.supabase.table("instagram_post_metrics").insert(prepare_record(metrics_data)))
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(metrics_data)
     
     async def create_or_update_daily(self, metrics_data: dict) -> Record:
-        """日別メトリクス作成または更新"""
-        post_id = metrics_data['post_id']
+        """日別メトリクス作成または更新
+
+        DB 上で対象日の終わりまでの最新スナップショットとカウンタ値が同一の場合は書き込みを省略し、
+        skipped_writes をカウントする（同日なら更新不要、翌日以降なら行を増やさない）。
+        スナップショットは毎回 DB から取得するため、他プロセス（シャード・ワーカー・GitHub Actions）の
+        書き込みとも食い違わない。
+        """
+        post_id = str(metrics_data['post_id'])
         # "日別" は recorded_at の UTC 日付で判定する（実行環境のローカルTZに依存しない）
-        recorded_at = metrics_data.get("recorded_at")
-        if isinstance(recorded_at, datetime):
-            dt = recorded_at if recorded_at.tzinfo else recorded_at.replace(tzinfo=timezone.utc)
-            target_date = dt.astimezone(timezone.utc).date()
-        elif isinstance(recorded_at, str):
+        target_date = self._utc_date(metrics_data.get("recorded_at")) or datetime.now(timezone.utc).date()
+
+        # 対象日の行があればそれが、無ければ対象日より前の最新行が返る
+        snapshot = await self.get_latest_until(post_id, target_date)
+        if snapshot and self._counters_unchanged(snapshot, metrics_data):
+            self.skipped_writes += 1
+            return snapshot
+
+        if snapshot and self._utc_date(snapshot.get("recorded_at")) == target_date:
+            # 対象日のメトリクスが既に存在する場合は更新
+            return await self.update(snapshot.id, metrics_data) or snapshot
+        return await self.create(metrics_data)
+    
+    @staticmethod
+    def _counters_unchanged(snapshot: dict, metrics_data: dict) -> bool:
+        """受信メトリクスのカウンタがスナップショットと同一か"""
+        compared = False
+        for field in _COUNTER_FIELDS:
+            if field not in metrics_data:
+                continue
+            compared = True
+            if (metrics_data.get(field) or 0) != (snapshot.get(field) or 0):
+                return False
+        return compared
+    
+    @staticmethod
+    def _utc_date(value: Any) -> Optional[date]:
+        """recorded_at（datetime / ISO 文字列）の UTC 日付"""
+        if isinstance(value, datetime):
+            dt = value
+        elif isinstance(value, str):
             try:
-                parsed = datetime.fromisoformat(recorded_at.replace("Z", "+00:00"))
-                dt = parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
-                target_date = dt.astimezone(timezone.utc).date()
+                dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
             except ValueError:
-                target_date = datetime.now(timezone.utc).date()
+                return None
         else:
-            target_date = datetime.now(timezone.utc).date()
-
-        existing_metrics = await self.get_by_specific_date(post_id, target_date)
-        
-        if existing_metrics:
-            # 今日のメトリクスが既に存在する場合は更新
-            return await self.update(existing_metrics.id, metrics_data) or existing_metrics
-        else:
-            # 存在しない場合は新規作成
-            return await self.create(metrics_data)
+            return None
+        dt = dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc).date()
     
     async def update(self, metrics_id: str, metrics_data: dict) -> Optional[Record]:
         """メトリクス更新"""
@@ -132,13 +230,13 @@ class InstagramPostMetricsRepository:
             combined_data = {**(existing or {}), **metrics_data}
             metrics_data['engagement_rate'] = self._calculate_engagement_rate(combined_data)
 
-        res = self.supabase.table("instagram_post_metrics").update(prepare_record(metrics_data)).eq("id", metrics_id).execute()
+        res = await self._execute(self.supabase.table("instagram_post_metrics").update(prepare_record(metrics_data)).eq("id", metrics_id))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def delete(self, metrics_id: str) -> bool:
         """メトリクス削除"""
-        res = self.supabase.table("instagram_post_metrics").delete().eq("id", metrics_id).execute()
+        res = await self._execute(self.supabase.table("instagram_post_metrics").delete().eq("id", metrics_id))
         raise_for_error(res)
         return bool(get_data(res))
     
@@ -151,7 +249,7 @@ class InstagramPostMetricsRepository:
         """高パフォーマンス投稿取得"""
         query = self.supabase.table("instagram_post_metrics").select("*")
         if account_id:
-            posts_res = self.supabase.table("instagram_posts").select("id").eq("account_id", account_id).execute()
+            posts_res = await self._execute(self.supabase.table("instagram_posts").select("id").eq("account_id", account_id))
             raise_for_error(posts_res)
             post_ids = [p["id"] for p in get_data(posts_res) if p.get("id")]
             if not post_ids:
@@ -172,64 +270,107 @@ class InstagramPostMetricsRepository:
         order_metric = metric if metric in allowed_metrics else "engagement_rate"
 
         query = query.order(order_metric, desc=True).limit(limit)
-        res = query.execute()
+        res = await self._execute(query)
         raise_for_error(res)
         return to_records(get_data(res))
     
+    async def get_latest_by_posts(self, post_ids: List[str], columns: str = "*") -> Dict[str, Record]:
+        """複数投稿の最新メトリクス一括取得（post_id -> Record）
+
+        latest_post_metrics ビュー（DISTINCT ON (post_id)）から取得するため、
+        返却行数は履歴日数によらず投稿数以下になる。
+        """
+        if not post_ids:
+            return {}
+        if columns != "*" and "post_id" not in columns.split(","):
+            columns = f"post_id,{columns}"
+
+        latest_by_post: Dict[str, Record] = {}
+        for start in range(0, len(post_ids), _LATEST_CHUNK_SIZE):
+            res = await self._execute(
+                self.supabase.table(_LATEST_VIEW)
+                .select(columns)
+                .in_("post_id", post_ids[start:start + _LATEST_CHUNK_SIZE])
+            )
+            raise_for_error(res)
+            for row in get_data(res):
+                if row.get("post_id"):
+                    latest_by_post[row["post_id"]] = Record(row)
+        return latest_by_post
+    
     async def get_metrics_summary(self, post_ids: List[str]) -> Dict[str, Any]:
-        """メトリクス集計取得"""
+        """メトリクス集計取得（post_metrics_summary RPC、失敗時は最新メトリクスを取得して集計）"""
         if not post_ids:
             return {}
         
-        # 各投稿の最新メトリクスを Python 側で集約
-        res = (
-            self.supabase.table("instagram_post_metrics")
-            .select("post_id,likes,comments,saved,shares,views,reach,engagement_rate,recorded_at")
-            .in_("post_id", post_ids)
-            .order("recorded_at", desc=True)
-            .execute()
+        try:
+            res = await self._execute(self.supabase.rpc("post_metrics_summary", {"p_post_ids": post_ids}))
+            raise_for_error(res)
+            totals = getattr(res, "data", None)
+        except Exception as e:
+            logger.warning(f"post_metrics_summary RPC failed, aggregating in Python: {e}")
+            totals = None
+        
+        if isinstance(totals, dict):
+            posts_count = totals.get("total_posts") or 0
+            if not posts_count:
+                return {}
+            return self._format_metrics_summary(
+                posts_count,
+                {key: totals.get(key) or 0 for key in _SUMMARY_TOTALS},
+                float(totals.get("avg_engagement_rate") or 0),
+            )
+        
+        # 各投稿の最新メトリクスを集約
+        latest_by_post = await self.get_latest_by_posts(
+            post_ids, columns="post_id,likes,comments,saved,shares,views,reach,engagement_rate,recorded_at"
         )
-        raise_for_error(res)
-        rows = get_data(res)
-        if not rows:
+        if not latest_by_post:
             return {}
 
-        latest_by_post: dict[str, dict] = {}
-        for row in rows:
-            pid = row.get("post_id")
-            if not pid or pid in latest_by_post:
-                continue
-            latest_by_post[pid] = row
-
         latest_metrics = list(latest_by_post.values())
-        
-        # 集計計算
-        total_likes = sum((m.get("likes") or 0) for m in latest_metrics)
-        total_comments = sum((m.get("comments") or 0) for m in latest_metrics)
-        total_saved = sum((m.get("saved") or 0) for m in latest_metrics)
-        total_shares = sum((m.get("shares") or 0) for m in latest_metrics)
-        total_views = sum((m.get("views") or 0) for m in latest_metrics)
-        total_reach = sum((m.get("reach") or 0) for m in latest_metrics)
-
-        avg_engagement_rate = (
-            sum((m.get("engagement_rate") or 0) for m in latest_metrics) / len(latest_metrics)
-            if latest_metrics
-            else 0
-        )
-        
+        totals = {
+            key: sum((m.get(key.replace("total_", "", 1)) or 0) for m in latest_metrics)
+            for key in _SUMMARY_TOTALS
+        }
+        avg_engagement_rate = sum(float(m.get("engagement_rate") or 0) for m in latest_metrics) / len(latest_metrics)
+        return self._format_metrics_summary(len(latest_metrics), totals, avg_engagement_rate)
+    
+    @staticmethod
+    def _format_metrics_summary(posts_count: int, totals: Dict[str, int], avg_engagement_rate: float) -> Dict[str, Any]:
         return {
-            'total_posts': len(latest_metrics),
-            'total_likes': total_likes,
-            'total_comments': total_comments,
-            'total_saved': total_saved,
-            'total_shares': total_shares,
-            'total_views': total_views,
-            'total_reach': total_reach,
-            'avg_likes_per_post': total_likes / len(latest_metrics),
-            'avg_comments_per_post': total_comments / len(latest_metrics),
+            'total_posts': posts_count,
+            **totals,
+            'avg_likes_per_post': totals['total_likes'] / posts_count,
+            'avg_comments_per_post': totals['total_comments'] / posts_count,
             'avg_engagement_rate': round(avg_engagement_rate, 2)
         }
     
+    async def get_post_insight_summary(
+        self,
+        account_id: str,
+        from_dt: Optional[datetime] = None,
+        to_dt: Optional[datetime] = None,
+        media_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """アカウントの投稿インサイトサマリーを DB 側で集計（post_insight_summary RPC）"""
+        res = await self._execute(
+            self.supabase.rpc(
+                "post_insight_summary",
+                {
+                    "p_account_id": account_id,
+                    "p_from": from_dt.isoformat() if from_dt else None,
+                    "p_to": to_dt.isoformat() if to_dt else None,
+                    "p_media_type": media_type,
+                    "p_limit": limit,
+                },
+            )
+        )
+        raise_for_error(res)
+        data = getattr(res, "data", None)
+        return data if isinstance(data, dict) else None
+    
     def _calculate_engagement_rate(self, metrics_data: dict) -> float:
         """エンゲージメント率計算"""
         likes = metrics_data.get('likes', 0) or 0
@@ -2,21 +2,21 @@
 Instagram Post Repository
 Supabase (PostgREST) 経由で instagram_posts を操作するデータアクセス層
 """
-from typing import List, Optional
+import logging
+from typing import Dict, List, Optional
 from datetime import date, datetime, time, timedelta, timezone
 
-from supabase import Client
-
+from .base_repository import BaseRepository
 from ..core.records import Record, to_record, to_records
 from ..core.supabase_utils import get_data, get_count, get_single_data, prepare_record, raise_for_error
+from ..utils.media_url import with_media_url_expiry
+
+logger = logging.getLogger(__name__)
 
 
-class InstagramPostRepository:
+class InstagramPostRepository(BaseRepository):
     """Instagram 投稿専用リポジトリ"""
     
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
-    
     async def get_all(self, account_id: str = None, limit: int = None) -> List[Record]:
         """投稿一覧取得"""
         query = self.supabase.table("instagram_posts").select("*")
@@ -25,28 +25,43 @@ class InstagramPostRepository:
         query = query.order("posted_at", desc=True)
         if limit:
             query = query.limit(limit)
-        res = query.execute()
+        res = await self._execute(query)
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def get_by_id(self, post_id: str) -> Optional[Record]:
         """ID による投稿取得"""
-        res = self.supabase.table("instagram_posts").select("*").eq("id", post_id).limit(1).execute()
+        res = await self._execute(self.supabase.table("instagram_posts").select("*").eq("id", post_id).limit(1))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def get_by_instagram_post_id(self, instagram_post_id: str) -> Optional[Record]:
         """Instagram Post ID による投稿取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_posts")
             .select("*")
             .eq("instagram_post_id", instagram_post_id)
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
     
+    async def get_by_instagram_post_ids(
+        self,
+        instagram_post_ids: List[str],
+        columns: str = "*"
+    ) -> List[Record]:
+        """複数の Instagram Post ID による投稿一括取得"""
+        if not instagram_post_ids:
+            return []
+        res = await self._execute(
+            self.supabase.table("instagram_posts")
+            .select(columns)
+            .in_("instagram_post_id", instagram_post_ids)
+        )
+        raise_for_error(res)
+        return to_records(get_data(res))
+    
     async def get_by_account(self, account_id: str, limit: int = None) -> List[Record]:
         """アカウント別投稿取得"""
         return await self.get_all(account_id=account_id, limit=limit)
@@ -60,14 +75,13 @@ class InstagramPostRepository:
         """日付範囲による投稿取得"""
         start_dt = datetime.combine(start_date, time.min).replace(tzinfo=timezone.utc)
         end_dt = datetime.combine(end_date + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_posts")
             .select("*")
             .eq("account_id", account_id)
             .gte("posted_at", start_dt.isoformat())
             .lt("posted_at", end_dt.isoformat())
             .order("posted_at", desc=True)
-            .execute()
         )
         raise_for_error(res)
         return to_records(get_data(res))
@@ -92,38 +106,121 @@ class InstagramPostRepository:
         )
         if limit:
             query = query.limit(limit)
-        res = query.execute()
+        res = await self._execute(query)
         raise_for_error(res)
         return to_records(get_data(res))
     
     async def create(self, post_data: dict) -> Record:
         """新規投稿作成"""
-        res = self.supabase.table("instagram_posts").insert(prepare_record(post_data)).execute()
+        res = await self._execute(self.supabase.table("instagram_posts").insert(prepare_record(with_media_url_expiry(post_data))))
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(post_data)
     
     async def create_or_update(self, post_data: dict) -> Record:
         """投稿作成または更新（Instagram Post ID で判定）"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_posts")
-            .upsert(prepare_record(post_data), on_conflict="instagram_post_id")
-            .execute()
+            .upsert(prepare_record(with_media_url_expiry(post_data)), on_conflict="instagram_post_id")
         )
         raise_for_error(res)
         return to_record(get_single_data(res)) or Record(post_data)
     
+    async def bulk_upsert(self, posts: List[dict]) -> Dict[str, str]:
+        """投稿の一括作成または更新（Instagram Post ID で判定）
+
+        Returns:
+            Dict[str, str]: instagram_post_id -> 投稿ID(UUID) のマップ
+        """
+        if not posts:
+            return {}
+        # 同一チャンク内の重複は ON CONFLICT で失敗するため最後の値を採用
+        deduped = {str(p["instagram_post_id"]): prepare_record(with_media_url_expiry(p)) for p in posts}
+        res = await self._execute(
+            self.supabase.table("instagram_posts")
+            .upsert(list(deduped.values()), on_conflict="instagram_post_id")
+        )
+        raise_for_error(res)
+        return {
+            str(row["instagram_post_id"]): str(row["id"])
+            for row in get_data(res)
+            if row.get("instagram_post_id") and row.get("id")
+        }
+    
     async def update(self, post_id: str, post_data: dict) -> Optional[Record]:
         """投稿情報更新"""
-        res = self.supabase.table("instagram_posts").update(prepare_record(post_data)).eq("id", post_id).execute()
+        res = await self._execute(self.supabase.table("instagram_posts").update(prepare_record(with_media_url_expiry(post_data))).eq("id", post_id))
         raise_for_error(res)
         return to_record(get_single_data(res))
     
+    async def bulk_update_media_urls(self, updates: List[dict]) -> int:
+        """メディア URL 列の一括更新（bulk_update_post_media_urls RPC で1文、未適用・失敗時は1件ずつ更新）
+
+        Args:
+            updates: id と更新後の media_url / thumbnail_url（両方の現在値を含めること。期限は URL から計算し、
+                media_url_expires_at を指定した場合はその値を保存）
+
+        Returns:
+            int: 更新した投稿数
+        """
+        rows = [
+            prepare_record(
+                with_media_url_expiry(
+                    {
+                        "id": str(u["id"]),
+                        "media_url": u.get("media_url"),
+                        "thumbnail_url": u.get("thumbnail_url"),
+                        **({"media_url_expires_at": u["media_url_expires_at"]} if "media_url_expires_at" in u else {}),
+                    }
+                )
+            )
+            for u in updates
+            if u.get("id")
+        ]
+        if not rows:
+            return 0
+
+        try:
+            res = await self._execute(self.supabase.rpc("bulk_update_post_media_urls", {"p_rows": rows}))
+            raise_for_error(res)
+            updated = getattr(res, "data", None)
+            return updated if isinstance(updated, int) else len(rows)
+        except Exception as e:
+            logger.warning(f"bulk_update_post_media_urls RPC failed, updating posts one by one: {e}")
+
+        updated = 0
+        for row in rows:
+            post_id = row.pop("id")
+            if await self.update(post_id, row):
+                updated += 1
+        return updated
+    
     async def delete(self, post_id: str) -> bool:
         """投稿削除"""
-        res = self.supabase.table("instagram_posts").delete().eq("id", post_id).execute()
+        res = await self._execute(self.supabase.table("instagram_posts").delete().eq("id", post_id))
         raise_for_error(res)
         return bool(get_data(res))
     
+    async def get_expiring_media_urls(
+        self,
+        account_id: str,
+        expires_before: datetime,
+        limit: int = None,
+        columns: str = "*"
+    ) -> List[Record]:
+        """メディア URL の期限（media_url_expires_at）が指定日時より前の投稿を期限の近い順に取得"""
+        query = (
+            self.supabase.table("instagram_posts")
+            .select(columns)
+            .eq("account_id", account_id)
+            .lt("media_url_expires_at", expires_before.isoformat())
+            .order("media_url_expires_at")
+        )
+        if limit:
+            query = query.limit(limit)
+        res = await self._execute(query)
+        raise_for_error(res)
+        return to_records(get_data(res))
+    
     async def get_posts_without_metrics(
         self, 
         account_id: str, 
@@ -131,13 +228,12 @@ class InstagramPostRepository:
     ) -> List[Record]:
         """メトリクスが未取得の投稿を取得"""
         cutoff_dt = datetime.combine(cutoff_date, time.min).replace(tzinfo=timezone.utc)
-        posts_res = (
+        posts_res = await self._execute(
             self.supabase.table("instagram_posts")
             .select("id,account_id,instagram_post_id,media_type,caption,media_url,thumbnail_url,permalink,posted_at,created_at")
             .eq("account_id", account_id)
             .gte("posted_at", cutoff_dt.isoformat())
             .order("posted_at", desc=True)
-            .execute()
         )
         raise_for_error(posts_res)
         posts = get_data(posts_res)
@@ -145,7 +241,7 @@ class InstagramPostRepository:
             return []
 
         post_ids = [p["id"] for p in posts if p.get("id")]
-        metrics_res = self.supabase.table("instagram_post_metrics").select("post_id").in_("post_id", post_ids).execute()
+        metrics_res = await self._execute(self.supabase.table("instagram_post_metrics").select("post_id").in_("post_id", post_ids))
         raise_for_error(metrics_res)
         post_ids_with_metrics = {m["post_id"] for m in get_data(metrics_res) if m.get("post_id")}
 
@@ -154,20 +250,19 @@ class InstagramPostRepository:
     
     async def get_latest_by_account(self, account_id: str) -> Optional[Record]:
         """アカウントの最新投稿取得"""
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_posts")
             .select("*")
             .eq("account_id", account_id)
             .order("posted_at", desc=True)
             .limit(1)
-            .execute()
         )
         raise_for_error(res)
         return to_record(get_single_data(res))
     
     async def count_by_account(self, account_id: str) -> int:
         """アカウント別投稿数カウント"""
-        res = self.supabase.table("instagram_posts").select("id", count="exact").eq("account_id", account_id).execute()
+        res = await self._execute(self.supabase.table("instagram_posts").select("id", count="exact").eq("account_id", account_id))
         raise_for_error(res)
         return get_count(res) or len(get_data(res))
     
@@ -180,20 +275,19 @@ class InstagramPostRepository:
         """日付範囲での投稿数カウント"""
         start_dt = datetime.combine(start_date, time.min).replace(tzinfo=timezone.utc)
         end_dt = datetime.combine(end_date + timedelta(days=1), time.min).replace(tzinfo=timezone.utc)
-        res = (
+        res = await self._execute(
             self.supabase.table("instagram_posts")
             .select("id", count="exact")
             .eq("account_id", account_id)
             .gte("posted_at", start_dt.isoformat())
             .lt("posted_at", end_dt.isoformat())
-            .execute()
         )
         raise_for_error(res)
         return get_count(res) or len(get_data(res))
     
     async def get_media_type_distribution(self, account_id: str) -> dict:
         """メディアタイプ別分布取得"""
-        res = self.supabase.table("instagram_posts").select("media_type").eq("account_id", account_id).execute()
+        res = await self._execute(self.supabase.table("instagram_posts").select("media_type").eq("account_id", account_id))
         raise_for_error(res)
         distribution: dict[str, int] = {}
         for row in get_data(res):
@@ -103,11 +103,18 @@ class PostInsightMeta(BaseModel):
     date_range: Dict[str, Optional[str]] = Field(..., description="日付範囲")
     filters: Dict[str, Any] = Field(..., description="適用されたフィルター")
 
+class PostInsightPagination(BaseModel):
+    """投稿インサイトのページング情報（キーセットページング）"""
+    page_size: int = Field(..., description="1ページの件数")
+    has_more: bool = Field(..., description="次のページがあるか")
+    next_cursor: Optional[str] = Field(None, description="次のページの cursor（最終ページは null）")
+
 class PostInsightResponse(BaseModel):
     """投稿インサイトAPIレスポンス"""
     posts: List[PostInsightData] = Field(..., description="投稿インサイトデータリスト")
     summary: PostInsightSummary = Field(..., description="サマリー統計")
     meta: PostInsightMeta = Field(..., description="メタデータ")
+    pagination: Optional[PostInsightPagination] = Field(None, description="ページング情報（page_size / cursor 指定時）")
 
     class Config:
         schema_extra = {
@@ -139,6 +146,88 @@ class PostInsightResponse(BaseModel):
             }
         }
 
+class PostTimeSeriesPost(BaseModel):
+    """時系列の対象投稿"""
+    id: str = Field(..., description="Instagram投稿ID")
+    post_uuid: str = Field(..., description="投稿UUID")
+    type: str = Field(..., description="メディアタイプ")
+    date: Optional[str] = Field(None, description="投稿日時（ISO形式）")
+    permalink: str = Field("", description="パーマリンク")
+
+class PostTimeSeriesMeta(BaseModel):
+    """時系列のメタデータ"""
+    resolution: str = Field(..., description="daily（日ごとの最終値・欠損日は前日の値で補完）/ raw（記録そのまま）")
+    metrics: List[str] = Field(..., description="返したメトリクス")
+    raw_points: int = Field(..., description="DB の記録件数")
+    bucketed_points: int = Field(..., description="日次集約・補完後の点数（raw の場合は記録件数）")
+    returned_points: int = Field(..., description="返した点数")
+    downsampled: bool = Field(..., description="LTTB で間引いたか")
+    downsample_by: str = Field(..., description="間引きで形状を保ったメトリクス")
+    max_points: Optional[int] = Field(None, description="点数の上限")
+    include_deltas: bool = Field(..., description="delta / velocity_per_hour を含むか")
+    date_range: Dict[str, Optional[str]] = Field(..., description="日付範囲")
+
+class PostTimeSeriesResponse(BaseModel):
+    """個別投稿インサイト（時系列）APIレスポンス"""
+    post: PostTimeSeriesPost = Field(..., description="投稿情報")
+    series: List[Dict[str, Any]] = Field(
+        ...,
+        description="時系列（各点: date / recorded_at / filled（daily のみ）と各メトリクス、include_deltas 時は delta / velocity_per_hour）"
+    )
+    meta: PostTimeSeriesMeta = Field(..., description="メタデータ")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "post": {
+                    "id": "17923488201091269",
+                    "post_uuid": "0b5c7d2e-2f4e-4a8e-9a52-6a1f0c3d9e11",
+                    "type": "VIDEO",
+                    "date": "2025-06-24T10:00:52+00:00",
+                    "permalink": "https://instagram.com/p/xyz123"
+                },
+                "series": [
+                    {"date": "2025-06-24", "recorded_at": "2025-06-24T23:00:00+00:00", "filled": False, "reach": 78, "likes": 24},
+                    {"date": "2025-06-25", "recorded_at": None, "filled": True, "reach": 78, "likes": 24}
+                ],
+                "meta": {
+                    "resolution": "daily",
+                    "metrics": ["reach", "likes"],
+                    "raw_points": 1,
+                    "bucketed_points": 2,
+                    "returned_points": 2,
+                    "downsampled": False,
+                    "downsample_by": "reach",
+                    "max_points": None,
+                    "include_deltas": False,
+                    "date_range": {"from": None, "to": None}
+                }
+            }
+        }
+
+class MediaTypeSummaryItem(BaseModel):
+    """メディアタイプ別サマリー（1メディアタイプ分）"""
+    media_type: str = Field(..., description="メディアタイプ")
+    post_count: int = Field(..., description="投稿数")
+    posts_with_metrics: int = Field(..., description="メトリクス取得済みの投稿数（平均値の母数）")
+    total_reach: int = Field(..., description="総リーチ数")
+    total_likes: int = Field(..., description="総いいね数")
+    total_comments: int = Field(..., description="総コメント数")
+    total_saves: int = Field(..., description="総保存数")
+    total_shares: int = Field(..., description="総シェア数")
+    total_views: int = Field(..., description="総ビュー数")
+    avg_reach: float = Field(..., description="平均リーチ数")
+    avg_views: float = Field(..., description="平均ビュー数")
+    avg_engagement_rate: float = Field(..., description="平均エンゲージメント率（%）")
+    best_performing_post: Optional[Dict[str, Any]] = Field(None, description="最高エンゲージメント率の投稿")
+    latest_post_date: Optional[str] = Field(None, description="最新投稿日時（ISO形式）")
+
+class MediaTypeSummaryResponse(BaseModel):
+    """メディアタイプ別サマリーAPIレスポンス"""
+    media_types: List[MediaTypeSummaryItem] = Field(..., description="メディアタイプ別サマリー")
+    totals: Dict[str, Any] = Field(..., description="全メディアタイプの合計")
+    meta: Dict[str, Any] = Field(..., description="メタデータ（refreshed_at: 最終集計日時）")
+
 # クエリパラメータ用スキーマ
 class PostInsightQueryParams(BaseModel):
     """投稿インサイトクエリパラメータ"""
@@ -147,6 +236,8 @@ class PostInsightQueryParams(BaseModel):
     to_date: Optional[date] = Field(None, description="終了日付（YYYY-MM-DD）")
     media_type: Optional[str] = Field(None, description="メディアタイプフィルター", pattern="^(IMAGE|VIDEO|CAROUSEL_ALBUM|STORY)$")
     limit: Optional[int] = Field(None, description="最大取得件数", ge=1, le=1000)
+    page_size: Optional[int] = Field(None, description="1ページの件数（キーセットページング）", ge=1, le=500)
+    cursor: Optional[str] = Field(None, description="前ページの pagination.next_cursor")
 
 # エラーレスポンス用スキーマ
 class ErrorResponse(BaseModel):
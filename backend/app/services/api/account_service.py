@@ -30,10 +30,35 @@ class AccountService:
         self.post_repo = InstagramPostRepository(supabase)
         self.daily_stats_repo = InstagramDailyStatsRepository(supabase)
     
+    async def list_accounts(self, active_only: bool = True) -> List[dict]:
+        """アカウント行の取得（get_accounts の変換前、ETag の計算用）"""
+        if active_only:
+            return await self.account_repo.get_active_accounts()
+        return await self.account_repo.get_all()
+
+    async def get_account(self, account_id: str) -> Optional[dict]:
+        """アカウント行の取得（UUID または Instagram User ID、ETag の計算用）"""
+        return await self._get_account_by_id_or_instagram_id(account_id)
+
+    def fingerprint(self, account: dict) -> tuple:
+        """レスポンスに影響するアカウントの状態（投稿・メトリクス・日次統計の書き込みは data_version に反映）"""
+        _, days_until_expiry, warning_level = self._check_token_validity(account)
+        return (
+            str(account.get("id")),
+            account.get("data_version"),
+            account.get("data_updated_at"),
+            account.get("updated_at"),
+            account.get("last_synced_at"),
+            account.get("is_active"),
+            days_until_expiry,
+            warning_level,
+        )
+
     async def get_accounts(
         self, 
         active_only: bool = True,
-        include_metrics: bool = False
+        include_metrics: bool = False,
+        accounts: Optional[List[dict]] = None
     ) -> AccountListResponse:
         """
         アカウント一覧取得
@@ -41,6 +66,7 @@ class AccountService:
         Args:
             active_only: アクティブアカウントのみ取得
             include_metrics: 統計情報を含む
+            accounts: list_accounts で取得済みのアカウント行（再検索しない）
             
         Returns:
             アカウント一覧レスポンス
@@ -48,10 +74,8 @@ class AccountService:
         try:
             logger.info(f"Getting accounts: active_only={active_only}, include_metrics={include_metrics}")
             
-            if active_only:
-                accounts = await self.account_repo.get_active_accounts()
-            else:
-                accounts = await self.account_repo.get_all()
+            if accounts is None:
+                accounts = await self.list_accounts(active_only)
             
             # アカウントデータを変換
             account_responses = []
@@ -78,12 +102,17 @@ class AccountService:
             logger.error(f"Failed to get accounts: {str(e)}", exc_info=True)
             raise
 
-    async def get_account_details(self, account_id: str) -> Optional[AccountDetailResponse]:
+    async def get_account_details(
+        self,
+        account_id: str,
+        account: Optional[dict] = None
+    ) -> Optional[AccountDetailResponse]:
         """
         アカウント詳細取得
         
         Args:
             account_id: アカウントID (UUID または Instagram User ID)
+            account: get_account で取得済みのアカウント行（再検索しない）
             
         Returns:
             アカウント詳細レスポンス
@@ -92,7 +121,8 @@ class AccountService:
             logger.info(f"Getting account details for: {account_id}")
             
             # UUIDまたはInstagram User IDで検索
-            account = await self._get_account_by_id_or_instagram_id(account_id)
+            if account is None:
+                account = await self._get_account_by_id_or_instagram_id(account_id)
             
             if not account:
                 logger.warning(f"Account not found: {account_id}")
@@ -104,10 +134,8 @@ class AccountService:
             )
             
             # 詳細レスポンスに変換
-            detail_response = AccountDetailResponse(
-                **account_data.dict(),
-                facebook_page_id=account.get("facebook_page_id")
-            )
+            # facebook_page_id は変換済みデータに含まれる
+            detail_response = AccountDetailResponse(**account_data.dict())
             
             logger.info(f"Successfully retrieved account details for: {account.get('username')}")
             return detail_response
@@ -6,21 +6,83 @@ Post Insight Service
 from __future__ import annotations
 
 import asyncio
+import base64
+import binascii
+import json
 import logging
+import uuid
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
-from urllib.parse import parse_qs, urlparse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from supabase import Client
 
 from ...core.records import Record, to_records
-from ...core.supabase_utils import get_data, raise_for_error
+from ...core.response_cache import get_response_cache
+from ...core.supabase_utils import execute_async, get_data, raise_for_error
 from ...repositories.instagram_account_repository import InstagramAccountRepository
+from ...repositories.instagram_media_type_rollup_repository import InstagramMediaTypeRollupRepository
+from ...repositories.instagram_post_metrics_repository import InstagramPostMetricsRepository
 from ...repositories.instagram_post_repository import InstagramPostRepository
-from ..data_collection.instagram_api_client import InstagramAPIClient, InstagramAPIError
+from ...utils.timeseries import add_deltas, bucket_daily, forward_fill_daily, lttb
+from ..data_collection.media_url_refresher import needs_media_url_refresh
+from ..jobs.collection_jobs import request_media_url_refresh
 
 logger = logging.getLogger(__name__)
 
+# キーセットページングの既定ページサイズ / エクスポート時の1回の取得件数
+DEFAULT_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 500
+
+# 時系列 API で指定できるメトリクス（instagram_post_metrics の列）
+TIME_SERIES_METRICS = (
+    "reach",
+    "likes",
+    "comments",
+    "saved",
+    "shares",
+    "views",
+    "total_interactions",
+    "follows",
+    "profile_visits",
+    "profile_activity",
+    "video_view_total_time",
+    "avg_watch_time",
+    "engagement_rate",
+)
+DEFAULT_TIME_SERIES_METRICS = ("reach", "likes", "comments", "saved", "shares", "views")
+
+
+class InvalidCursorError(ValueError):
+    """ページングカーソルが不正"""
+
+
+def _cursor_key(post: Record) -> Tuple[datetime, str]:
+    posted_at = post.get("posted_at")
+    if isinstance(posted_at, str):
+        posted_at = datetime.fromisoformat(posted_at.replace("Z", "+00:00"))
+    return posted_at, str(post["id"])
+
+
+def encode_cursor(post: Record) -> str:
+    """投稿の (posted_at, id) を不透明なカーソル文字列にする"""
+    posted_at, post_id = _cursor_key(post)
+    payload = json.dumps({"posted_at": posted_at.isoformat(), "id": post_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """encode_cursor の逆変換（不正な値は InvalidCursorError）"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        posted_at = datetime.fromisoformat(payload["posted_at"])
+        post_id = str(uuid.UUID(payload["id"]))
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+    if posted_at.tzinfo is None:
+        posted_at = posted_at.replace(tzinfo=timezone.utc)
+    return posted_at, post_id
+
 
 class PostInsightService:
     """投稿インサイトサービス"""
@@ -32,6 +94,8 @@ class PostInsightService:
         self.supabase = supabase
         self.account_repo = InstagramAccountRepository(supabase)
         self.post_repo = InstagramPostRepository(supabase)
+        self.post_metrics_repo = InstagramPostMetricsRepository(supabase)
+        self.media_type_rollup_repo = InstagramMediaTypeRollupRepository(supabase)
 
     async def get_post_insights(
         self,
@@ -40,6 +104,9 @@ class PostInsightService:
         to_date: Optional[date] = None,
         media_type: Optional[str] = None,
         limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        account: Optional[Record] = None,
     ) -> Dict[str, Any]:
         """
         投稿インサイトデータを取得
@@ -49,42 +116,83 @@ class PostInsightService:
             from_date: 開始日付
             to_date: 終了日付
             media_type: メディアタイプフィルター（IMAGE, VIDEO, CAROUSEL_ALBUM, STORY）
-            limit: 最大取得件数
+            limit: 最大取得件数（ページング時は指定不可）
+            page_size: 1ページの件数（指定時は (posted_at, id) のキーセットページング）
+            cursor: 前ページの pagination.next_cursor
+            account: get_account で取得済みのアカウント（再検索しない）
 
         Returns:
-            投稿インサイトデータ
+            投稿インサイトデータ（ページング時は pagination を含み、summary は条件全体の集計）
         """
         logger.info(f"Getting post insights for account: {account_id}")
 
-        account = await self._get_account(account_id)
+        paginate = page_size is not None or cursor is not None
+        if paginate:
+            page_size = page_size or DEFAULT_PAGE_SIZE
+            limit = None
+        after = decode_cursor(cursor) if cursor else None
+
+        account = account or await self._get_account(account_id)
         if not account:
             raise ValueError(f"Account not found: {account_id}")
 
-        posts_with_metrics = await self._get_posts_with_latest_metrics(
-            account_uuid=account["id"],
-            from_date=from_date,
-            to_date=to_date,
-            media_type=media_type,
-            limit=limit,
-        )
+        # 収集で投稿・メトリクスが書き込まれると data_version が進むため、キーが変わり自動的に無効化される
+        cache = get_response_cache("post_insights")
+        filter_key = self._cache_key(account, from_date, to_date, media_type)
+        cache_key = (*filter_key, limit, page_size, cursor)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if paginate:
+            # サマリーはページと独立に条件全体で集計（全ページで共通のためキャッシュを共有）
+            posts_with_metrics, summary = await asyncio.gather(
+                self._get_posts_with_latest_metrics(
+                    account_uuid=account["id"],
+                    from_date=from_date,
+                    to_date=to_date,
+                    media_type=media_type,
+                    limit=page_size + 1,
+                    after=after,
+                ),
+                self._get_filter_summary(account, from_date, to_date, media_type),
+            )
+            has_more = len(posts_with_metrics) > page_size
+            posts_with_metrics = posts_with_metrics[:page_size]
+        else:
+            # サマリーは DB 側で並行して集計（RPC 未適用・失敗時は None → 取得した投稿から集計）
+            posts_with_metrics, summary = await asyncio.gather(
+                self._get_posts_with_latest_metrics(
+                    account_uuid=account["id"],
+                    from_date=from_date,
+                    to_date=to_date,
+                    media_type=media_type,
+                    limit=limit,
+                ),
+                self._get_db_summary(
+                    account_uuid=account["id"],
+                    from_date=from_date,
+                    to_date=to_date,
+                    media_type=media_type,
+                    limit=limit,
+                ),
+            )
 
         # NOTE: Instagram Graph API の media_url / thumbnail_url は短期間で期限切れ（403）になることがあるため、
-        #       返却前に期限切れのURLだけリフレッシュして DB/レスポンス双方を更新する。
-        await self._refresh_expired_media_urls(
+        #       期限が近い URL の更新をバックグラウンドに依頼する（レスポンスは待たせない）。
+        media_url_refresh_scheduled = await self._schedule_media_url_refresh(
             account=account,
             posts=[p for p, _ in posts_with_metrics],
-            from_date=from_date,
-            to_date=to_date,
-            media_type=media_type,
         )
 
         post_insights: list[dict] = []
         for post, metrics in posts_with_metrics:
             post_insights.append(self._convert_to_insight_data(post, metrics))
 
-        summary = self._calculate_summary(post_insights)
+        if summary is None:
+            summary = self._calculate_summary(post_insights)
 
-        return {
+        result = {
             "posts": post_insights,
             "summary": summary,
             "meta": {
@@ -99,6 +207,289 @@ class PostInsightService:
                 "filters": {"media_type": media_type, "limit": limit},
             },
         }
+        if paginate:
+            last_post = posts_with_metrics[-1][0] if posts_with_metrics else None
+            result["pagination"] = {
+                "page_size": page_size,
+                "has_more": has_more,
+                "next_cursor": encode_cursor(last_post) if has_more and last_post else None,
+            }
+
+        # URL 更新を依頼した場合はまもなく data_version が進むため、このキーでは保存しない
+        if not media_url_refresh_scheduled:
+            cache.set(cache_key, result)
+        return result
+
+    async def stream_post_insights(
+        self,
+        account_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        media_type: Optional[str] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """エクスポート用に条件に合う全投稿のインサイトを新しい順に返すイテレータ
+
+        アカウントの存在確認はここで行い（見つからない場合 ValueError）、投稿は batch_size 件ずつ
+        キーセットで取得するため、件数に関わらずメモリ使用量は1バッチ分に収まる。
+        """
+        account = await self._get_account(account_id)
+        if not account:
+            raise ValueError(f"Account not found: {account_id}")
+        return self._iter_post_insights(account["id"], from_date, to_date, media_type, batch_size)
+
+    async def _iter_post_insights(
+        self,
+        account_uuid: str,
+        from_date: Optional[date],
+        to_date: Optional[date],
+        media_type: Optional[str],
+        batch_size: int,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        after: Optional[Tuple[datetime, str]] = None
+        while True:
+            batch = await self._get_posts_with_latest_metrics(
+                account_uuid=account_uuid,
+                from_date=from_date,
+                to_date=to_date,
+                media_type=media_type,
+                limit=batch_size,
+                after=after,
+            )
+            for post, metrics in batch:
+                yield self._convert_to_insight_data(post, metrics)
+            if len(batch) < batch_size:
+                return
+            after = _cursor_key(batch[-1][0])
+
+    async def get_post_time_series(
+        self,
+        post_id: str,
+        from_date: Optional[date] = None,
+        to_date: Optional[date] = None,
+        metrics: Optional[List[str]] = None,
+        resolution: str = "daily",
+        max_points: Optional[int] = None,
+        downsample_by: Optional[str] = None,
+        include_deltas: bool = False,
+        post: Optional[Record] = None,
+    ) -> Dict[str, Any]:
+        """
+        個別投稿のメトリクス時系列を取得
+
+        Args:
+            post_id: 投稿ID（Instagram Post ID または UUID）
+            from_date / to_date: 記録日の範囲
+            metrics: 返すメトリクス（TIME_SERIES_METRICS のいずれか、未指定時は DEFAULT_TIME_SERIES_METRICS）
+            resolution: daily（日ごとの最終値、欠けた日は前日の値で補完）/ raw（記録そのまま）
+            max_points: 点数の上限（超える場合は LTTB で間引く）
+            downsample_by: 間引きで形状を保つメトリクス（未指定時は metrics の先頭）
+            include_deltas: 直前の点からの増分と1時間あたりの増加速度を付与
+            post: get_post_with_account で取得済みの投稿（再検索しない）
+
+        Returns:
+            投稿情報・時系列・メタデータ
+        """
+        post = post or await self._get_post(post_id)
+        if not post:
+            raise ValueError(f"Post not found: {post_id}")
+
+        metrics = list(metrics or DEFAULT_TIME_SERIES_METRICS)
+        start_dt, end_dt = self._posted_at_bounds(from_date, to_date)
+        rows = await self.post_metrics_repo.get_history(
+            str(post["id"]),
+            columns=",".join(["recorded_at", *metrics]),
+            start_dt=start_dt,
+            end_dt=end_dt,
+        )
+
+        points: List[Dict[str, Any]] = []
+        for row in rows:
+            recorded_at = self._parse_datetime(row.get("recorded_at"))
+            if not recorded_at:
+                continue
+            point: Dict[str, Any] = {"t": recorded_at.timestamp(), "recorded_at": recorded_at.isoformat()}
+            for m in metrics:
+                value = row.get(m)
+                point[m] = float(value) if m == "engagement_rate" and value is not None else value
+            points.append(point)
+
+        if resolution == "daily":
+            end_day = min(to_date, datetime.now(timezone.utc).date()) if to_date else None
+            points = forward_fill_daily(bucket_daily(points, metrics), metrics, end=end_day)
+
+        bucketed_points = len(points)
+        downsample_by = downsample_by or metrics[0]
+        if max_points and len(points) > max_points:
+            points = lttb(points, max_points, downsample_by)
+        if include_deltas:
+            points = add_deltas(points, metrics)
+
+        posted_at = self._parse_datetime(post.get("posted_at"))
+        return {
+            "post": {
+                "id": post.get("instagram_post_id"),
+                "post_uuid": str(post["id"]),
+                "type": post.get("media_type"),
+                "date": posted_at.isoformat() if posted_at else post.get("posted_at"),
+                "permalink": post.get("permalink") or "",
+            },
+            "series": [{k: v for k, v in p.items() if k != "t"} for p in points],
+            "meta": {
+                "resolution": resolution,
+                "metrics": metrics,
+                "raw_points": len(rows),
+                "bucketed_points": bucketed_points,
+                "returned_points": len(points),
+                "downsampled": len(points) < bucketed_points,
+                "downsample_by": downsample_by,
+                "max_points": max_points,
+                "include_deltas": include_deltas,
+                "date_range": {
+                    "from": from_date.isoformat() if from_date else None,
+                    "to": to_date.isoformat() if to_date else None,
+                },
+            },
+        }
+
+    async def get_media_type_summary(self, account_id: str, account: Optional[Record] = None) -> Dict[str, Any]:
+        """
+        メディアタイプ別サマリーを取得
+
+        収集時に再集計される instagram_media_type_rollups を主キーで引くだけのため、
+        投稿数に関わらず1回の検索で済む。
+
+        Args:
+            account_id: アカウントID（UUID文字列またはInstagram User ID）
+            account: get_account で取得済みのアカウント（再検索しない）
+
+        Returns:
+            メディアタイプ別の投稿数・平均値と全体の合計
+        """
+        account = account or await self._get_account(account_id)
+        if not account:
+            raise ValueError(f"Account not found: {account_id}")
+
+        rows = await self.media_type_rollup_repo.get_by_account(str(account["id"]))
+
+        media_types: List[Dict[str, Any]] = []
+        for row in rows:
+            media_types.append(
+                {
+                    "media_type": row.get("media_type"),
+                    "post_count": int(row.get("post_count") or 0),
+                    "posts_with_metrics": int(row.get("posts_with_metrics") or 0),
+                    "total_reach": int(row.get("total_reach") or 0),
+                    "total_likes": int(row.get("total_likes") or 0),
+                    "total_comments": int(row.get("total_comments") or 0),
+                    "total_saves": int(row.get("total_saved") or 0),
+                    "total_shares": int(row.get("total_shares") or 0),
+                    "total_views": int(row.get("total_views") or 0),
+                    "avg_reach": float(row.get("avg_reach") or 0),
+                    "avg_views": float(row.get("avg_views") or 0),
+                    "avg_engagement_rate": float(row.get("avg_engagement_rate") or 0),
+                    "best_performing_post": {
+                        "id": row.get("best_instagram_post_id"),
+                        "engagement_rate": float(row.get("best_engagement_rate") or 0),
+                    }
+                    if row.get("best_instagram_post_id")
+                    else None,
+                    "latest_post_date": row.get("latest_posted_at"),
+                }
+            )
+
+        # 全体の平均はメトリクスのある投稿数で重み付け
+        with_metrics = sum(m["posts_with_metrics"] for m in media_types)
+        totals = {
+            "post_count": sum(m["post_count"] for m in media_types),
+            "posts_with_metrics": with_metrics,
+            "total_reach": sum(m["total_reach"] for m in media_types),
+            "total_views": sum(m["total_views"] for m in media_types),
+            "total_engagement": sum(
+                m["total_likes"] + m["total_comments"] + m["total_saves"] + m["total_shares"] for m in media_types
+            ),
+            "avg_engagement_rate": round(
+                sum(m["avg_engagement_rate"] * m["posts_with_metrics"] for m in media_types) / with_metrics, 2
+            )
+            if with_metrics
+            else 0.0,
+        }
+
+        refreshed = [r.get("refreshed_at") for r in rows if r.get("refreshed_at")]
+        return {
+            "media_types": media_types,
+            "totals": totals,
+            "meta": {
+                "account_id": str(account["id"]),
+                "instagram_user_id": account.get("instagram_user_id"),
+                "username": account.get("username"),
+                "refreshed_at": max(refreshed) if refreshed else None,
+            },
+        }
+
+    async def get_account(self, account_id: str) -> Optional[Record]:
+        """アカウント取得（ETag の計算用、取得結果は各取得メソッドに account として渡す）"""
+        return await self._get_account(account_id)
+
+    async def get_post_with_account(self, post_id: str) -> Tuple[Optional[Record], Optional[Record]]:
+        """投稿と所属アカウントの取得（ETag の計算用）"""
+        post = await self._get_post(post_id)
+        if not post or not post.get("account_id"):
+            return post, None
+        return post, await self.account_repo.get_by_id(str(post["account_id"]))
+
+    @staticmethod
+    def fingerprint(account: Record) -> Tuple[Any, ...]:
+        """レスポンスの元データの版（投稿・メトリクス・ロールアップの書き込みで data_version が進む）"""
+        return (str(account["id"]), account.get("data_version"), account.get("data_updated_at"))
+
+    async def _get_post(self, post_id: str) -> Optional[Record]:
+        """投稿取得（Instagram Post ID または UUID で検索）"""
+        post = await self.post_repo.get_by_instagram_post_id(post_id)
+        if post:
+            return post
+        try:
+            uuid.UUID(post_id)
+        except ValueError:
+            return None
+        return await self.post_repo.get_by_id(post_id)
+
+    @staticmethod
+    def _cache_key(
+        account: Record, from_date: Optional[date], to_date: Optional[date], media_type: Optional[str]
+    ) -> Tuple[Any, ...]:
+        return (
+            *PostInsightService.fingerprint(account),
+            from_date,
+            to_date,
+            PostInsightService._normalize_media_type(media_type),
+        )
+
+    async def _get_filter_summary(
+        self,
+        account: Record,
+        from_date: Optional[date],
+        to_date: Optional[date],
+        media_type: Optional[str],
+    ) -> Dict[str, Any]:
+        """条件全体（件数制限なし）のサマリー（RPC 未適用・失敗時は全投稿を順に読んで集計）"""
+        cache = get_response_cache("post_insights")
+        cache_key = ("summary", *self._cache_key(account, from_date, to_date, media_type))
+        summary = cache.get(cache_key)
+        if summary is not None:
+            return summary
+
+        summary = await self._get_db_summary(account["id"], from_date, to_date, media_type, limit=None)
+        if summary is None:
+            post_insights = [
+                row
+                async for row in self._iter_post_insights(
+                    account["id"], from_date, to_date, media_type, EXPORT_BATCH_SIZE
+                )
+            ]
+            summary = self._calculate_summary(post_insights)
+        cache.set(cache_key, summary)
+        return summary
 
     async def _get_account(self, account_id: str) -> Optional[Record]:
         """アカウント取得（UUIDまたはInstagram User IDで検索）"""
@@ -107,6 +498,67 @@ class PostInsightService:
             return account
         return await self.account_repo.get_by_id(account_id)
 
+    @staticmethod
+    def _posted_at_bounds(
+        from_date: Optional[date], to_date: Optional[date]
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """posted_at の検索範囲（UTC、終了日は当日を含むよう翌日0時の排他境界）"""
+        from_dt = datetime.combine(from_date, datetime.min.time(), tzinfo=timezone.utc) if from_date else None
+        to_dt = (
+            datetime.combine(to_date + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+            if to_date
+            else None
+        )
+        return from_dt, to_dt
+
+    @staticmethod
+    def _normalize_media_type(media_type: Optional[str]) -> Optional[str]:
+        """有効なメディアタイプのみ絞り込みに使う（不明な値は無視）"""
+        if not media_type:
+            return None
+        mt = media_type.upper()
+        return mt if mt in {"IMAGE", "VIDEO", "CAROUSEL_ALBUM", "STORY"} else None
+
+    async def _get_db_summary(
+        self,
+        account_uuid: str,
+        from_date: Optional[date],
+        to_date: Optional[date],
+        media_type: Optional[str],
+        limit: Optional[int],
+    ) -> Optional[Dict[str, Any]]:
+        """post_insight_summary RPC でサマリーを取得し、API の形式に整形"""
+        from_dt, to_dt = self._posted_at_bounds(from_date, to_date)
+        try:
+            data = await self.post_metrics_repo.get_post_insight_summary(
+                str(account_uuid),
+                from_dt=from_dt,
+                to_dt=to_dt,
+                media_type=self._normalize_media_type(media_type),
+                limit=limit or None,
+            )
+        except Exception as e:
+            logger.warning(f"post_insight_summary RPC failed, summarizing in Python: {e}")
+            return None
+        if data is None:
+            return None
+
+        best = data.get("best_performing_post")
+        return {
+            "total_posts": int(data.get("total_posts") or 0),
+            "avg_engagement_rate": round(float(data.get("avg_engagement_rate") or 0), 2),
+            "total_reach": int(data.get("total_reach") or 0),
+            "total_engagement": int(data.get("total_engagement") or 0),
+            "best_performing_post": {
+                "id": best.get("id"),
+                "engagement_rate": float(best.get("engagement_rate") or 0),
+                "type": best.get("type"),
+            }
+            if best
+            else None,
+            "media_type_distribution": data.get("media_type_distribution") or {},
+        }
+
     async def _get_posts_with_latest_metrics(
         self,
         account_uuid: str,
@@ -114,32 +566,40 @@ class PostInsightService:
         to_date: Optional[date],
         media_type: Optional[str],
         limit: Optional[int],
+        after: Optional[Tuple[datetime, str]] = None,
     ) -> List[Tuple[Record, Optional[Record]]]:
-        """投稿と最新メトリクスを組み合わせて取得（DB結合は使わず、SDKで段階取得）。"""
+        """投稿と最新メトリクスを組み合わせて取得（DB結合は使わず、SDKで段階取得）。
+
+        after を指定すると (posted_at, id) がそれより前の投稿から取得する（キーセットページング）。
+        """
         query = (
             self.supabase.table("instagram_posts")
-            .select("id,instagram_post_id,media_type,caption,media_url,thumbnail_url,permalink,posted_at")
+            .select("id,instagram_post_id,media_type,caption,media_url,thumbnail_url,media_url_expires_at,permalink,posted_at")
             .eq("account_id", account_uuid)
             .order("posted_at", desc=True)
+            .order("id", desc=True)
         )
 
-        if from_date:
-            query = query.gte("posted_at", f"{from_date.isoformat()}T00:00:00+00:00")
-        if to_date:
-            # inclusive end date
-            to_date_exclusive = to_date + timedelta(days=1)
-            query = query.lt("posted_at", f"{to_date_exclusive.isoformat()}T00:00:00+00:00")
+        if after:
+            # posted_at <= t で idx_instagram_posts_account_posted の範囲走査にし、同時刻は id で切る
+            after_at, after_id = after
+            ts = after_at.isoformat()
+            query = query.lte("posted_at", ts).or_(f'posted_at.lt."{ts}",id.lt.{after_id}')
+
+        from_dt, to_dt = self._posted_at_bounds(from_date, to_date)
+        if from_dt:
+            query = query.gte("posted_at", from_dt.isoformat())
+        if to_dt:
+            query = query.lt("posted_at", to_dt.isoformat())
 
-        if media_type:
-            valid_types = {"IMAGE", "VIDEO", "CAROUSEL_ALBUM", "STORY"}
-            mt = media_type.upper()
-            if mt in valid_types:
-                query = query.eq("media_type", mt)
+        mt = self._normalize_media_type(media_type)
+        if mt:
+            query = query.eq("media_type", mt)
 
         if limit:
             query = query.limit(limit)
 
-        posts_res = query.execute()
+        posts_res = await execute_async(query)
         raise_for_error(posts_res)
         posts = to_records(get_data(posts_res))
 
@@ -148,21 +608,10 @@ class PostInsightService:
 
         post_ids = [p["id"] for p in posts if p.get("id")]
 
-        metrics_res = (
-            self.supabase.table("instagram_post_metrics")
-            .select("post_id,reach,likes,comments,shares,saved,views,total_interactions,follows,profile_visits,profile_activity,video_view_total_time,avg_watch_time,recorded_at")
-            .in_("post_id", post_ids)
-            .order("recorded_at", desc=True)
-            .execute()
+        latest_by_post = await self.post_metrics_repo.get_latest_by_posts(
+            post_ids,
+            columns="post_id,reach,likes,comments,shares,saved,views,total_interactions,follows,profile_visits,profile_activity,video_view_total_time,avg_watch_time,recorded_at",
         )
-        raise_for_error(metrics_res)
-
-        latest_by_post: dict[str, Record] = {}
-        for row in get_data(metrics_res):
-            pid = row.get("post_id")
-            if not pid or pid in latest_by_post:
-                continue
-            latest_by_post[pid] = Record(row)
 
         combined: list[tuple[Record, Optional[Record]]] = []
         for post in posts:
@@ -240,169 +689,45 @@ class PostInsightService:
     def _get_thumbnail_url(self, post: Record) -> str:
         return post.get("thumbnail_url") or post.get("media_url") or ""
 
-    def _extract_instagram_cdn_expiry(self, url: str) -> Optional[datetime]:
-        if not url:
-            return None
-        try:
-            parsed = urlparse(url)
-            qs = parse_qs(parsed.query)
-            oe = (qs.get("oe") or qs.get("_nc_oe") or [None])[0]
-            if not oe:
-                return None
-            # Instagram CDN の `oe` は hex の epoch 秒（例: 6975142D）
-            expiry_ts = int(oe, 16)
-            return datetime.fromtimestamp(expiry_ts, tz=timezone.utc)
-        except Exception:
-            return None
-
     def _should_refresh_media_url(self, post: Record) -> bool:
-        url = (post.get("thumbnail_url") or post.get("media_url") or "").strip()
-        if not url:
-            return True
-
-        expiry = self._extract_instagram_cdn_expiry(url)
-        if not expiry:
-            return False
-
-        now = datetime.now(timezone.utc)
-        return expiry <= now + self._MEDIA_URL_REFRESH_LEEWAY
+        return needs_media_url_refresh(post, self._MEDIA_URL_REFRESH_LEEWAY)
 
-    async def _refresh_expired_media_urls(
-        self,
-        account: Record,
-        posts: List[Record],
-        from_date: Optional[date],
-        to_date: Optional[date],
-        media_type: Optional[str],
-    ) -> None:
-        if not posts:
-            return
-
-        access_token = (account.get("access_token_encrypted") or "").strip()
-        instagram_user_id = (account.get("instagram_user_id") or "").strip()
-        if not access_token or not instagram_user_id:
-            return
-
-        # 安全のため、1リクエストでのリフレッシュ対象件数を制限
-        considered = posts[: self._MAX_MEDIA_URL_REFRESH_POSTS]
-        to_refresh = [p for p in considered if self._should_refresh_media_url(p)]
-        if not to_refresh:
-            return
+    async def schedule_expiring_media_url_refresh(self, account: Record) -> bool:
+        """アカウントの期限切れ間近の URL 更新を依頼（ETag が一致して 304 を返す場合用）
 
+        304 では投稿を取得しないため、media_url_expires_at のインデックスで期限の近い投稿だけを引いて確認する。
+        更新されると data_version が進み、次回のリクエストでは ETag が変わって新しい URL が返る。
+        """
+        if not (account.get("access_token_encrypted") or "").strip():
+            return False
         try:
-            # フィルタが無い場合は「最新N件」なので、User media をまとめて取得して差し替える（API呼び出しを抑える）。
-            if from_date is None and to_date is None and media_type is None:
-                await self._refresh_media_urls_from_latest_posts(
-                    instagram_user_id=instagram_user_id,
-                    access_token=access_token,
-                    all_considered=considered,
-                    to_refresh=to_refresh,
-                )
-                return
-
-            await self._refresh_media_urls_per_post(
-                access_token=access_token,
-                posts=to_refresh,
+            posts = await self.post_repo.get_expiring_media_urls(
+                str(account["id"]),
+                datetime.now(timezone.utc) + self._MEDIA_URL_REFRESH_LEEWAY,
+                limit=self._MAX_MEDIA_URL_REFRESH_POSTS,
+                columns="instagram_post_id,media_url,thumbnail_url,media_url_expires_at",
             )
         except Exception as e:
-            logger.warning(f"Failed to refresh media URLs (continuing): {e}")
-
-    async def _refresh_media_urls_from_latest_posts(
-        self,
-        instagram_user_id: str,
-        access_token: str,
-        all_considered: List[Record],
-        to_refresh: List[Record],
-    ) -> None:
-        max_posts = max(1, len(all_considered))
-        since_dt = datetime.fromtimestamp(0, tz=timezone.utc)
-
-        async with InstagramAPIClient() as api_client:
-            api_posts = await api_client.get_posts_since(
-                instagram_user_id=instagram_user_id,
-                access_token=access_token,
-                since_datetime=since_dt,
-                max_posts=max_posts,
-            )
-
-        api_by_id: dict[str, dict] = {
-            (p.get("id") or ""): p for p in api_posts if p.get("id")
-        }
-
-        refreshed = 0
-        for post in to_refresh:
-            ig_post_id = post.get("instagram_post_id") or ""
-            api_post = api_by_id.get(ig_post_id)
-            if not api_post:
-                continue
-
-            update_data: dict[str, Any] = {}
-            new_media_url = (api_post.get("media_url") or "").strip()
-            new_thumb_url = (api_post.get("thumbnail_url") or "").strip()
-
-            if new_media_url and new_media_url != (post.get("media_url") or ""):
-                update_data["media_url"] = new_media_url
-                post["media_url"] = new_media_url
-            if new_thumb_url and new_thumb_url != (post.get("thumbnail_url") or ""):
-                update_data["thumbnail_url"] = new_thumb_url
-                post["thumbnail_url"] = new_thumb_url
-
-            if update_data and post.get("id"):
-                await self.post_repo.update(str(post["id"]), update_data)
-                refreshed += 1
-
-        if refreshed:
-            logger.info(f"Refreshed media URLs for {refreshed} posts (batch)")
-
-    async def _refresh_media_urls_per_post(
-        self,
-        access_token: str,
-        posts: List[Record],
-    ) -> None:
-        semaphore = asyncio.Semaphore(5)
-
-        async with InstagramAPIClient() as api_client:
-            async def fetch_media(post: Record) -> tuple[Record, Optional[dict]]:
-                ig_post_id = (post.get("instagram_post_id") or "").strip()
-                if not ig_post_id:
-                    return (post, None)
-
-                async with semaphore:
-                    try:
-                        media = await api_client.get_media(
-                            media_id=ig_post_id,
-                            access_token=access_token,
-                            fields="id,media_url,thumbnail_url",
-                        )
-                        return (post, media)
-                    except InstagramAPIError as e:
-                        logger.warning(f"Failed to refresh media URL for {ig_post_id}: {e}")
-                        return (post, None)
-
-            results = await asyncio.gather(*(fetch_media(p) for p in posts))
-
-        refreshed = 0
-        for post, media in results:
-            if not media:
-                continue
-
-            update_data: dict[str, Any] = {}
-            new_media_url = (media.get("media_url") or "").strip()
-            new_thumb_url = (media.get("thumbnail_url") or "").strip()
-
-            if new_media_url and new_media_url != (post.get("media_url") or ""):
-                update_data["media_url"] = new_media_url
-                post["media_url"] = new_media_url
-            if new_thumb_url and new_thumb_url != (post.get("thumbnail_url") or ""):
-                update_data["thumbnail_url"] = new_thumb_url
-                post["thumbnail_url"] = new_thumb_url
+            logger.warning(f"Expiring media URL lookup failed for account {account.get('instagram_user_id')}: {e}")
+            return False
+        return await self._schedule_media_url_refresh(account, posts)
 
-            if update_data and post.get("id"):
-                await self.post_repo.update(str(post["id"]), update_data)
-                refreshed += 1
+    async def _schedule_media_url_refresh(self, account: Record, posts: List[Record]) -> bool:
+        """期限切れ間近の URL 更新をバックグラウンドに依頼（依頼済み・更新中の場合 True）
 
-        if refreshed:
-            logger.info(f"Refreshed media URLs for {refreshed} posts (per-post)")
+        レスポンスは現在の URL のまま返し、更新後の URL は次回取得時に反映される。
+        """
+        considered = posts[: self._MAX_MEDIA_URL_REFRESH_POSTS]
+        ig_post_ids = [
+            p["instagram_post_id"]
+            for p in considered
+            if p.get("instagram_post_id") and self._should_refresh_media_url(p)
+        ]
+        if not ig_post_ids:
+            return False
+        if not (account.get("access_token_encrypted") or "").strip():
+            return False
+        return await request_media_url_refresh(account, ig_post_ids)
 
     def _calculate_engagement_rate(self, metrics: Record) -> float:
         reach = metrics.get("reach") or 0
@@ -0,0 +1,84 @@
+"""
+API Budget
+複数アカウントを並列収集する際に Instagram API 呼び出しを共有の上限で制御する
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+
+class ApiBudget:
+    """同時実行数と呼び出しレートの共有上限（同一イベントループ内で共有）"""
+
+    def __init__(self, max_concurrent: int = 4, calls_per_second: Optional[float] = None):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be >= 1")
+        if calls_per_second is not None and calls_per_second <= 0:
+            raise ValueError("calls_per_second must be > 0")
+        self.max_concurrent = max_concurrent
+        self.calls_per_second = calls_per_second
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._rate_lock = asyncio.Lock()
+        self._next_slot_at = 0.0
+        self.calls_made = 0
+        self.in_flight = 0
+        self.throttled_seconds = 0.0
+
+    async def _wait_for_rate(self):
+        """レート上限に従って次の呼び出し枠まで待機"""
+        if not self.calls_per_second:
+            return
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_slot_at - now
+            self._next_slot_at = max(now, self._next_slot_at) + 1.0 / self.calls_per_second
+        if wait > 0:
+            self.throttled_seconds += wait
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self):
+        """API 呼び出し1回分の枠を確保"""
+        async with self._semaphore:
+            await self._wait_for_rate()
+            self.in_flight += 1
+            self.calls_made += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        """進捗表示用の統計"""
+        return {
+            "calls_made": self.calls_made,
+            "in_flight": self.in_flight,
+            "throttled_seconds": round(self.throttled_seconds, 2),
+        }
+
+
+_api_budget: Optional[ApiBudget] = None
+
+
+def configure_api_budget(max_concurrent: int = 4, calls_per_second: Optional[float] = None) -> ApiBudget:
+    """プロセス共有の API バジェットを設定（以降に生成されるクライアントへ適用）"""
+    global _api_budget
+    _api_budget = ApiBudget(max_concurrent=max_concurrent, calls_per_second=calls_per_second)
+    logger.info(f"API budget configured: max_concurrent={max_concurrent}, calls_per_second={calls_per_second}")
+    return _api_budget
+
+
+def get_api_budget() -> Optional[ApiBudget]:
+    """プロセス共有の API バジェットを取得（未設定時は None = 制限なし）"""
+    return _api_budget
+
+
+def reset_api_budget():
+    """プロセス共有の API バジェットを解除"""
+    global _api_budget
+    _api_budget = None
@@ -16,7 +16,11 @@ from ...repositories.instagram_post_repository import InstagramPostRepository
 from ...repositories.instagram_post_metrics_repository import InstagramPostMetricsRepository
 from .instagram_api_client import InstagramAPIClient, InstagramAPIError
 from .data_aggregator_service import DataAggregatorService
+from .freshness_ledger import POST_INSIGHTS, create_freshness_ledger
+from .media_type_rollup_service import create_media_type_rollup_service
+from .monthly_rollup_service import create_monthly_rollup_service
 from .metrics_utils import normalize_post_metrics_for_db
+from .sharding import Shard, filter_accounts_for_shard
 
 # ログ設定
 logger = logging.getLogger(__name__)
@@ -42,6 +46,7 @@ class DailyCollectionSummary:
     started_at: datetime
     completed_at: Optional[datetime] = None
     total_duration_seconds: Optional[float] = None
+    skipped_writes: int = 0
 
 class DailyCollectorService:
     """毎日のデータ収集サービス"""
@@ -53,6 +58,9 @@ class DailyCollectorService:
         self.daily_stats_repo = None
         self.post_repo = None
         self.post_metrics_repo = None
+        self.freshness = None
+        self.monthly_rollup = None
+        self.media_type_rollup = None
         self.aggregator = DataAggregatorService()
     
     def _init_repositories(self):
@@ -63,13 +71,17 @@ class DailyCollectorService:
             self.daily_stats_repo = InstagramDailyStatsRepository(self.db)
             self.post_repo = InstagramPostRepository(self.db)
             self.post_metrics_repo = InstagramPostMetricsRepository(self.db)
+            self.freshness = create_freshness_ledger(self.db, "daily")
+            self.monthly_rollup = create_monthly_rollup_service(self.db)
+            self.media_type_rollup = create_media_type_rollup_service(self.db)
             logger.info("Repositories initialized successfully")
     
     async def collect_daily_data(
         self,
         target_date: Optional[date] = None,
         account_filter: Optional[List[str]] = None,
-        dry_run: bool = False
+        dry_run: bool = False,
+        shard: Optional[Shard] = None
     ) -> DailyCollectionSummary:
         """
         日次データ収集のメイン処理
@@ -78,6 +90,7 @@ class DailyCollectorService:
             target_date: 対象日付（未指定時は昨日）
             account_filter: 収集対象アカウントのフィルタ（instagram_user_idのリスト）
             dry_run: ドライラン実行フラグ
+            shard: 担当シャード（指定時はハッシュで割り当てられたアカウントのみ収集）
             
         Returns:
             DailyCollectionSummary: 収集結果サマリー
@@ -93,9 +106,13 @@ class DailyCollectorService:
         try:
             # リポジトリ初期化
             self._init_repositories()
+            skipped_writes_before = self.post_metrics_repo.skipped_writes
             
             # 対象アカウント取得
             target_accounts = await self._get_target_accounts(account_filter)
+            if shard:
+                target_accounts = filter_accounts_for_shard(target_accounts, shard)
+                logger.info(f"Shard {shard}: {len(target_accounts)} accounts assigned")
             logger.info(f"Found {len(target_accounts)} target accounts")
             
             if dry_run:
@@ -140,6 +157,13 @@ class DailyCollectorService:
                             error_message=error_msg
                         ))
             
+            # 収集した月の月次統計だけを再計算
+            if not dry_run:
+                await self.monthly_rollup.rollup(
+                    (r.account_id, target_date) for r in collection_results if r.success
+                )
+                await self.media_type_rollup.refresh(r.account_id for r in collection_results if r.success)
+            
             completed_at = datetime.now()
             duration = (completed_at - started_at).total_seconds()
             
@@ -151,10 +175,11 @@ class DailyCollectorService:
                 collection_results=collection_results,
                 started_at=started_at,
                 completed_at=completed_at,
-                total_duration_seconds=duration
+                total_duration_seconds=duration,
+                skipped_writes=self.post_metrics_repo.skipped_writes - skipped_writes_before
             )
             
-            logger.info(f"Daily collection completed - Success: {successful_count}/{len(target_accounts)}, Duration: {duration:.2f}s")
+            logger.info(f"Daily collection completed - Success: {successful_count}/{len(target_accounts)}, Duration: {duration:.2f}s, Skipped metric writes: {summary.skipped_writes}")
             return summary
             
         except Exception as e:
@@ -167,6 +192,8 @@ class DailyCollectorService:
             self.daily_stats_repo = None
             self.post_repo = None
             self.post_metrics_repo = None
+            self.monthly_rollup = None
+            self.media_type_rollup = None
     
     async def _get_target_accounts(self, account_filter: Optional[List[str]] = None) -> List:
         """
@@ -259,6 +286,7 @@ class DailyCollectorService:
             )
             
             # データ集約処理
+            skipped_writes_before = self.post_metrics_repo.skipped_writes
             if not dry_run:
                 await self._save_collected_data(
                     account=account,
@@ -275,7 +303,8 @@ class DailyCollectorService:
                 "insights_metrics_count": len(insights_data.keys()),
                 "posts_count": len(posts_data),
                 "follower_count": basic_data.get("followers_count", 0),
-                "reach": insights_data.get("reach", 0)
+                "reach": insights_data.get("reach", 0),
+                "metrics_skipped_writes": self.post_metrics_repo.skipped_writes - skipped_writes_before
             }
             
             return CollectionResult(
@@ -339,11 +368,20 @@ class DailyCollectorService:
             
             # 投稿データ保存
             if posts_data:
+                # 他ジョブが直近に取得済みのインサイトは再取得しない
+                fresh_insights = await self.freshness.fresh_subjects(
+                    account.id, POST_INSIGHTS, [p.get('id') for p in posts_data]
+                )
+                refreshed_ids = []
                 for post_data in posts_data:
                     # 投稿基本情報保存
                     post_info = self.aggregator.extract_post_info(post_data, account.id)
                     saved_post = await self.post_repo.create_or_update(post_info)
                     
+                    if str(post_data.get('id')) in fresh_insights:
+                        logger.debug(f"Skipping fresh post metrics for post {post_data.get('id')}")
+                        continue
+                    
                     # 投稿メトリクス保存（利用可能な場合）
                     try:
                         post_metrics = await self._collect_post_metrics(
@@ -355,8 +393,11 @@ class DailyCollectorService:
                             post_metrics = normalize_post_metrics_for_db(post_metrics)
                             post_metrics['post_id'] = saved_post.id
                             await self.post_metrics_repo.create_or_update_daily(post_metrics)
+                            refreshed_ids.append(post_data.get('id'))
                     except Exception as e:
                         logger.warning(f"Failed to save post metrics for post {post_data.get('id')}: {str(e)}")
+                
+                await self.freshness.record(account.id, POST_INSIGHTS, refreshed_ids)
             
             # アカウント最終同期時刻更新
             await self.account_repo.update_last_sync(account.id, collected_at)
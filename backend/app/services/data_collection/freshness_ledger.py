@@ -0,0 +1,106 @@
+"""
+Freshness Ledger
+収集ジョブ間で共有する鮮度台帳。別ジョブが直近に取得したデータの再取得をスキップします。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from ...repositories.collection_freshness_repository import CollectionFreshnessRepository
+from ...utils.dates import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# データ種別
+POST_INSIGHTS = "post_insights"
+
+# 種別ごとの既定の鮮度期間（環境変数で上書き可能）
+DEFAULT_MAX_AGES: Dict[str, timedelta] = {
+    POST_INSIGHTS: timedelta(hours=float(os.getenv("FRESHNESS_POST_INSIGHTS_HOURS", "6"))),
+}
+
+
+class FreshnessLedger:
+    """収集鮮度台帳
+
+    - fresh_subjects: 鮮度期間内に他のジョブが取得済みの対象を返す
+      （自ジョブの取得は対象外。自ジョブの再取得間隔は投稿ごとのスケジュール（next_refresh_at）が決める）
+    - record: 取得した対象を記録する
+    - 台帳の読み書きに失敗しても収集は止めない（未取得扱いで続行）
+    """
+
+    def __init__(
+        self,
+        repo: CollectionFreshnessRepository,
+        source: str,
+        max_ages: Optional[Dict[str, timedelta]] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.repo = repo
+        self.source = source
+        self.max_ages = {**DEFAULT_MAX_AGES, **(max_ages or {})}
+        if enabled is None:
+            enabled = os.getenv("COLLECTION_FRESHNESS_ENABLED", "true").lower() not in ("0", "false", "no")
+        self.enabled = enabled
+
+    async def fresh_subjects(
+        self,
+        account_id: str,
+        data_kind: str,
+        subject_ids: Iterable[str],
+        now: Optional[datetime] = None,
+    ) -> Set[str]:
+        """鮮度期間内に他のジョブが取得済みの対象IDを返す"""
+        subject_ids = [str(s) for s in subject_ids if s]
+        max_age = self.max_ages.get(data_kind)
+        if not self.enabled or not subject_ids or not max_age:
+            return set()
+
+        now = now or datetime.now(timezone.utc)
+        try:
+            fetched = await self.repo.get_fetched_at(
+                str(account_id), data_kind, subject_ids, exclude_fetched_by=self.source
+            )
+        except Exception as e:
+            logger.warning(f"Freshness ledger lookup failed ({data_kind}, account {account_id}): {e}")
+            return set()
+
+        fresh: Set[str] = set()
+        for subject_id, fetched_at in fetched.items():
+            fetched_dt = parse_datetime(fetched_at)
+            if fetched_dt and now - fetched_dt < max_age:
+                fresh.add(subject_id)
+        if fresh:
+            logger.debug(f"{len(fresh)}/{len(subject_ids)} {data_kind} subjects fresh for account {account_id}")
+        return fresh
+
+    async def record(
+        self,
+        account_id: str,
+        data_kind: str,
+        subject_ids: Iterable[str],
+        fetched_at: Optional[datetime] = None,
+    ) -> None:
+        """取得済みとして記録"""
+        subject_ids = [str(s) for s in subject_ids if s]
+        if not self.enabled or not subject_ids:
+            return
+        try:
+            await self.repo.mark_fetched(
+                str(account_id),
+                data_kind,
+                subject_ids,
+                fetched_at or datetime.now(timezone.utc),
+                self.source,
+            )
+        except Exception as e:
+            logger.warning(f"Freshness ledger update failed ({data_kind}, account {account_id}): {e}")
+
+
+def create_freshness_ledger(db, source: str) -> FreshnessLedger:
+    """Freshness Ledger インスタンス作成"""
+    return FreshnessLedger(CollectionFreshnessRepository(db), source)
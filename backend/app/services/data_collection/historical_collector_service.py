@@ -3,9 +3,10 @@ Historical Data Collection Service
 過去の投稿データとメトリクスを効率的に収集するサービス
 """
 import asyncio
+import inspect
 import logging
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 import json
 
@@ -15,10 +16,14 @@ from ...repositories.instagram_post_repository import InstagramPostRepository
 from ...repositories.instagram_post_metrics_repository import InstagramPostMetricsRepository
 from .instagram_api_client import InstagramAPIClient, InstagramAPIError
 from .data_aggregator_service import DataAggregatorService
+from .media_type_rollup_service import create_media_type_rollup_service
 
 # ログ設定
 logger = logging.getLogger(__name__)
 
+# 進捗イベントのコールバック（同期 / 非同期どちらも可）
+ProgressCallback = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
 @dataclass
 class HistoricalCollectionResult:
     """過去データ収集結果"""
@@ -36,6 +41,7 @@ class HistoricalCollectionResult:
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     checkpoint_data: Optional[Dict] = None
+    skipped_writes: int = 0
 
 @dataclass
 class PostCollectionStats:
@@ -75,7 +81,9 @@ class HistoricalCollectorService:
         end_date: Optional[date] = None,
         max_posts: Optional[int] = None,
         include_metrics: bool = True,
-        chunk_size: int = 100
+        chunk_size: int = 100,
+        stream: bool = False,
+        progress_callback: Optional[ProgressCallback] = None
     ) -> HistoricalCollectionResult:
         """
         過去投稿データの一括収集
@@ -86,7 +94,9 @@ class HistoricalCollectorService:
             end_date: 終了日付（未指定時は今日）
             max_posts: 最大投稿数
             include_metrics: メトリクス取得フラグ
-            chunk_size: バッチサイズ
+            chunk_size: バッチサイズ（stream=False の場合）
+            stream: 取得したページごとにフィルタ・保存・メトリクス収集を行う
+            progress_callback: ページ / バッチごとの進捗イベント受信先
             
         Returns:
             HistoricalCollectionResult: 収集結果
@@ -101,6 +111,7 @@ class HistoricalCollectorService:
         try:
             # リポジトリ初期化
             self._init_repositories()
+            skipped_writes_before = self.post_metrics_repo.skipped_writes
             
             # アカウント取得
             account = await self.account_repo.get_by_instagram_user_id(account_id)
@@ -110,60 +121,32 @@ class HistoricalCollectorService:
             stats = PostCollectionStats()
             
             async with InstagramAPIClient() as api_client:
-                # 全投稿データ取得
-                logger.info("Fetching all posts from Instagram API...")
-                all_posts = await self._fetch_all_posts(
-                    api_client, 
-                    account_id, 
-                    account.access_token_encrypted
-                )
-                
-                stats.total_api_calls += 1
-                logger.info(f"Retrieved {len(all_posts)} posts from API")
-                
-                # 日付フィルタリング
-                filtered_posts = self._filter_posts_by_date(
-                    all_posts, 
-                    start_date, 
-                    end_date
-                )
-                
-                # 最大数制限
-                if max_posts and len(filtered_posts) > max_posts:
-                    filtered_posts = filtered_posts[:max_posts]
-                
-                logger.info(f"Processing {len(filtered_posts)} posts after filtering")
-                
-                # バッチ処理
-                total_posts = len(filtered_posts)
-                for i in range(0, total_posts, chunk_size):
-                    chunk = filtered_posts[i:i + chunk_size]
-                    chunk_start = i + 1
-                    chunk_end = min(i + chunk_size, total_posts)
-                    
-                    logger.info(f"Processing batch {chunk_start}-{chunk_end}/{total_posts}")
-                    
-                    # 投稿データ保存
-                    for post_data in chunk:
-                        try:
-                            await self._save_post_data(post_data, account.id, stats)
-                        except Exception as e:
-                            logger.error(f"Failed to save post {post_data.get('id')}: {str(e)}")
-                            stats.failed_posts += 1
-                    
-                    # メトリクス収集（オプション）
-                    if include_metrics:
-                        await self._collect_chunk_metrics(
-                            api_client,
-                            chunk,
-                            account.access_token_encrypted,
-                            stats
-                        )
-                    
-                    # レート制限対応：チャンク間の待機
-                    if i + chunk_size < total_posts:
-                        logger.debug("Waiting between chunks to respect rate limits...")
-                        await asyncio.sleep(2)  # 2秒待機
+                if stream:
+                    total_posts = await self._collect_streaming(
+                        api_client,
+                        account,
+                        start_date,
+                        end_date,
+                        max_posts,
+                        include_metrics,
+                        stats,
+                        progress_callback
+                    )
+                else:
+                    total_posts = await self._collect_batched(
+                        api_client,
+                        account,
+                        start_date,
+                        end_date,
+                        max_posts,
+                        include_metrics,
+                        chunk_size,
+                        stats,
+                        progress_callback
+                    )
+            
+            if stats.new_posts or stats.updated_posts or stats.metrics_collected:
+                await create_media_type_rollup_service(self.db).refresh([str(account.id)])
             
             completed_at = datetime.now()
             duration = (completed_at - started_at).total_seconds()
@@ -180,7 +163,8 @@ class HistoricalCollectorService:
                 failed_items=stats.failed_posts,
                 duration_seconds=duration,
                 started_at=started_at,
-                completed_at=completed_at
+                completed_at=completed_at,
+                skipped_writes=self.post_metrics_repo.skipped_writes - skipped_writes_before
             )
             
             logger.info(f"Historical collection completed:")
@@ -188,6 +172,7 @@ class HistoricalCollectorService:
             logger.info(f"  New posts: {stats.new_posts}")
             logger.info(f"  Updated posts: {stats.updated_posts}")
             logger.info(f"  Metrics collected: {stats.metrics_collected}")
+            logger.info(f"  Skipped metric writes (unchanged): {result.skipped_writes}")
             logger.info(f"  Duration: {duration:.2f}s")
             
             return result
@@ -217,25 +202,194 @@ class HistoricalCollectorService:
             self.post_repo = None
             self.post_metrics_repo = None
     
-    async def _fetch_all_posts(
+    async def _collect_batched(
+        self,
+        api_client: InstagramAPIClient,
+        account,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        max_posts: Optional[int],
+        include_metrics: bool,
+        chunk_size: int,
+        stats: PostCollectionStats,
+        progress_callback: Optional[ProgressCallback]
+    ) -> int:
+        """全投稿を取得してからチャンク単位で保存・メトリクス収集（従来方式）"""
+        # 全投稿データ取得
+        logger.info("Fetching all posts from Instagram API...")
+        all_posts = await self._fetch_all_posts(
+            api_client, 
+            account.instagram_user_id, 
+            account.access_token_encrypted
+        )
+        
+        stats.total_api_calls += 1
+        logger.info(f"Retrieved {len(all_posts)} posts from API")
+        
+        # 日付フィルタリング
+        filtered_posts = self._filter_posts_by_date(
+            all_posts, 
+            start_date, 
+            end_date
+        )
+        
+        # 最大数制限
+        if max_posts and len(filtered_posts) > max_posts:
+            filtered_posts = filtered_posts[:max_posts]
+        
+        logger.info(f"Processing {len(filtered_posts)} posts after filtering")
+        
+        # バッチ処理
+        total_posts = len(filtered_posts)
+        for i in range(0, total_posts, chunk_size):
+            chunk = filtered_posts[i:i + chunk_size]
+            chunk_start = i + 1
+            chunk_end = min(i + chunk_size, total_posts)
+            
+            logger.info(f"Processing batch {chunk_start}-{chunk_end}/{total_posts}")
+            
+            await self._process_posts(api_client, account, chunk, include_metrics, stats)
+            await self._emit_progress(progress_callback, {
+                "event": "batch",
+                "account_id": account.instagram_user_id,
+                "batch_start": chunk_start,
+                "batch_end": chunk_end,
+                "total_posts": total_posts,
+                **self._stats_snapshot(stats)
+            })
+            
+            # レート制限対応：チャンク間の待機
+            if i + chunk_size < total_posts:
+                logger.debug("Waiting between chunks to respect rate limits...")
+                await asyncio.sleep(2)  # 2秒待機
+        
+        return total_posts
+    
+    async def _collect_streaming(
+        self,
+        api_client: InstagramAPIClient,
+        account,
+        start_date: Optional[date],
+        end_date: Optional[date],
+        max_posts: Optional[int],
+        include_metrics: bool,
+        stats: PostCollectionStats,
+        progress_callback: Optional[ProgressCallback]
+    ) -> int:
+        """取得ページごとにフィルタ・保存・メトリクス収集（ストリーミング方式）
+
+        API は新しい順に返すため、start_date より古い投稿を含むページで打ち切る。
+        """
+        logger.info("Streaming posts from Instagram API page by page...")
+        processed_total = 0
+        
+        async for page_number, page_posts in self._iter_post_pages(
+            api_client,
+            account.instagram_user_id,
+            account.access_token_encrypted
+        ):
+            stats.total_api_calls += 1
+            matched = self._filter_posts_by_date(page_posts, start_date, end_date)
+            if max_posts:
+                matched = matched[:max(0, max_posts - processed_total)]
+            
+            if matched:
+                await self._process_posts(api_client, account, matched, include_metrics, stats)
+                processed_total += len(matched)
+            
+            reached_start = self._page_reaches_before(page_posts, start_date)
+            reached_limit = bool(max_posts and processed_total >= max_posts)
+            
+            await self._emit_progress(progress_callback, {
+                "event": "page",
+                "account_id": account.instagram_user_id,
+                "page": page_number,
+                "fetched": len(page_posts),
+                "matched": len(matched),
+                "processed_total": processed_total,
+                "done": reached_start or reached_limit,
+                **self._stats_snapshot(stats)
+            })
+            
+            if reached_start or reached_limit:
+                logger.info(f"Stopping stream at page {page_number} (start date reached: {reached_start}, limit reached: {reached_limit})")
+                break
+        
+        return processed_total
+    
+    async def _process_posts(
+        self,
+        api_client: InstagramAPIClient,
+        account,
+        posts: List[Dict[str, Any]],
+        include_metrics: bool,
+        stats: PostCollectionStats
+    ):
+        """投稿群の保存とメトリクス収集"""
+        # 投稿データ一括保存（ID マップはメトリクス保存で再利用）
+        post_id_map = await self._save_chunk(posts, account.id, stats)
+        
+        # メトリクス収集（オプション）
+        if include_metrics:
+            await self._collect_chunk_metrics(
+                api_client,
+                posts,
+                account.access_token_encrypted,
+                stats,
+                post_id_map
+            )
+    
+    @staticmethod
+    def _page_reaches_before(posts: List[Dict[str, Any]], start_date: Optional[date]) -> bool:
+        """ページ内に start_date より古い投稿が含まれるか（以降のページは全て範囲外）"""
+        if not start_date:
+            return False
+        for post in reversed(posts):
+            timestamp_str = post.get('timestamp', '')
+            if not timestamp_str:
+                continue
+            try:
+                return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')).date() < start_date
+            except ValueError:
+                continue
+        return False
+    
+    @staticmethod
+    def _stats_snapshot(stats: PostCollectionStats) -> Dict[str, int]:
+        """進捗イベント用の統計値"""
+        return {
+            "new_posts": stats.new_posts,
+            "updated_posts": stats.updated_posts,
+            "failed_posts": stats.failed_posts,
+            "metrics_collected": stats.metrics_collected,
+            "metrics_failed": stats.metrics_failed,
+        }
+    
+    @staticmethod
+    async def _emit_progress(callback: Optional[ProgressCallback], event: Dict[str, Any]):
+        """進捗イベント通知（コールバック側の例外は収集を止めない）"""
+        if not callback:
+            return
+        try:
+            outcome = callback(event)
+            if inspect.isawaitable(outcome):
+                await outcome
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {str(e)}")
+    
+    async def _iter_post_pages(
         self,
         api_client: InstagramAPIClient,
         instagram_user_id: str,
         access_token: str
-    ) -> List[Dict[str, Any]]:
+    ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
         """
-        Instagram APIから全投稿を取得
+        Instagram APIの投稿をページ単位で順次取得（新しい順）
         
-        Args:
-            api_client: Instagram API クライアント
-            instagram_user_id: Instagram User ID
-            access_token: アクセストークン
-            
-        Returns:
-            List[Dict[str, Any]]: 全投稿データ
+        Yields:
+            Tuple[int, List[Dict[str, Any]]]: (ページ番号, 投稿データ)
         """
         url = api_client.config.get_user_media_url(instagram_user_id)
-        all_posts = []
         next_url = None
         page_count = 0
         
@@ -256,27 +410,47 @@ class HistoricalCollectorService:
                 else:
                     # 初回リクエスト
                     response = await api_client._make_request(url, params)
-                
-                posts = response.get('data', [])
-                all_posts.extend(posts)
-                
-                logger.debug(f"Page {page_count}: {len(posts)} posts retrieved")
-                
-                # 次ページの確認
-                paging = response.get('paging', {})
-                next_url = paging.get('next')
-                
-                if not next_url:
-                    logger.info(f"All posts retrieved - Total pages: {page_count}, Total posts: {len(all_posts)}")
-                    break
-                
-                # レート制限対応
-                await asyncio.sleep(1)
-                
             except InstagramAPIError as e:
                 logger.error(f"API error while fetching posts page {page_count}: {str(e)}")
-                break
+                return
+            
+            posts = response.get('data', [])
+            logger.debug(f"Page {page_count}: {len(posts)} posts retrieved")
+            yield page_count, posts
+            
+            # 次ページの確認
+            paging = response.get('paging', {})
+            next_url = paging.get('next')
+            
+            if not next_url:
+                logger.info(f"All posts pages retrieved - Total pages: {page_count}")
+                return
+            
+            # レート制限対応
+            await asyncio.sleep(1)
+    
+    async def _fetch_all_posts(
+        self,
+        api_client: InstagramAPIClient,
+        instagram_user_id: str,
+        access_token: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Instagram APIから全投稿を取得
+        
+        Args:
+            api_client: Instagram API クライアント
+            instagram_user_id: Instagram User ID
+            access_token: アクセストークン
+            
+        Returns:
+            List[Dict[str, Any]]: 全投稿データ
+        """
+        all_posts = []
+        async for _, posts in self._iter_post_pages(api_client, instagram_user_id, access_token):
+            all_posts.extend(posts)
         
+        logger.info(f"All posts retrieved - Total posts: {len(all_posts)}")
         return all_posts
     
     def _filter_posts_by_date(
@@ -324,6 +498,65 @@ class HistoricalCollectorService:
         logger.info(f"Date filtering: {len(posts)} -> {len(filtered_posts)} posts")
         return filtered_posts
     
+    async def _save_chunk(
+        self,
+        posts: List[Dict[str, Any]],
+        account_id: str,
+        stats: PostCollectionStats
+    ) -> Dict[str, str]:
+        """
+        チャンク単位の投稿一括保存（既存判定1回 + upsert 1回）
+        
+        一括保存に失敗した場合は投稿単位の保存にフォールバックする。
+        
+        Args:
+            posts: 投稿データチャンク
+            account_id: アカウントID
+            stats: 統計情報
+            
+        Returns:
+            Dict[str, str]: instagram_post_id -> 投稿ID のマップ
+        """
+        post_infos = []
+        valid_posts = []
+        for post_data in posts:
+            post_info = self.aggregator.extract_post_info(post_data, account_id)
+            if not post_info.get('instagram_post_id') or not post_info.get('posted_at'):
+                logger.warning(f"Skipping post without id/timestamp: {post_data.get('id')}")
+                stats.failed_posts += 1
+                continue
+            post_infos.append(post_info)
+            valid_posts.append(post_data)
+        
+        if not post_infos:
+            return {}
+        
+        instagram_post_ids = list({info['instagram_post_id'] for info in post_infos})
+        try:
+            existing = await self.post_repo.get_by_instagram_post_ids(
+                instagram_post_ids,
+                columns="instagram_post_id"
+            )
+            existing_ids = {str(row.instagram_post_id) for row in existing}
+            post_id_map = await self.post_repo.bulk_upsert(post_infos)
+        except Exception as e:
+            logger.warning(f"Bulk upsert failed, falling back to per-post save: {str(e)}")
+            post_id_map = {}
+            for post_data in valid_posts:
+                try:
+                    saved = await self._save_post_data(post_data, account_id, stats)
+                    if saved and saved.get('id'):
+                        post_id_map[str(post_data.get('id'))] = str(saved.id)
+                except Exception:
+                    continue
+            return post_id_map
+        
+        updated = len(existing_ids)
+        stats.updated_posts += updated
+        stats.new_posts += len(instagram_post_ids) - updated
+        logger.debug(f"Upserted {len(instagram_post_ids)} posts ({updated} existing)")
+        return post_id_map
+    
     async def _save_post_data(
         self,
         post_data: Dict[str, Any],
@@ -352,11 +585,13 @@ class HistoricalCollectorService:
                 updated_post = await self.post_repo.update(existing_post.id, post_info)
                 stats.updated_posts += 1
                 logger.debug(f"Updated post: {instagram_post_id}")
+                return updated_post or existing_post
             else:
                 # 新規投稿作成
                 new_post = await self.post_repo.create(post_info)
                 stats.new_posts += 1
                 logger.debug(f"Created new post: {instagram_post_id}")
+                return new_post
                 
         except Exception as e:
             logger.error(f"Failed to save post {instagram_post_id}: {str(e)}")
@@ -368,7 +603,8 @@ class HistoricalCollectorService:
         api_client: InstagramAPIClient,
         chunk: List[Dict[str, Any]],
         access_token: str,
-        stats: PostCollectionStats
+        stats: PostCollectionStats,
+        post_id_map: Optional[Dict[str, str]] = None
     ):
         """
         チャンク内投稿のメトリクス収集
@@ -378,7 +614,9 @@ class HistoricalCollectorService:
             chunk: 投稿データチャンク
             access_token: アクセストークン
             stats: 統計情報
+            post_id_map: instagram_post_id -> 投稿ID（保存時のマップ。無い投稿のみDB参照）
         """
+        post_id_map = post_id_map or {}
         logger.debug(f"Collecting metrics for {len(chunk)} posts")
         
         for post_data in chunk:
@@ -396,16 +634,19 @@ class HistoricalCollectorService:
                 stats.total_api_calls += 1
                 
                 if metrics:
-                    # データベース投稿取得
-                    db_post = await self.post_repo.get_by_instagram_post_id(post_id)
-                    if db_post:
+                    # データベース投稿ID（保存時のマップを優先）
+                    db_post_id = post_id_map.get(str(post_id))
+                    if not db_post_id:
+                        db_post = await self.post_repo.get_by_instagram_post_id(post_id)
+                        db_post_id = str(db_post.id) if db_post else None
+                    if db_post_id:
                         # メトリクス保存
                         metrics_data = self.aggregator.extract_post_metrics(
                             post_id,
                             metrics,
                             datetime.now().date()
                         )
-                        metrics_data['post_id'] = db_post.id
+                        metrics_data['post_id'] = db_post_id
                         
                         await self.post_metrics_repo.create_or_update_daily(metrics_data)
                         stats.metrics_collected += 1
@@ -438,6 +679,7 @@ class HistoricalCollectorService:
         try:
             # リポジトリ初期化
             self._init_repositories()
+            skipped_writes_before = self.post_metrics_repo.skipped_writes
             
             # アカウント取得
             account = await self.account_repo.get_by_instagram_user_id(account_id)
@@ -486,6 +728,9 @@ class HistoricalCollectorService:
                         logger.error(f"Failed to collect metrics for post {post.instagram_post_id}: {str(e)}")
                         stats.metrics_failed += 1
             
+            if stats.metrics_collected:
+                await create_media_type_rollup_service(self.db).refresh([str(account.id)])
+            
             completed_at = datetime.now()
             duration = (completed_at - started_at).total_seconds()
             
@@ -501,12 +746,14 @@ class HistoricalCollectorService:
                 failed_items=stats.metrics_failed,
                 duration_seconds=duration,
                 started_at=started_at,
-                completed_at=completed_at
+                completed_at=completed_at,
+                skipped_writes=self.post_metrics_repo.skipped_writes - skipped_writes_before
             )
             
             logger.info(f"Missing metrics collection completed:")
             logger.info(f"  Metrics collected: {stats.metrics_collected}")
             logger.info(f"  Failed: {stats.metrics_failed}")
+            logger.info(f"  Skipped metric writes (unchanged): {result.skipped_writes}")
             logger.info(f"  Duration: {duration:.2f}s")
             
             return result
@@ -12,6 +12,7 @@ import logging
 from urllib.parse import urlencode
 
 from ...core.instagram_config import instagram_config
+from .api_budget import ApiBudget, get_api_budget
 
 # ログ設定
 logger = logging.getLogger(__name__)
@@ -26,9 +27,11 @@ class InstagramAPIError(Exception):
 class InstagramAPIClient:
     """Instagram Graph API クライアント"""
     
-    def __init__(self):
+    def __init__(self, budget: Optional[ApiBudget] = None):
         self.config = instagram_config
         self.session: Optional[aiohttp.ClientSession] = None
+        # 共有 API バジェット（未指定時はプロセス共有設定、未設定なら制限なし）
+        self.budget = budget if budget is not None else get_api_budget()
     
     async def __aenter__(self):
         """非同期コンテキストマネージャー入口"""
@@ -68,6 +71,18 @@ class InstagramAPIClient:
         if not self.session:
             raise InstagramAPIError("API client session not initialized")
         
+        if self.budget is not None:
+            async with self.budget.slot():
+                return await self._send_request(url, params, method)
+        return await self._send_request(url, params, method)
+    
+    async def _send_request(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        method: str
+    ) -> Dict[str, Any]:
+        """API リクエストの送信とエラーレスポンスの変換"""
         try:
             logger.debug(f"Making {method} request to {url} with params: {list(params.keys())}")
             
@@ -259,6 +274,7 @@ class InstagramAPIClient:
         access_token: str,
         since_datetime: datetime,
         max_posts: int = 50,
+        fields: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """
         指定日時以降の投稿データ取得（ページング対応・新しい順）。
@@ -268,6 +284,7 @@ class InstagramAPIClient:
             access_token: アクセストークン（平文）
             since_datetime: これ以降の投稿のみ返す（timezone-aware推奨）
             max_posts: 最大取得件数（安全のため上限）
+            fields: 取得フィールド（省略時は get_media_fields。timestamp は必須）
         """
         if since_datetime.tzinfo is None:
             since_datetime = since_datetime.replace(tzinfo=timezone.utc)
@@ -276,7 +293,7 @@ class InstagramAPIClient:
         per_page = min(self.config.MAX_POSTS_LIMIT, max(1, max_posts))
 
         params = {
-            "fields": self.config.get_media_fields(),
+            "fields": fields or self.config.get_media_fields(),
             "access_token": access_token,
             "limit": per_page,
         }
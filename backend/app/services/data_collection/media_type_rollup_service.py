@@ -0,0 +1,39 @@
+"""
+Media Type Rollup Service
+収集で投稿・メトリクスを書き込んだアカウントのメディアタイプ別ロールアップ
+（instagram_media_type_rollups）を再集計します。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+from ...repositories.instagram_media_type_rollup_repository import InstagramMediaTypeRollupRepository
+
+logger = logging.getLogger(__name__)
+
+
+class MediaTypeRollupService:
+    """メディアタイプ別ロールアップの再集計（失敗しても収集自体は成功扱い）"""
+
+    def __init__(self, db):
+        self.rollup_repo = InstagramMediaTypeRollupRepository(db)
+
+    async def refresh(self, account_ids: Iterable[str]) -> int:
+        """指定アカウント（UUID）を再集計し、成功したアカウント数を返す"""
+        refreshed = 0
+        for account_id in sorted({str(a) for a in account_ids if a}):
+            try:
+                await self.rollup_repo.refresh(account_id)
+                refreshed += 1
+            except Exception as e:
+                logger.warning(f"Media type rollup refresh failed for account {account_id}: {e}")
+        if refreshed:
+            logger.info(f"Media type rollups refreshed for {refreshed} accounts")
+        return refreshed
+
+
+def create_media_type_rollup_service(db) -> MediaTypeRollupService:
+    """Media Type Rollup Service インスタンス作成"""
+    return MediaTypeRollupService(db)
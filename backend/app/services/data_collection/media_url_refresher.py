@@ -0,0 +1,246 @@
+"""
+Media URL Refresher
+Instagram CDN の media_url / thumbnail_url は `oe`（期限）を過ぎると 403 になるため、
+期限が近い URL を Graph API から取り直して instagram_posts を更新します。
+
+- API リクエストの処理中には実行しない（バックグラウンドタスク / ジョブ / スクリプトから実行）
+- 期限が近い投稿が多い場合は最新投稿一覧をまとめて取得し、残りを投稿単位で取得
+- 取得できない・URL が変わらない投稿は期限を再試行時刻まで進める（削除済み投稿などが毎回の対象枠を占有しないように）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from ...core.records import Record
+from ...repositories.instagram_account_repository import InstagramAccountRepository
+from ...repositories.instagram_post_repository import InstagramPostRepository
+from ...utils.dates import parse_datetime
+from ...utils.media_url import media_url_expiry
+from .instagram_api_client import InstagramAPIClient, InstagramAPIError
+
+logger = logging.getLogger(__name__)
+
+# 期限までの残りがこれ未満の URL を更新対象にする
+DEFAULT_REFRESH_HORIZON = timedelta(minutes=int(os.getenv("MEDIA_URL_REFRESH_HORIZON_MINUTES", "60")))
+# 1アカウントあたりの更新対象（期限の近い順）
+DEFAULT_MAX_POSTS = 150
+# 更新できなかった投稿を次に対象とするまでの間隔
+DEFAULT_RETRY_INTERVAL = timedelta(minutes=int(os.getenv("MEDIA_URL_REFRESH_RETRY_MINUTES", "360")))
+# 対象がこの件数を超える場合は最新投稿一覧をまとめて取得する
+_BATCH_THRESHOLD = 10
+_URL_COLUMNS = "id,account_id,instagram_post_id,media_url,thumbnail_url,media_url_expires_at,posted_at"
+
+
+def needs_media_url_refresh(
+    post: Dict[str, Any],
+    horizon: timedelta = DEFAULT_REFRESH_HORIZON,
+    now: Optional[datetime] = None,
+) -> bool:
+    """URL が無い、または期限が horizon 以内なら True（期限の読めない URL は対象外）
+
+    media_url_expires_at を取得済みの行はその値を使い、無い場合のみ URL を解析する。
+    """
+    if "media_url_expires_at" in post:
+        expiry = parse_datetime(post.get("media_url_expires_at"))
+    else:
+        expiry = media_url_expiry(post)
+    if not expiry:
+        return False
+    return expiry <= (now or datetime.now(timezone.utc)) + horizon
+
+
+@dataclass
+class MediaUrlRefreshResult:
+    """URL 更新結果"""
+
+    accounts_processed: int = 0
+    posts_checked: int = 0
+    posts_expiring: int = 0
+    posts_refreshed: int = 0
+    posts_deferred: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def merge(self, other: "MediaUrlRefreshResult") -> None:
+        self.accounts_processed += other.accounts_processed
+        self.posts_checked += other.posts_checked
+        self.posts_expiring += other.posts_expiring
+        self.posts_refreshed += other.posts_refreshed
+        self.posts_deferred += other.posts_deferred
+        self.errors.extend(other.errors)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "accounts_processed": self.accounts_processed,
+            "posts_checked": self.posts_checked,
+            "posts_expiring": self.posts_expiring,
+            "posts_refreshed": self.posts_refreshed,
+            "posts_deferred": self.posts_deferred,
+            "errors": self.errors,
+        }
+
+
+class MediaUrlRefresher:
+    """期限の近いメディア URL の更新"""
+
+    def __init__(
+        self,
+        db,
+        horizon: timedelta = DEFAULT_REFRESH_HORIZON,
+        retry_interval: timedelta = DEFAULT_RETRY_INTERVAL,
+    ):
+        self.account_repo = InstagramAccountRepository(db)
+        self.post_repo = InstagramPostRepository(db)
+        self.horizon = horizon
+        self.retry_interval = retry_interval
+
+    async def refresh_accounts(
+        self,
+        account_filter: Optional[List[str]] = None,
+        max_posts: int = DEFAULT_MAX_POSTS,
+        dry_run: bool = False,
+    ) -> MediaUrlRefreshResult:
+        """アクティブ（またはフィルタ指定）アカウントの期限が近い URL を更新"""
+        accounts = (
+            await self.account_repo.get_accounts_for_collection(account_filter)
+            if account_filter
+            else await self.account_repo.get_active_accounts()
+        )
+        result = MediaUrlRefreshResult()
+        for account in accounts:
+            try:
+                result.merge(await self.refresh_account(account, max_posts=max_posts, dry_run=dry_run))
+            except Exception as e:
+                result.errors.append(f"{account.get('instagram_user_id')}: {e}")
+                logger.warning(f"Media URL refresh failed for account {account.get('instagram_user_id')}: {e}")
+        return result
+
+    async def refresh_account(
+        self,
+        account: Record,
+        max_posts: int = DEFAULT_MAX_POSTS,
+        dry_run: bool = False,
+    ) -> MediaUrlRefreshResult:
+        """1アカウントの期限が近い URL を期限の近い順に最大 max_posts 件更新（media_url_expires_at のインデックスで検索）"""
+        posts = await self.post_repo.get_expiring_media_urls(
+            str(account["id"]),
+            datetime.now(timezone.utc) + self.horizon,
+            limit=max_posts,
+            columns=_URL_COLUMNS,
+        )
+        return await self.refresh_posts(account, posts, dry_run=dry_run)
+
+    async def refresh_posts(
+        self,
+        account: Record,
+        posts: List[Record],
+        dry_run: bool = False,
+    ) -> MediaUrlRefreshResult:
+        """指定投稿のうち期限が近い URL を更新"""
+        result = MediaUrlRefreshResult(accounts_processed=1, posts_checked=len(posts))
+        now = datetime.now(timezone.utc)
+        to_refresh = [p for p in posts if needs_media_url_refresh(p, self.horizon, now)]
+        result.posts_expiring = len(to_refresh)
+
+        access_token = (account.get("access_token_encrypted") or "").strip()
+        instagram_user_id = (account.get("instagram_user_id") or "").strip()
+        if not to_refresh or not access_token or not instagram_user_id or dry_run:
+            return result
+
+        async with InstagramAPIClient() as api_client:
+            fetched: Dict[str, Dict[str, Any]] = {}
+            oldest = min(
+                (d for p in to_refresh if (d := parse_datetime(p.get("posted_at")))),
+                default=None,
+            )
+            if len(to_refresh) > _BATCH_THRESHOLD and oldest:
+                # 対象の最古投稿までの一覧を新しい順にまとめて取得（数回の API 呼び出しで済む）
+                api_posts = await api_client.get_posts_since(
+                    instagram_user_id=instagram_user_id,
+                    access_token=access_token,
+                    since_datetime=oldest - timedelta(seconds=1),
+                    max_posts=max(DEFAULT_MAX_POSTS, len(to_refresh)),
+                )
+                fetched = {p["id"]: p for p in api_posts if p.get("id")}
+
+            missing = [p for p in to_refresh if (p.get("instagram_post_id") or "") not in fetched]
+            fetched.update(await self._fetch_media(api_client, access_token, missing))
+
+        updates: List[Dict[str, Any]] = []
+        deferred: List[Dict[str, Any]] = []
+        retry_at = now + self.retry_interval
+        for post in to_refresh:
+            if not post.get("id"):
+                continue
+            media = fetched.get(post.get("instagram_post_id") or "")
+            changed = bool(media) and self._url_changes(post, media)
+            # 片方の URL だけ変わった場合も期限は表示に使う URL から計算されるよう両方渡す
+            row = {"id": post["id"], "media_url": post.get("media_url"), "thumbnail_url": post.get("thumbnail_url")}
+            if changed:
+                updates.append(row)
+            else:
+                # 取得失敗（削除済み等）・URL 無し・URL 不変は再試行時刻まで対象から外す
+                deferred.append({**row, "media_url_expires_at": retry_at})
+        # 更新は1回の書き込みにまとめる
+        if updates or deferred:
+            written = await self.post_repo.bulk_update_media_urls(updates + deferred)
+            if written < len(updates) + len(deferred):
+                logger.warning(
+                    f"Media URL write for account {instagram_user_id} updated {written} of {len(updates) + len(deferred)} posts"
+                )
+            result.posts_refreshed = len(updates)
+            result.posts_deferred = len(deferred)
+
+        if result.posts_refreshed or result.posts_deferred:
+            logger.info(
+                f"Refreshed media URLs for {result.posts_refreshed} posts of account {instagram_user_id} "
+                f"({result.posts_deferred} deferred until {retry_at.isoformat()})"
+            )
+        return result
+
+    @staticmethod
+    async def _fetch_media(
+        api_client: InstagramAPIClient,
+        access_token: str,
+        posts: List[Record],
+    ) -> Dict[str, Dict[str, Any]]:
+        """投稿単位で media_url / thumbnail_url を取得"""
+        semaphore = asyncio.Semaphore(5)
+
+        async def fetch(ig_post_id: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await api_client.get_media(
+                        media_id=ig_post_id,
+                        access_token=access_token,
+                        fields="id,media_url,thumbnail_url",
+                    )
+                except InstagramAPIError as e:
+                    logger.warning(f"Failed to refresh media URL for {ig_post_id}: {e}")
+                    return None
+
+        ids = [(p.get("instagram_post_id") or "").strip() for p in posts]
+        ids = [i for i in ids if i]
+        results = await asyncio.gather(*(fetch(i) for i in ids))
+        return {i: media for i, media in zip(ids, results) if media}
+
+    @staticmethod
+    def _url_changes(post: Record, media: Dict[str, Any]) -> Dict[str, Any]:
+        """変更された URL 列（post も更新後の値に書き換える）"""
+        update_data: Dict[str, Any] = {}
+        for column in ("media_url", "thumbnail_url"):
+            new_url = (media.get(column) or "").strip()
+            if new_url and new_url != (post.get(column) or ""):
+                update_data[column] = new_url
+                post[column] = new_url
+        return update_data
+
+
+def create_media_url_refresher(db, horizon: Optional[timedelta] = None) -> MediaUrlRefresher:
+    """Media URL Refresher インスタンス作成"""
+    return MediaUrlRefresher(db, horizon or DEFAULT_REFRESH_HORIZON)
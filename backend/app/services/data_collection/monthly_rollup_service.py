@@ -0,0 +1,193 @@
+"""
+Monthly Rollup Service
+日次統計と投稿メトリクスから月次統計（instagram_monthly_stats）を再計算します。
+収集で更新された (アカウント, 月) だけを対象にするため、全期間の再集計は行いません。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ...repositories.instagram_daily_stats_repository import InstagramDailyStatsRepository
+from ...repositories.instagram_monthly_stats_repository import InstagramMonthlyStatsRepository
+from ...repositories.instagram_post_metrics_repository import InstagramPostMetricsRepository
+from ...repositories.instagram_post_repository import InstagramPostRepository
+from ...utils.dates import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(value: date) -> date:
+    """月初日"""
+    return value.replace(day=1)
+
+
+def month_end(value: date) -> date:
+    """月末日"""
+    next_month = (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        return date.fromisoformat(value[:10])
+    return None
+
+
+@dataclass
+class RollupResult:
+    """月次ロールアップ結果"""
+
+    months_updated: int = 0
+    months_failed: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+class MonthlyRollupService:
+    """月次統計ロールアップ
+
+    - 月平均フォロワー/フォロー数と月間フォロワー増減: 日次統計（前月末日を起点）
+    - 投稿数・いいね・コメント・リーチ・エンゲージメント率: 当月投稿の最新メトリクス
+      （投稿メトリクスが1件もない月は日次統計の投稿集計で代替）
+    """
+
+    def __init__(self, db):
+        self.daily_stats_repo = InstagramDailyStatsRepository(db)
+        self.monthly_stats_repo = InstagramMonthlyStatsRepository(db)
+        self.post_repo = InstagramPostRepository(db)
+        self.post_metrics_repo = InstagramPostMetricsRepository(db)
+
+    async def rollup_month(self, account_id: str, month: date) -> Dict[str, Any]:
+        """1アカウント・1か月分を再計算して保存"""
+        first_day = month_start(month)
+        last_day = month_end(first_day)
+
+        # 前月末日を含めて取得（月間増減の起点）
+        daily_rows = await self.daily_stats_repo.get_by_date_range(
+            account_id, first_day - timedelta(days=1), last_day
+        )
+        posts = await self.post_repo.get_by_date_range(account_id, first_day, last_day)
+        latest_metrics = await self.post_metrics_repo.get_latest_by_posts([str(p.id) for p in posts])
+
+        stats = build_monthly_stats(account_id, first_day, daily_rows, posts, latest_metrics)
+        await self.monthly_stats_repo.create_or_update(stats)
+        return stats
+
+    async def rollup(self, targets: Iterable[Tuple[str, date]]) -> RollupResult:
+        """(アカウントID, 日付) の組から影響する月だけを再計算"""
+        result = RollupResult()
+        months: Set[Tuple[str, date]] = {(str(account_id), month_start(d)) for account_id, d in targets}
+        for account_id, month in sorted(months):
+            try:
+                await self.rollup_month(account_id, month)
+                result.months_updated += 1
+            except Exception as e:
+                result.months_failed += 1
+                result.errors.append(f"{account_id} {month:%Y-%m}: {e}")
+                logger.warning(f"Monthly rollup failed for account {account_id} ({month:%Y-%m}): {e}")
+        if months:
+            logger.info(f"Monthly rollup: {result.months_updated} updated, {result.months_failed} failed")
+        return result
+
+
+def build_monthly_stats(
+    account_id: str,
+    first_day: date,
+    daily_rows: List[Dict[str, Any]],
+    posts: List[Dict[str, Any]],
+    latest_metrics: Dict[str, Dict[str, Any]],
+) -> Dict[str, Any]:
+    """月次統計行を構築"""
+    by_date = {d: row for row in daily_rows if (d := _as_date(row.get("stats_date")))}
+    in_month = [by_date[d] for d in sorted(by_date) if d >= first_day]
+    baseline = by_date.get(first_day - timedelta(days=1)) or (in_month[0] if in_month else None)
+
+    followers = [row.get("followers_count") or 0 for row in in_month]
+    following = [row.get("following_count") or 0 for row in in_month]
+    avg_followers = round(sum(followers) / len(followers)) if followers else 0
+    avg_following = round(sum(following) / len(following)) if following else 0
+
+    follower_growth = 0
+    follower_growth_rate = 0.0
+    if baseline and in_month:
+        start_followers = baseline.get("followers_count") or 0
+        follower_growth = (in_month[-1].get("followers_count") or 0) - start_followers
+        if start_followers > 0:
+            follower_growth_rate = round(follower_growth / start_followers * 100, 2)
+
+    # 投稿ごとの最新メトリクスを集計
+    total_likes = total_comments = total_reach = 0
+    engagement_rates: List[float] = []
+    day_engagement: Dict[date, int] = defaultdict(int)
+    week_rates: Dict[date, List[float]] = defaultdict(list)
+    content: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"posts": 0, "likes": 0, "comments": 0, "reach": 0})
+
+    for post in posts:
+        media_type = post.get("media_type") or "UNKNOWN"
+        content[media_type]["posts"] += 1
+        metrics = latest_metrics.get(str(post.get("id")))
+        if not metrics:
+            continue
+        likes = metrics.get("likes") or 0
+        comments = metrics.get("comments") or 0
+        reach = metrics.get("reach") or 0
+        rate = float(metrics.get("engagement_rate") or 0)
+
+        total_likes += likes
+        total_comments += comments
+        total_reach += reach
+        engagement_rates.append(rate)
+        content[media_type]["likes"] += likes
+        content[media_type]["comments"] += comments
+        content[media_type]["reach"] += reach
+
+        posted_at = parse_datetime(post.get("posted_at"))
+        if posted_at:
+            posted_date = posted_at.date()
+            day_engagement[posted_date] += likes + comments
+            week_rates[posted_date - timedelta(days=posted_date.weekday())].append(rate)
+
+    if not engagement_rates:
+        # 投稿メトリクス未取得の月は日次統計の投稿集計で代替
+        total_likes = sum(row.get("total_likes") or 0 for row in in_month)
+        total_comments = sum(row.get("total_comments") or 0 for row in in_month)
+        for row in in_month:
+            day_engagement[_as_date(row.get("stats_date"))] += (row.get("total_likes") or 0) + (
+                row.get("total_comments") or 0
+            )
+
+    total_posts = len(posts) or sum(row.get("posts_count") or 0 for row in in_month)
+    best_day = max(day_engagement, key=day_engagement.get) if any(day_engagement.values()) else None
+
+    return {
+        "account_id": account_id,
+        "stats_month": first_day,
+        "avg_followers_count": avg_followers,
+        "avg_following_count": avg_following,
+        "follower_growth": follower_growth,
+        "follower_growth_rate": follower_growth_rate,
+        "total_posts": total_posts,
+        "total_likes": total_likes,
+        "total_comments": total_comments,
+        "total_reach": total_reach,
+        "avg_engagement_rate": round(sum(engagement_rates) / len(engagement_rates), 2) if engagement_rates else 0.0,
+        "best_performing_day": best_day,
+        "engagement_trend": json.dumps(
+            {week.isoformat(): round(sum(rates) / len(rates), 2) for week, rates in sorted(week_rates.items())}
+        ),
+        "content_performance": json.dumps(dict(content)),
+    }
+
+
+def create_monthly_rollup_service(db) -> MonthlyRollupService:
+    """Monthly Rollup Service インスタンス作成"""
+    return MonthlyRollupService(db)
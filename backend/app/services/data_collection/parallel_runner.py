@@ -0,0 +1,130 @@
+"""
+Parallel Account Runner
+アカウント単位の収集処理を上限付きワーカープールで並列実行し、進捗を集約表示する
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from .api_budget import ApiBudget
+
+# ログ設定
+logger = logging.getLogger(__name__)
+
+AccountWorker = Callable[[str], Awaitable[Any]]
+ResultCheck = Callable[[Any], bool]
+
+
+def _default_result_check(result: Any) -> bool:
+    """結果の成否判定（None / error_message 付きは失敗）"""
+    if result is None:
+        return False
+    if isinstance(result, dict):
+        return result.get('error_message') is None
+    return getattr(result, 'error_message', None) is None
+
+
+class ParallelProgress:
+    """並列収集の進捗集計"""
+
+    def __init__(self, total: int, budget: Optional[ApiBudget] = None):
+        self.total = total
+        self.budget = budget
+        self.started_at = datetime.now()
+        self.completed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.running: Set[str] = set()
+
+    def start(self, account_id: str):
+        self.running.add(account_id)
+
+    def finish(self, account_id: str, success: bool):
+        self.running.discard(account_id)
+        self.completed += 1
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def summary_line(self) -> str:
+        """1行の進捗サマリー"""
+        elapsed = (datetime.now() - self.started_at).total_seconds()
+        line = (
+            f"📊 進捗 {self.completed}/{self.total} アカウント "
+            f"(成功 {self.succeeded}, 失敗 {self.failed}, 実行中 {len(self.running)}) "
+            f"経過 {elapsed:.0f}s"
+        )
+        if self.budget is not None:
+            stats = self.budget.snapshot()
+            line += f", API呼び出し {stats['calls_made']} 回 (待機 {stats['throttled_seconds']}s)"
+        return line
+
+
+async def run_accounts_parallel(
+    account_ids: List[str],
+    worker: AccountWorker,
+    parallel: int,
+    budget: Optional[ApiBudget] = None,
+    report_interval: float = 30.0,
+    result_check: ResultCheck = _default_result_check
+) -> List[Any]:
+    """
+    アカウント単位の処理を最大 parallel 件ずつ並列実行
+
+    Args:
+        account_ids: 対象アカウント（Instagram User ID）
+        worker: アカウント1件分の収集コルーチン
+        parallel: 同時実行アカウント数
+        budget: 共有 API バジェット（進捗表示用）
+        report_interval: 定期進捗表示の間隔（秒）
+        result_check: 結果の成否判定
+
+    Returns:
+        List[Any]: account_ids と同じ順序の結果（例外時は None）
+    """
+    if parallel < 1:
+        raise ValueError("parallel must be >= 1")
+
+    progress = ParallelProgress(len(account_ids), budget)
+    results: List[Any] = [None] * len(account_ids)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, account_id in enumerate(account_ids):
+        queue.put_nowait((index, account_id))
+
+    async def run_worker():
+        while True:
+            try:
+                index, account_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            progress.start(account_id)
+            logger.info(f"▶️ アカウント: {account_id} の収集を開始します ({len(progress.running)} 件実行中)")
+            success = False
+            try:
+                results[index] = await worker(account_id)
+                success = result_check(results[index])
+            except Exception as e:
+                logger.error(f"アカウント: {account_id} の収集に失敗しました: {e}")
+            finally:
+                progress.finish(account_id, success)
+                logger.info(progress.summary_line())
+
+    async def report_periodically():
+        while True:
+            await asyncio.sleep(report_interval)
+            logger.info(progress.summary_line())
+
+    reporter = asyncio.create_task(report_periodically())
+    try:
+        await asyncio.gather(*(run_worker() for _ in range(min(parallel, len(account_ids)))))
+    finally:
+        reporter.cancel()
+        try:
+            await reporter
+        except asyncio.CancelledError:
+            pass
+
+    logger.info(f"🏁 並列収集完了: {progress.summary_line()}")
+    return results
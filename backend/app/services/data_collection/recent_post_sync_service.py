@@ -17,8 +17,11 @@ from ...repositories.instagram_account_repository import InstagramAccountReposit
 from ...repositories.instagram_post_metrics_repository import InstagramPostMetricsRepository
 from ...repositories.instagram_post_repository import InstagramPostRepository
 from .data_aggregator_service import DataAggregatorService
+from .freshness_ledger import POST_INSIGHTS, FreshnessLedger, create_freshness_ledger
 from .instagram_api_client import InstagramAPIClient, InstagramAPIError
+from .media_type_rollup_service import MediaTypeRollupService, create_media_type_rollup_service
 from .metrics_utils import normalize_post_metrics_for_db
+from .refresh_scheduler import MetricsRefreshScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +34,8 @@ class AccountRecentSyncResult:
     collected_at: datetime
     posts_processed: int = 0
     metrics_saved: int = 0
+    posts_skipped: int = 0
+    skipped_writes: int = 0
     error_message: Optional[str] = None
 
 
@@ -42,7 +47,10 @@ class RecentPostSyncService:
         self.account_repo: Optional[InstagramAccountRepository] = None
         self.post_repo: Optional[InstagramPostRepository] = None
         self.post_metrics_repo: Optional[InstagramPostMetricsRepository] = None
+        self.freshness: Optional[FreshnessLedger] = None
+        self.media_type_rollup: Optional[MediaTypeRollupService] = None
         self.aggregator = DataAggregatorService()
+        self.scheduler = MetricsRefreshScheduler()
 
     def init_repositories(self) -> None:
         if self.db:
@@ -51,6 +59,8 @@ class RecentPostSyncService:
         self.account_repo = InstagramAccountRepository(self.db)
         self.post_repo = InstagramPostRepository(self.db)
         self.post_metrics_repo = InstagramPostMetricsRepository(self.db)
+        self.freshness = create_freshness_ledger(self.db, "recent_sync")
+        self.media_type_rollup = create_media_type_rollup_service(self.db)
 
     async def get_account(self, account_id: str) -> Optional[Record]:
         assert self.account_repo is not None
@@ -66,17 +76,21 @@ class RecentPostSyncService:
         max_posts: int = 50,
         dry_run: bool = False,
         per_post_delay_seconds: float = 0.2,
+        ignore_schedule: bool = False,
     ) -> AccountRecentSyncResult:
         """
         指定アカウントの直近投稿・メトリクスを更新。
 
         - 投稿は window_days 以内のものだけ（取得は max_posts で上限）
         - メトリクスは投稿ごとに1日1レコード（instagram_post_metrics の create_or_update_daily）
+        - インサイト再取得は投稿ごとの next_refresh_at に達したものだけ（ignore_schedule で全件）
+        - 他ジョブが鮮度期間内に取得済みの投稿もスキップ（ignore_schedule で無視）
         """
         self.init_repositories()
         assert self.account_repo is not None
         assert self.post_repo is not None
         assert self.post_metrics_repo is not None
+        assert self.freshness is not None
 
         collected_at = datetime.now(timezone.utc)
         account = await self.get_account(account_id)
@@ -117,15 +131,47 @@ class RecentPostSyncService:
                 )
 
                 metrics_saved = 0
+                posts_skipped = 0
+                skipped_writes_before = self.post_metrics_repo.skipped_writes
+
+                # 既存投稿の再取得スケジュールと、再取得対象の前回メトリクスを一括取得
+                existing_by_ig_id: Dict[str, Record] = {}
+                previous_metrics: Dict[str, Record] = {}
+                fresh_insights: set = set()
+                refreshed_ids: list = []
+                if posts and not ignore_schedule:
+                    fresh_insights = await self.freshness.fresh_subjects(
+                        str(account.id), POST_INSIGHTS, [p.get("id") for p in posts], now=collected_at
+                    )
+                if posts:
+                    existing_posts = await self.post_repo.get_by_instagram_post_ids(
+                        [str(p["id"]) for p in posts if p.get("id")],
+                        columns="id,instagram_post_id,next_refresh_at",
+                    )
+                    existing_by_ig_id = {str(p.instagram_post_id): p for p in existing_posts}
+                    due_post_ids = [
+                        str(p.id)
+                        for p in existing_posts
+                        if ignore_schedule or self.scheduler.is_due(p.get("next_refresh_at"), collected_at)
+                    ]
+                    previous_metrics = await self.post_metrics_repo.get_latest_by_posts(due_post_ids)
 
                 for post_data in posts:
                     post_info = self.aggregator.extract_post_info(post_data, str(account.id))
-
-                    saved_post_id = None
-                    if not dry_run:
-                        saved_post = await self.post_repo.create_or_update(post_info)
-                        saved_post_id = str(saved_post.id)
-
+                    existing = existing_by_ig_id.get(str(post_data.get("id", "")))
+
+                    if str(post_data.get("id", "")) in fresh_insights or (
+                        existing
+                        and not ignore_schedule
+                        and not self.scheduler.is_due(existing.get("next_refresh_at"), collected_at)
+                    ):
+                        # インサイトは再取得せず、投稿情報（メディアURL等）のみ更新
+                        posts_skipped += 1
+                        if not dry_run:
+                            await self.post_repo.create_or_update(post_info)
+                        continue
+
+                    metrics = None
                     try:
                         raw_metrics = await api_client.get_post_insights(
                             post_id=post_data.get("id", ""),
@@ -133,22 +179,34 @@ class RecentPostSyncService:
                             media_type=post_data.get("media_type", "IMAGE"),
                         )
                         metrics = normalize_post_metrics_for_db(raw_metrics)
-
-                        if not dry_run and saved_post_id:
-                            metrics["post_id"] = saved_post_id
-                            metrics["recorded_at"] = collected_at
-                            await self.post_metrics_repo.create_or_update_daily(metrics)
-                            metrics_saved += 1
+                        refreshed_ids.append(post_data.get("id"))
+                        previous = previous_metrics.get(str(existing.id)) if existing else None
+                        post_info["next_refresh_at"] = self.scheduler.next_refresh_at(
+                            post_info.get("posted_at"), collected_at, previous, metrics
+                        )
                     except Exception as e:
                         logger.warning(
                             f"Failed to sync metrics for post {post_data.get('id', 'unknown')}: {e}"
                         )
 
+                    if not dry_run:
+                        saved_post = await self.post_repo.create_or_update(post_info)
+                        if metrics is not None and saved_post.get("id"):
+                            metrics["post_id"] = str(saved_post.id)
+                            metrics["recorded_at"] = collected_at
+                            skipped_before = self.post_metrics_repo.skipped_writes
+                            await self.post_metrics_repo.create_or_update_daily(metrics)
+                            if self.post_metrics_repo.skipped_writes == skipped_before:
+                                metrics_saved += 1
+
                     if per_post_delay_seconds > 0:
                         await asyncio.sleep(per_post_delay_seconds)
 
                 if not dry_run:
+                    await self.freshness.record(str(account.id), POST_INSIGHTS, refreshed_ids, collected_at)
                     await self.account_repo.update_last_sync(str(account.id), collected_at)
+                    if posts:
+                        await self.media_type_rollup.refresh([str(account.id)])
 
                 return AccountRecentSyncResult(
                     success=True,
@@ -157,6 +215,8 @@ class RecentPostSyncService:
                     collected_at=collected_at,
                     posts_processed=len(posts),
                     metrics_saved=metrics_saved,
+                    posts_skipped=posts_skipped,
+                    skipped_writes=self.post_metrics_repo.skipped_writes - skipped_writes_before,
                 )
 
         except InstagramAPIError as e:
@@ -0,0 +1,91 @@
+"""
+Metrics Refresh Scheduler
+投稿の経過時間と直近のメトリクス変化量から、次回インサイト再取得時刻を決定します。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Mapping, Optional, Sequence
+
+from ...utils.dates import parse_datetime
+
+
+@dataclass(frozen=True)
+class RefreshTier:
+    """投稿経過時間ごとの再取得間隔"""
+
+    max_age: Optional[timedelta]
+    interval: timedelta
+
+
+DEFAULT_REFRESH_TIERS: tuple[RefreshTier, ...] = (
+    RefreshTier(max_age=timedelta(hours=48), interval=timedelta(hours=1)),
+    RefreshTier(max_age=timedelta(days=7), interval=timedelta(days=1)),
+    RefreshTier(max_age=None, interval=timedelta(days=7)),
+)
+
+# 変化量判定に使うメトリクス（DBカラム名）
+_DELTA_METRICS = ("reach", "likes", "comments", "saved", "shares", "views")
+
+
+class MetricsRefreshScheduler:
+    """投稿インサイトの再取得スケジューラ
+
+    - 経過時間で基本間隔を決定（既定: 48時間未満=1時間 / 7日未満=1日 / それ以降=1週間）
+    - 前回から変化がほぼ無い投稿は間隔を backoff 倍に延長（max_interval まで）
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[RefreshTier] = DEFAULT_REFRESH_TIERS,
+        min_change_ratio: float = 0.01,
+        unchanged_backoff: float = 2.0,
+        max_interval: timedelta = timedelta(days=7),
+    ):
+        self.tiers = tuple(tiers)
+        self.min_change_ratio = min_change_ratio
+        self.unchanged_backoff = unchanged_backoff
+        self.max_interval = max_interval
+
+    def base_interval(self, post_age: timedelta) -> timedelta:
+        """投稿経過時間に対応する基本間隔"""
+        for tier in self.tiers:
+            if tier.max_age is None or post_age < tier.max_age:
+                return tier.interval
+        return self.tiers[-1].interval
+
+    def has_meaningful_change(
+        self,
+        previous: Optional[Mapping[str, Any]],
+        current: Optional[Mapping[str, Any]],
+    ) -> bool:
+        """前回メトリクスから有意な変化があるか（比較不能な場合は True）"""
+        if not previous or not current:
+            return True
+        before = sum(int(previous.get(key) or 0) for key in _DELTA_METRICS)
+        after = sum(int(current.get(key) or 0) for key in _DELTA_METRICS)
+        if before <= 0:
+            return after > 0
+        return abs(after - before) / before >= self.min_change_ratio
+
+    def next_refresh_at(
+        self,
+        posted_at: Any,
+        refreshed_at: datetime,
+        previous_metrics: Optional[Mapping[str, Any]] = None,
+        current_metrics: Optional[Mapping[str, Any]] = None,
+    ) -> datetime:
+        """次回再取得時刻を算出"""
+        posted_dt = parse_datetime(posted_at) or refreshed_at
+        interval = self.base_interval(max(timedelta(0), refreshed_at - posted_dt))
+        if previous_metrics and not self.has_meaningful_change(previous_metrics, current_metrics):
+            interval = min(interval * self.unchanged_backoff, max(interval, self.max_interval))
+        return refreshed_at + interval
+
+    @staticmethod
+    def is_due(next_refresh_at: Any, now: datetime) -> bool:
+        """再取得時刻に達しているか（未設定は常に対象）"""
+        next_dt = parse_datetime(next_refresh_at)
+        return next_dt is None or next_dt <= now
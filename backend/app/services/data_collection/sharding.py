@@ -0,0 +1,51 @@
+"""
+Account Sharding
+instagram_user_id の決定的ハッシュで収集対象アカウントをシャード分割します。
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Iterable, List
+
+
+@dataclass(frozen=True)
+class Shard:
+    """シャード指定（index は 0 始まり）"""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1:
+            raise ValueError(f"Shard count must be >= 1: {self.count}")
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"Shard index must be in [0, {self.count}): {self.index}")
+
+    def includes(self, instagram_user_id: str) -> bool:
+        """アカウントがこのシャードに属するか"""
+        return shard_index_for(instagram_user_id, self.count) == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def parse_shard(value: str) -> Shard:
+    """'i/N' 形式の文字列を Shard に変換（例: '0/4'）"""
+    try:
+        index_str, count_str = value.strip().split("/", 1)
+        return Shard(index=int(index_str), count=int(count_str))
+    except ValueError as e:
+        raise ValueError(f"Invalid shard '{value}'. Use 'i/N' (0 <= i < N): {e}") from e
+
+
+def shard_index_for(instagram_user_id: str, count: int) -> int:
+    """instagram_user_id のシャード番号（プロセス・実行環境に依存しない SHA-1 ベース）"""
+    digest = hashlib.sha1(str(instagram_user_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def filter_accounts_for_shard(accounts: Iterable[Any], shard: Shard) -> List[Any]:
+    """アカウント一覧からシャード担当分のみ抽出"""
+    return [account for account in accounts if shard.includes(account.instagram_user_id)]
@@ -0,0 +1,317 @@
+"""
+Collection Jobs
+日次収集・直近投稿同期のジョブ本体（API のインライン実行とワーカーの両方から利用）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Set
+
+from ...core.database import get_db_sync
+from ...core.records import Record
+from ...utils.dates import parse_datetime
+from ..data_collection.daily_collector_service import create_daily_collector
+from ..data_collection.media_url_refresher import create_media_url_refresher
+from ..data_collection.recent_post_sync_service import create_recent_post_sync_service
+from .handlers import JobConflictError, ProgressReporter, no_progress, register_handler
+from .job_queue import get_job_queue, queue_mode
+from .run_store import get_run_store
+
+logger = logging.getLogger(__name__)
+
+# ジョブ種別（RunStore のリース名と共通）
+DAILY_COLLECTION = "daily_collection"
+RECENT_POST_SYNC = "recent_post_sync"
+MEDIA_URL_REFRESH = "media_url_refresh"
+
+
+def account_run_name(account_id: str) -> str:
+    """アカウント単位の同時実行防止リース名"""
+    return f"account_refresh:{account_id}"
+
+
+def media_url_run_name(account_id: str) -> str:
+    """アカウント単位の URL 更新リース名"""
+    return f"media_url_refresh:{account_id}"
+
+
+async def run_daily_collection(
+    params: Dict[str, Any],
+    progress: ProgressReporter = no_progress,
+) -> Dict[str, Any]:
+    """日次データ収集を実行し、サマリーを返す"""
+    target_date = params.get("target_date")
+    if isinstance(target_date, str):
+        target_date = date.fromisoformat(target_date)
+
+    collector = create_daily_collector()
+    summary = await collector.collect_daily_data(
+        target_date=target_date,
+        account_filter=params.get("account_filter"),
+        dry_run=bool(params.get("dry_run", False)),
+    )
+
+    return {
+        "target_date": summary.target_date.isoformat(),
+        "total_accounts": summary.total_accounts,
+        "successful_accounts": summary.successful_accounts,
+        "failed_accounts": summary.failed_accounts,
+        "started_at": summary.started_at.isoformat(),
+        "completed_at": summary.completed_at.isoformat() if summary.completed_at else None,
+        "total_duration_seconds": summary.total_duration_seconds,
+    }
+
+
+async def run_recent_post_sync(
+    params: Dict[str, Any],
+    progress: ProgressReporter = no_progress,
+) -> Dict[str, Any]:
+    """全アクティブ（またはフィルタ指定）アカウントの直近投稿同期を実行し、サマリーを返す"""
+    window_days = params.get("window_days", 30)
+    max_posts = params.get("max_posts", 50)
+    dry_run = bool(params.get("dry_run", False))
+    force = bool(params.get("force", False))
+    per_post_delay_seconds = params.get("per_post_delay_seconds", 0.2)
+    ignore_schedule = bool(params.get("ignore_schedule", False))
+    per_account_delay_seconds = params.get("per_account_delay_seconds", 1.0)
+    account_filter = params.get("account_filter")
+
+    min_interval_seconds = int(os.getenv("SCHEDULED_REFRESH_MIN_INTERVAL_SECONDS", "0"))
+
+    store = get_run_store()
+    service = create_recent_post_sync_service()
+    service.init_repositories()
+    assert service.account_repo is not None
+
+    accounts = (
+        await service.account_repo.get_accounts_for_collection(account_filter)
+        if account_filter
+        else await service.account_repo.get_active_accounts()
+    )
+
+    total = len(accounts)
+    success = 0
+    failed = 0
+    skipped = 0
+    skipped_writes = 0
+    results: List[Dict[str, Any]] = []
+
+    now_utc = datetime.now(timezone.utc)
+
+    for index, account in enumerate(accounts, 1):
+        await progress({"processed_accounts": index - 1, "total_accounts": total})
+
+        instagram_user_id = account.get("instagram_user_id")
+        if not instagram_user_id:
+            failed += 1
+            results.append({"success": False, "error": "Missing instagram_user_id"})
+            continue
+
+        if not force and min_interval_seconds > 0:
+            last_synced_at = parse_datetime(account.get("last_synced_at"))
+            if last_synced_at:
+                elapsed = (now_utc - last_synced_at).total_seconds()
+                if elapsed < min_interval_seconds:
+                    skipped += 1
+                    results.append(
+                        {
+                            "instagram_user_id": str(instagram_user_id),
+                            "success": True,
+                            "skipped": True,
+                            "reason": f"Within min interval ({int(elapsed)}s < {min_interval_seconds}s)",
+                        }
+                    )
+                    continue
+
+        # 手動更新（他レプリカを含む）と衝突した場合はスキップ
+        lease = await store.acquire(account_run_name(str(instagram_user_id)))
+        if not lease:
+            skipped += 1
+            results.append(
+                {
+                    "instagram_user_id": str(instagram_user_id),
+                    "success": False,
+                    "skipped": True,
+                    "error": "Account refresh is already running",
+                }
+            )
+            continue
+
+        async with store.hold(lease):
+            result = await service.sync_recent_posts(
+                account_id=str(instagram_user_id),
+                window_days=window_days,
+                max_posts=max_posts,
+                dry_run=dry_run,
+                per_post_delay_seconds=per_post_delay_seconds,
+                ignore_schedule=ignore_schedule,
+            )
+
+        if result.success:
+            success += 1
+            skipped_writes += result.skipped_writes
+            results.append(
+                {
+                    "instagram_user_id": result.instagram_user_id,
+                    "success": True,
+                    "collected_at": result.collected_at.isoformat(),
+                    "posts_processed": result.posts_processed,
+                    "metrics_saved": result.metrics_saved,
+                    "posts_skipped": result.posts_skipped,
+                    "skipped_writes": result.skipped_writes,
+                }
+            )
+        else:
+            failed += 1
+            results.append(
+                {
+                    "instagram_user_id": result.instagram_user_id,
+                    "success": False,
+                    "error": result.error_message,
+                }
+            )
+
+        if per_account_delay_seconds > 0:
+            await asyncio.sleep(per_account_delay_seconds)
+
+    await progress({"processed_accounts": total, "total_accounts": total})
+
+    return {
+        "total_accounts": total,
+        "successful_accounts": success,
+        "failed_accounts": failed,
+        "skipped_accounts": skipped,
+        "skipped_writes": skipped_writes,
+        "window_days": window_days,
+        "max_posts": max_posts,
+        "dry_run": dry_run,
+        "per_post_delay_seconds": per_post_delay_seconds,
+        "ignore_schedule": ignore_schedule,
+        "per_account_delay_seconds": per_account_delay_seconds,
+        "min_interval_seconds": min_interval_seconds,
+        "results": results,
+    }
+
+
+async def run_media_url_refresh(
+    params: Dict[str, Any],
+    progress: ProgressReporter = no_progress,
+) -> Dict[str, Any]:
+    """期限の近いメディア URL を更新し、サマリーを返す
+
+    params:
+        account_id + instagram_post_ids: 指定投稿のみ（投稿インサイト取得時の依頼）
+        account_filter: instagram_user_id のリスト（未指定時は全アクティブ）
+        max_posts / horizon_minutes / dry_run
+    """
+    horizon_minutes = params.get("horizon_minutes")
+    refresher = create_media_url_refresher(
+        get_db_sync(),
+        horizon=timedelta(minutes=horizon_minutes) if horizon_minutes else None,
+    )
+    dry_run = bool(params.get("dry_run", False))
+
+    account_id = params.get("account_id")
+    if account_id:
+        account = await refresher.account_repo.get_by_id(account_id)
+        if not account:
+            raise ValueError(f"Account not found: {account_id}")
+        post_ids = params.get("instagram_post_ids")
+        if post_ids:
+            posts = await refresher.post_repo.get_by_instagram_post_ids(post_ids)
+            result = await refresher.refresh_posts(account, posts, dry_run=dry_run)
+        else:
+            result = await refresher.refresh_account(
+                account, max_posts=params.get("max_posts", 150), dry_run=dry_run
+            )
+    else:
+        result = await refresher.refresh_accounts(
+            account_filter=params.get("account_filter"),
+            max_posts=params.get("max_posts", 150),
+            dry_run=dry_run,
+        )
+
+    await progress({"accounts_processed": result.accounts_processed})
+    return result.to_dict()
+
+
+# 投稿インサイト取得時の URL 更新依頼（background: API プロセス内のタスク / queue: ジョブ登録 / off）
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def media_url_refresh_on_read_mode() -> str:
+    """MEDIA_URL_REFRESH_ON_READ: background（既定）/ queue / off"""
+    return os.getenv("MEDIA_URL_REFRESH_ON_READ", "background").lower()
+
+
+async def request_media_url_refresh(account: Record, instagram_post_ids: List[str]) -> bool:
+    """API のレスポンスを待たせずに URL 更新を依頼
+
+    依頼した場合、または同じアカウントの更新が既に待機中・実行中の場合は True
+    （呼び出し側は更新前の URL を含むレスポンスをキャッシュしない）。
+    """
+    mode = media_url_refresh_on_read_mode()
+    if mode == "off" or not instagram_post_ids:
+        return False
+
+    account_id = str(account["id"])
+    params = {"account_id": account_id, "instagram_post_ids": instagram_post_ids}
+    try:
+        if mode == "queue" and queue_mode() == "worker":
+            # 待機中・実行中ジョブの重複はアカウント単位（他アカウントの依頼は妨げない）
+            try:
+                await get_job_queue().enqueue(MEDIA_URL_REFRESH, params, dedupe_key=account_id)
+            except JobConflictError:
+                pass
+            return True
+
+        # 同一アカウントの更新が進行中（他レプリカを含む）なら新たには依頼しない
+        store = get_run_store()
+        lease = await store.acquire(media_url_run_name(account_id))
+        if not lease:
+            return True
+    except Exception as e:
+        logger.warning(f"Failed to request media URL refresh for account {account.get('id')}: {e}")
+        return False
+
+    async def run() -> None:
+        try:
+            async with store.hold(lease):
+                await run_media_url_refresh(params)
+        except Exception as e:
+            logger.warning(f"Background media URL refresh failed for account {account.get('id')}: {e}")
+
+    task = asyncio.create_task(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return True
+
+
+async def _run_with_lease(name: str, run, params: Dict[str, Any], progress: ProgressReporter) -> Dict[str, Any]:
+    """RunStore のリースを保持して実行（インライン実行や他ワーカーとの重複防止）"""
+    store = get_run_store()
+    lease = await store.acquire(name)
+    if not lease:
+        raise JobConflictError(f"{name} is already running")
+    async with store.hold(lease):
+        return await run(params, progress)
+
+
+@register_handler(DAILY_COLLECTION)
+async def handle_daily_collection(params: Dict[str, Any], progress: ProgressReporter) -> Dict[str, Any]:
+    return await _run_with_lease(DAILY_COLLECTION, run_daily_collection, params, progress)
+
+
+@register_handler(RECENT_POST_SYNC)
+async def handle_recent_post_sync(params: Dict[str, Any], progress: ProgressReporter) -> Dict[str, Any]:
+    return await _run_with_lease(RECENT_POST_SYNC, run_recent_post_sync, params, progress)
+
+
+@register_handler(MEDIA_URL_REFRESH)
+async def handle_media_url_refresh(params: Dict[str, Any], progress: ProgressReporter) -> Dict[str, Any]:
+    name = media_url_run_name(params["account_id"]) if params.get("account_id") else MEDIA_URL_REFRESH
+    return await _run_with_lease(name, run_media_url_refresh, params, progress)
@@ -0,0 +1,43 @@
+"""
+Job Handlers
+ジョブ種別ごとのハンドラ登録（ワーカーが job_type から処理を解決する）
+"""
+
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 進捗報告: ハンドラが任意の dict を渡すとワーカーがジョブに保存する
+ProgressReporter = Callable[[Dict[str, Any]], Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressReporter], Awaitable[Dict[str, Any]]]
+
+_HANDLERS: Dict[str, JobHandler] = {}
+
+
+class JobConflictError(Exception):
+    """同種ジョブが他で実行中のため開始できない"""
+
+
+def register_handler(job_type: str):
+    """ジョブハンドラ登録デコレータ"""
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        _HANDLERS[job_type] = handler
+        return handler
+
+    return decorator
+
+
+def get_handler(job_type: str) -> Optional[JobHandler]:
+    """ジョブ種別のハンドラを取得"""
+    return _HANDLERS.get(job_type)
+
+
+def registered_job_types() -> List[str]:
+    """登録済みジョブ種別"""
+    return sorted(_HANDLERS)
+
+
+async def no_progress(_: Dict[str, Any]) -> None:
+    """進捗報告を使わない呼び出し元向け"""
+    return None
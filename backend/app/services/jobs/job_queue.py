@@ -0,0 +1,437 @@
+"""
+Job Queue
+収集ジョブの永続キュー。API がジョブを登録し、別プロセスのワーカーが取得・実行する。
+
+- supabase: collection_jobs テーブル（claim_collection_job RPC で SKIP LOCKED 取得）
+- sqlite: 同一ホスト内のローカル検証用
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from ...core.database import get_db_sync
+from ...repositories.collection_job_repository import CollectionJobRepository
+from ...utils.dates import parse_datetime
+from .handlers import JobConflictError
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# 失敗時の再試行待機（秒）
+RETRY_DELAY_SECONDS = 60
+
+
+@dataclass
+class Job:
+    """キュー上のジョブ"""
+
+    id: str
+    job_type: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = 1
+    locked_by: Optional[str] = None
+    locked_until: Optional[datetime] = None
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "Job":
+        def _json(value):
+            return json.loads(value) if isinstance(value, str) else value
+
+        return cls(
+            id=str(row["id"]),
+            job_type=row["job_type"],
+            payload=_json(row.get("payload")) or {},
+            status=row.get("status") or QUEUED,
+            attempts=row.get("attempts") or 0,
+            max_attempts=row.get("max_attempts") or 1,
+            locked_by=row.get("locked_by"),
+            locked_until=parse_datetime(row.get("locked_until")),
+            progress=_json(row.get("progress")),
+            result=_json(row.get("result")),
+            error=row.get("error"),
+            created_at=parse_datetime(row.get("created_at")),
+            started_at=parse_datetime(row.get("started_at")),
+            completed_at=parse_datetime(row.get("completed_at")),
+        )
+
+    @property
+    def is_active(self) -> bool:
+        """待機中、またはリース有効な実行中"""
+        if self.status == QUEUED:
+            return True
+        return (
+            self.status == RUNNING
+            and self.locked_until is not None
+            and self.locked_until > datetime.now(timezone.utc)
+        )
+
+    def to_status(self) -> Dict[str, Any]:
+        """ステータスAPI向けの表現（インライン実行時と同じキー + ジョブ情報）"""
+        return {
+            "running": self.is_active,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "last_error": self.error,
+            "last_summary": self.result,
+            "job_id": self.id,
+            "job_type": self.job_type,
+            "job_status": self.status,
+            "attempts": self.attempts,
+            "progress": self.progress,
+            "queued_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class JobQueue(ABC):
+    """ジョブキューの基底クラス
+
+    同種（job_type, dedupe_key）の待機中・実行中ジョブは1件までで、確認と登録は各バックエンドで
+    不可分に行う（既にあれば enqueue が JobConflictError）。
+    """
+
+    async def enqueue(
+        self, job_type: str, payload: Dict[str, Any], max_attempts: int = 1, dedupe_key: str = ""
+    ) -> Job:
+        """ジョブ登録（同種の待機中・実行中ジョブがあれば JobConflictError）"""
+        job = await self._enqueue(job_type, payload, max_attempts, dedupe_key)
+        if job is None:
+            suffix = f" ({dedupe_key})" if dedupe_key else ""
+            raise JobConflictError(f"{job_type}{suffix} is already queued or running")
+        return job
+
+    @abstractmethod
+    async def _enqueue(
+        self, job_type: str, payload: Dict[str, Any], max_attempts: int, dedupe_key: str
+    ) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def claim(self, worker_id: str, lease_seconds: int, job_types: Optional[List[str]] = None) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def heartbeat(
+        self, job: Job, worker_id: str, lease_seconds: int, progress: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        ...
+
+    @abstractmethod
+    async def _finish(self, job: Job, worker_id: str, changes: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    async def latest(self, job_type: str, statuses: Optional[List[str]] = None) -> Optional[Job]:
+        ...
+
+    async def complete(self, job: Job, worker_id: str, result: Dict[str, Any]) -> None:
+        """成功として終了"""
+        await self._finish(
+            job,
+            worker_id,
+            {"status": SUCCEEDED, "result": result, "error": None, "completed_at": datetime.now(timezone.utc)},
+        )
+
+    async def fail(self, job: Job, worker_id: str, error: str) -> None:
+        """失敗として終了（試行回数が残っていれば再キュー）"""
+        now = datetime.now(timezone.utc)
+        if job.attempts < job.max_attempts:
+            changes = {"status": QUEUED, "error": error, "run_after": now + timedelta(seconds=RETRY_DELAY_SECONDS)}
+        else:
+            changes = {"status": FAILED, "error": error, "completed_at": now}
+        await self._finish(job, worker_id, changes)
+
+    async def active(self, job_type: str) -> Optional[Job]:
+        """待機中または実行中の同種ジョブ"""
+        job = await self.latest(job_type, statuses=[QUEUED, RUNNING])
+        return job if job and job.is_active else None
+
+
+class SupabaseJobQueue(JobQueue):
+    """collection_jobs テーブルによるキュー"""
+
+    def __init__(self, repo: CollectionJobRepository):
+        self.repo = repo
+
+    async def _enqueue(
+        self, job_type: str, payload: Dict[str, Any], max_attempts: int, dedupe_key: str
+    ) -> Optional[Job]:
+        row = await self.repo.enqueue(job_type, payload, max_attempts, dedupe_key)
+        return Job.from_row(row) if row else None
+
+    async def claim(self, worker_id: str, lease_seconds: int, job_types: Optional[List[str]] = None) -> Optional[Job]:
+        row = await self.repo.claim(worker_id, lease_seconds, job_types)
+        return Job.from_row(row) if row else None
+
+    async def heartbeat(
+        self, job: Job, worker_id: str, lease_seconds: int, progress: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        return await self.repo.heartbeat(job.id, worker_id, lease_seconds, progress)
+
+    async def _finish(self, job: Job, worker_id: str, changes: Dict[str, Any]) -> None:
+        await self.repo.finish(job.id, worker_id, changes)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        row = await self.repo.get_by_id(job_id)
+        return Job.from_row(row) if row else None
+
+    async def latest(self, job_type: str, statuses: Optional[List[str]] = None) -> Optional[Job]:
+        row = await self.repo.get_latest(job_type, statuses)
+        return Job.from_row(row) if row else None
+
+
+class SqliteJobQueue(JobQueue):
+    """SQLite ファイルによるキュー（同一ホスト内のローカル検証用）"""
+
+    _COLUMNS = (
+        "id", "job_type", "payload", "status", "attempts", "max_attempts", "run_after", "locked_by",
+        "locked_until", "progress", "result", "error", "created_at", "started_at", "completed_at",
+    )
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collection_jobs (
+                    id TEXT PRIMARY KEY,
+                    job_type TEXT NOT NULL,
+                    payload TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 1,
+                    run_after REAL NOT NULL,
+                    locked_by TEXT,
+                    locked_until REAL,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    completed_at REAL,
+                    dedupe_key TEXT NOT NULL DEFAULT ''
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(collection_jobs)")}
+            if "dedupe_key" not in columns:
+                conn.execute("ALTER TABLE collection_jobs ADD COLUMN dedupe_key TEXT NOT NULL DEFAULT ''")
+            conn.execute(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_collection_jobs_active
+                ON collection_jobs(job_type, dedupe_key) WHERE status IN ('queued', 'running')
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    @staticmethod
+    def _ts(value: Optional[float]) -> Optional[str]:
+        return datetime.fromtimestamp(value, tz=timezone.utc).isoformat() if value else None
+
+    def _to_job(self, row: Optional[tuple]) -> Optional[Job]:
+        if not row:
+            return None
+        data = dict(zip(self._COLUMNS, row))
+        for key in ("locked_until", "created_at", "started_at", "completed_at"):
+            data[key] = self._ts(data[key])
+        return Job.from_row(data)
+
+    def _select(self, conn: sqlite3.Connection, where: str, params: tuple) -> Optional[tuple]:
+        return conn.execute(
+            f"SELECT {', '.join(self._COLUMNS)} FROM collection_jobs WHERE {where}", params
+        ).fetchone()
+
+    @staticmethod
+    def _fail_expired(conn: sqlite3.Connection, now: float) -> None:
+        """リース切れで試行回数の残らない running ジョブを失敗として終了"""
+        conn.execute(
+            """
+            UPDATE collection_jobs
+            SET status = 'failed', error = COALESCE(error, 'Worker lease expired'), completed_at = ?,
+                locked_by = NULL, locked_until = NULL
+            WHERE status = 'running' AND locked_until < ? AND attempts >= max_attempts
+            """,
+            (now, now),
+        )
+
+    def _enqueue_sync(self, job_type: str, payload_json: str, max_attempts: int, dedupe_key: str) -> Optional[tuple]:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with closing(self._connect()) as conn:
+            self._fail_expired(conn, now)
+            cur = conn.execute(
+                """
+                INSERT INTO collection_jobs (id, job_type, payload, max_attempts, run_after, created_at, dedupe_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job_type, dedupe_key) WHERE status IN ('queued', 'running') DO NOTHING
+                """,
+                (job_id, job_type, payload_json, max_attempts, now, now, dedupe_key),
+            )
+            if cur.rowcount != 1:
+                return None
+            return self._select(conn, "id = ?", (job_id,))
+
+    def _claim_sync(self, worker_id: str, lease_seconds: int, job_types: Optional[List[str]]) -> Optional[tuple]:
+        now = time.time()
+        type_filter = ""
+        params: List[Any] = [now, now]
+        if job_types:
+            type_filter = f" AND job_type IN ({', '.join('?' for _ in job_types)})"
+            params.extend(job_types)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._fail_expired(conn, now)
+                row = conn.execute(
+                    f"""
+                    SELECT id FROM collection_jobs
+                    WHERE ((status = 'queued' AND run_after <= ?)
+                        OR (status = 'running' AND locked_until < ? AND attempts < max_attempts)){type_filter}
+                    ORDER BY run_after, created_at
+                    LIMIT 1
+                    """,
+                    params,
+                ).fetchone()
+                if not row:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    """
+                    UPDATE collection_jobs
+                    SET status = 'running', locked_by = ?, locked_until = ?, attempts = attempts + 1,
+                        started_at = COALESCE(started_at, ?)
+                    WHERE id = ?
+                    """,
+                    (worker_id, now + lease_seconds, now, row[0]),
+                )
+                claimed = self._select(conn, "id = ?", (row[0],))
+                conn.execute("COMMIT")
+                return claimed
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _heartbeat_sync(self, job_id: str, worker_id: str, lease_seconds: int, progress_json: Optional[str]) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                """
+                UPDATE collection_jobs SET locked_until = ?, progress = COALESCE(?, progress)
+                WHERE id = ? AND locked_by = ? AND status = 'running'
+                """,
+                (time.time() + lease_seconds, progress_json, job_id, worker_id),
+            )
+            return cur.rowcount == 1
+
+    def _finish_sync(self, job_id: str, worker_id: str, changes: Dict[str, Any]) -> None:
+        values = {"locked_by": None, "locked_until": None}
+        for key, value in changes.items():
+            if isinstance(value, datetime):
+                value = value.timestamp()
+            elif isinstance(value, dict):
+                value = json.dumps(value, default=str)
+            values[key] = value
+        assignments = ", ".join(f"{key} = ?" for key in values)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"UPDATE collection_jobs SET {assignments} WHERE id = ? AND locked_by = ?",
+                (*values.values(), job_id, worker_id),
+            )
+
+    def _get_sync(self, job_id: str) -> Optional[tuple]:
+        with closing(self._connect()) as conn:
+            return self._select(conn, "id = ?", (job_id,))
+
+    def _latest_sync(self, job_type: str, statuses: Optional[List[str]]) -> Optional[tuple]:
+        where = "job_type = ?"
+        params: List[Any] = [job_type]
+        if statuses:
+            where += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        with closing(self._connect()) as conn:
+            return self._select(conn, f"{where} ORDER BY created_at DESC LIMIT 1", tuple(params))
+
+    async def _enqueue(
+        self, job_type: str, payload: Dict[str, Any], max_attempts: int, dedupe_key: str
+    ) -> Optional[Job]:
+        row = await asyncio.to_thread(
+            self._enqueue_sync, job_type, json.dumps(payload, default=str), max_attempts, dedupe_key
+        )
+        return self._to_job(row)
+
+    async def claim(self, worker_id: str, lease_seconds: int, job_types: Optional[List[str]] = None) -> Optional[Job]:
+        return self._to_job(await asyncio.to_thread(self._claim_sync, worker_id, lease_seconds, job_types))
+
+    async def heartbeat(
+        self, job: Job, worker_id: str, lease_seconds: int, progress: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        progress_json = json.dumps(progress, default=str) if progress is not None else None
+        return await asyncio.to_thread(self._heartbeat_sync, job.id, worker_id, lease_seconds, progress_json)
+
+    async def _finish(self, job: Job, worker_id: str, changes: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._finish_sync, job.id, worker_id, changes)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._to_job(await asyncio.to_thread(self._get_sync, job_id))
+
+    async def latest(self, job_type: str, statuses: Optional[List[str]] = None) -> Optional[Job]:
+        return self._to_job(await asyncio.to_thread(self._latest_sync, job_type, statuses))
+
+
+def queue_mode() -> str:
+    """COLLECTION_QUEUE_MODE（inline: API プロセス内で実行 / worker: キュー登録のみ）"""
+    return os.getenv("COLLECTION_QUEUE_MODE", "inline").lower()
+
+
+def create_job_queue(backend: Optional[str] = None) -> JobQueue:
+    """COLLECTION_QUEUE_BACKEND（supabase / sqlite）に応じた JobQueue を作成"""
+    backend = (backend or os.getenv("COLLECTION_QUEUE_BACKEND", "supabase")).lower()
+    if backend == "supabase":
+        return SupabaseJobQueue(CollectionJobRepository(get_db_sync()))
+    if backend == "sqlite":
+        path = os.getenv("COLLECTION_QUEUE_SQLITE_PATH", os.path.join("data", "collection_jobs.sqlite3"))
+        return SqliteJobQueue(path)
+    raise ValueError(f"Unknown COLLECTION_QUEUE_BACKEND: {backend}")
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """プロセス共有の JobQueue を取得（初回に環境変数から作成）"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = create_job_queue()
+        logger.info(f"Collection job queue: {type(_job_queue).__name__}")
+    return _job_queue
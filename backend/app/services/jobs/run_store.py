@@ -0,0 +1,392 @@
+"""
+Run Store
+収集ジョブの実行ロック（リース + ハートビート）とステータスの保存先。
+
+- memory: 同一プロセス内のみ（既定、単一インスタンス向け）
+- sqlite: 同一ホストの複数プロセス間で共有（ローカル検証用）
+- supabase: collection_runs テーブル経由で全レプリカ間で共有
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import asynccontextmanager, closing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+from ...core.database import get_db_sync
+from ...repositories.collection_run_repository import CollectionRunRepository
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_TTL_SECONDS = int(os.getenv("COLLECTION_LEASE_TTL_SECONDS", "120"))
+# memory バックエンドで保持するリース数の上限（アカウント単位のリースが際限なく増えないように）
+DEFAULT_MAX_LEASES = int(os.getenv("COLLECTION_RUN_STORE_MAX_LEASES", "10000"))
+
+# 読み取り専用（コピーして使う）
+EMPTY_STATUS: Mapping[str, Any] = MappingProxyType(
+    {
+        "running": False,
+        "started_at": None,
+        "completed_at": None,
+        "last_error": None,
+        "last_summary": None,
+    }
+)
+
+
+@dataclass(frozen=True)
+class Lease:
+    """獲得済みリース"""
+
+    name: str
+    owner: str
+    ttl_seconds: int
+
+
+class LeaseLostError(RuntimeError):
+    """保持中のリースを失ったため処理を中断した（他で同じ処理が始まっている可能性がある）"""
+
+
+def _new_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class RunStore(ABC):
+    """実行ロック・ステータス保存先の基底クラス
+
+    acquire / renew / release は件数をメトリクスとして数え、各バックエンドの
+    _acquire / _renew / _release に委譲する。
+    """
+
+    def __init__(self):
+        self._counters: Counter = Counter()
+
+    async def acquire(self, name: str, ttl_seconds: int = DEFAULT_LEASE_TTL_SECONDS) -> Optional[Lease]:
+        """リース獲得（他で保持中なら None）"""
+        lease = Lease(name=name, owner=_new_owner(), ttl_seconds=ttl_seconds)
+        acquired = await self._acquire(lease)
+        self._counters["acquired" if acquired else "contended"] += 1
+        return lease if acquired else None
+
+    async def renew(self, lease: Lease) -> bool:
+        """リース延長（失効・奪取されていれば False）"""
+        renewed = await self._renew(lease)
+        self._counters["renewed" if renewed else "renew_failed"] += 1
+        return renewed
+
+    async def release(self, lease: Lease) -> None:
+        """リース解放"""
+        await self._release(lease)
+        self._counters["released"] += 1
+
+    @abstractmethod
+    async def _acquire(self, lease: Lease) -> bool:
+        ...
+
+    @abstractmethod
+    async def _renew(self, lease: Lease) -> bool:
+        ...
+
+    @abstractmethod
+    async def _release(self, lease: Lease) -> None:
+        ...
+
+    def metrics(self) -> Dict[str, Any]:
+        """このプロセスでのリース操作の件数"""
+        return {"backend": type(self).__name__, **self._counters}
+
+    @abstractmethod
+    async def is_locked(self, name: str) -> bool:
+        """有効なリースが存在するか"""
+
+    @abstractmethod
+    async def get_status(self, name: str) -> Dict[str, Any]:
+        """直近の実行ステータス"""
+
+    @abstractmethod
+    async def set_status(self, name: str, status: Dict[str, Any]) -> None:
+        """実行ステータスの保存"""
+
+    @asynccontextmanager
+    async def hold(self, lease: Lease, heartbeat_interval: Optional[float] = None):
+        """リースを保持したまま処理を実行（ハートビートで延長し、終了時に解放）
+
+        延長に失敗した（失効して他に獲得された）場合は、他で始まった処理と重複しないよう
+        保持しているタスクをキャンセルし、LeaseLostError を送出する。
+        """
+        interval = heartbeat_interval or max(1.0, lease.ttl_seconds / 3)
+        guarded = asyncio.current_task()
+        lost = False
+
+        async def heartbeat():
+            nonlocal lost
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    renewed = await self.renew(lease)
+                except Exception as e:
+                    # 一時的な障害は次回で再試行（その間に失効すれば次回の延長が False になる）
+                    logger.warning(f"Lease heartbeat failed for {lease.name}: {e}")
+                    continue
+                if not renewed:
+                    logger.error(f"Lease lost for {lease.name} (owner {lease.owner}); cancelling guarded work")
+                    lost = True
+                    if guarded:
+                        guarded.cancel()
+                    return
+
+        task = asyncio.create_task(heartbeat())
+        try:
+            yield lease
+        except asyncio.CancelledError:
+            if not lost:
+                raise
+            if guarded and hasattr(guarded, "uncancel"):
+                guarded.uncancel()
+            raise LeaseLostError(f"Lease lost for {lease.name}") from None
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            try:
+                await self.release(lease)
+            except Exception as e:
+                logger.warning(f"Failed to release lease for {lease.name}: {e}")
+
+
+class MemoryRunStore(RunStore):
+    """同一プロセス内のリース・ステータス
+
+    - リースは期限切れのものを定期的に掃除し、件数は max_leases で上限を設ける
+    - ステータスは読み取り専用のスナップショットを丸ごと差し替える（読み取り側はロック不要）
+    """
+
+    def __init__(self, max_leases: int = DEFAULT_MAX_LEASES):
+        super().__init__()
+        self.max_leases = max_leases
+        self._leases: Dict[str, tuple[str, float]] = {}
+        self._statuses: Dict[str, Mapping[str, Any]] = {}
+        self._next_purge_at = 0.0
+
+    def _active_owner(self, name: str) -> Optional[str]:
+        held = self._leases.get(name)
+        if held and held[1] > time.monotonic():
+            return held[0]
+        return None
+
+    def _purge_expired(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now < self._next_purge_at:
+            return
+        expired = [name for name, (_, expires_at) in self._leases.items() if expires_at <= now]
+        for name in expired:
+            del self._leases[name]
+        self._counters["expired_purged"] += len(expired)
+        self._next_purge_at = now + DEFAULT_LEASE_TTL_SECONDS
+
+    async def _acquire(self, lease: Lease) -> bool:
+        self._purge_expired()
+        if self._active_owner(lease.name):
+            return False
+        if lease.name not in self._leases and len(self._leases) >= self.max_leases:
+            self._purge_expired(force=True)
+            if len(self._leases) >= self.max_leases:
+                logger.warning(f"Run store lease limit reached ({self.max_leases}); rejecting {lease.name}")
+                self._counters["rejected_full"] += 1
+                return False
+        self._leases[lease.name] = (lease.owner, time.monotonic() + lease.ttl_seconds)
+        return True
+
+    async def _renew(self, lease: Lease) -> bool:
+        if self._active_owner(lease.name) != lease.owner:
+            return False
+        self._leases[lease.name] = (lease.owner, time.monotonic() + lease.ttl_seconds)
+        return True
+
+    async def _release(self, lease: Lease) -> None:
+        held = self._leases.get(lease.name)
+        if held and held[0] == lease.owner:
+            del self._leases[lease.name]
+
+    async def is_locked(self, name: str) -> bool:
+        return self._active_owner(name) is not None
+
+    async def get_status(self, name: str) -> Dict[str, Any]:
+        return {**EMPTY_STATUS, **self._statuses.get(name, {})}
+
+    async def set_status(self, name: str, status: Dict[str, Any]) -> None:
+        self._statuses[name] = MappingProxyType(dict(status))
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        active = sum(1 for _, expires_at in self._leases.values() if expires_at > now)
+        return {
+            **super().metrics(),
+            "leases_tracked": len(self._leases),
+            "leases_active": active,
+            "max_leases": self.max_leases,
+            "statuses_tracked": len(self._statuses),
+        }
+
+
+class SqliteRunStore(RunStore):
+    """SQLite ファイルによるリース・ステータス（同一ホストの複数プロセス間で共有）"""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collection_runs (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT,
+                    lease_expires_at REAL,
+                    status TEXT NOT NULL DEFAULT '{}'
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _acquire_sync(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO collection_runs (name, owner, lease_expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, lease_expires_at = excluded.lease_expires_at
+                WHERE collection_runs.owner IS NULL OR collection_runs.lease_expires_at < ?
+                """,
+                (name, owner, now + ttl_seconds, now),
+            )
+            return cur.rowcount == 1
+
+    def _renew_sync(self, name: str, owner: str, ttl_seconds: int) -> bool:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                "UPDATE collection_runs SET lease_expires_at = ? WHERE name = ? AND owner = ?",
+                (time.time() + ttl_seconds, name, owner),
+            )
+            return cur.rowcount == 1
+
+    def _release_sync(self, name: str, owner: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE collection_runs SET owner = NULL, lease_expires_at = NULL WHERE name = ? AND owner = ?",
+                (name, owner),
+            )
+
+    def _get_sync(self, name: str) -> Optional[tuple]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT owner, lease_expires_at, status FROM collection_runs WHERE name = ?",
+                (name,),
+            ).fetchone()
+
+    def _set_status_sync(self, name: str, status_json: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                INSERT INTO collection_runs (name, status) VALUES (?, ?)
+                ON CONFLICT(name) DO UPDATE SET status = excluded.status
+                """,
+                (name, status_json),
+            )
+
+    async def _acquire(self, lease: Lease) -> bool:
+        return await asyncio.to_thread(self._acquire_sync, lease.name, lease.owner, lease.ttl_seconds)
+
+    async def _renew(self, lease: Lease) -> bool:
+        return await asyncio.to_thread(self._renew_sync, lease.name, lease.owner, lease.ttl_seconds)
+
+    async def _release(self, lease: Lease) -> None:
+        await asyncio.to_thread(self._release_sync, lease.name, lease.owner)
+
+    async def is_locked(self, name: str) -> bool:
+        row = await asyncio.to_thread(self._get_sync, name)
+        return bool(row and row[0] and row[1] and row[1] > time.time())
+
+    async def get_status(self, name: str) -> Dict[str, Any]:
+        row = await asyncio.to_thread(self._get_sync, name)
+        if not row or not row[2]:
+            return dict(EMPTY_STATUS)
+        return {**EMPTY_STATUS, **json.loads(row[2])}
+
+    async def set_status(self, name: str, status: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set_status_sync, name, json.dumps(status, default=str))
+
+
+class SupabaseRunStore(RunStore):
+    """collection_runs テーブルによるリース・ステータス（全レプリカ間で共有）"""
+
+    def __init__(self, repo: CollectionRunRepository):
+        super().__init__()
+        self.repo = repo
+
+    async def _acquire(self, lease: Lease) -> bool:
+        row = await self.repo.acquire(lease.name, lease.owner, lease.ttl_seconds)
+        return bool(row)
+
+    async def _renew(self, lease: Lease) -> bool:
+        return await self.repo.renew(lease.name, lease.owner, lease.ttl_seconds)
+
+    async def _release(self, lease: Lease) -> None:
+        await self.repo.release(lease.name, lease.owner)
+
+    async def is_locked(self, name: str) -> bool:
+        row = await self.repo.get(name)
+        if not row or not row.get("owner") or not row.get("lease_expires_at"):
+            return False
+        expires_at = datetime.fromisoformat(str(row.lease_expires_at).replace("Z", "+00:00"))
+        return expires_at > datetime.now(timezone.utc)
+
+    async def get_status(self, name: str) -> Dict[str, Any]:
+        row = await self.repo.get(name)
+        return {**EMPTY_STATUS, **((row.get("status") if row else None) or {})}
+
+    async def set_status(self, name: str, status: Dict[str, Any]) -> None:
+        await self.repo.set_status(name, status)
+
+
+def create_run_store(backend: Optional[str] = None) -> RunStore:
+    """COLLECTION_RUN_STORE（memory / sqlite / supabase）に応じた RunStore を作成"""
+    backend = (backend or os.getenv("COLLECTION_RUN_STORE", "memory")).lower()
+    if backend == "memory":
+        return MemoryRunStore()
+    if backend == "sqlite":
+        path = os.getenv("COLLECTION_RUN_STORE_SQLITE_PATH", os.path.join("data", "collection_runs.sqlite3"))
+        return SqliteRunStore(path)
+    if backend == "supabase":
+        return SupabaseRunStore(CollectionRunRepository(get_db_sync()))
+    raise ValueError(f"Unknown COLLECTION_RUN_STORE: {backend}")
+
+
+_run_store: Optional[RunStore] = None
+
+
+def get_run_store() -> RunStore:
+    """プロセス共有の RunStore を取得（初回に環境変数から作成）"""
+    global _run_store
+    if _run_store is None:
+        _run_store = create_run_store()
+        logger.info(f"Collection run store: {type(_run_store).__name__}")
+    return _run_store
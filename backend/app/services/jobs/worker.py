@@ -0,0 +1,125 @@
+"""
+Collection Worker
+ジョブキューからジョブを取得して実行するワーカー（API プロセスとは別に起動）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Any, Dict, List, Optional
+
+from . import collection_jobs  # noqa: F401  ハンドラ登録のため
+from .handlers import JobConflictError, get_handler
+from .job_queue import Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_LEASE_SECONDS = int(os.getenv("COLLECTION_JOB_LEASE_SECONDS", "120"))
+
+
+class CollectionWorker:
+    """収集ジョブワーカー
+
+    - concurrency 個のスロットがそれぞれキューをポーリングしてジョブを取得
+    - 実行中はジョブのリースをハートビートで延長し、進捗を保存
+    - 終了時に結果（成功 / 失敗・再キュー）を保存
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        concurrency: int = 1,
+        poll_interval: float = 5.0,
+        lease_seconds: int = DEFAULT_JOB_LEASE_SECONDS,
+        job_types: Optional[List[str]] = None,
+    ):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.job_types = job_types
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.processed = 0
+
+    async def run(self, stop_event: Optional[asyncio.Event] = None, once: bool = False) -> int:
+        """ワーカーを起動（once=True ならキューが空になった時点で終了）"""
+        stop_event = stop_event or asyncio.Event()
+        logger.info(
+            f"Collection worker {self.worker_id} started "
+            f"(concurrency={self.concurrency}, job_types={self.job_types or 'all'})"
+        )
+        await asyncio.gather(*(self._slot(stop_event, once) for _ in range(self.concurrency)))
+        logger.info(f"Collection worker {self.worker_id} stopped ({self.processed} jobs processed)")
+        return self.processed
+
+    async def _slot(self, stop_event: asyncio.Event, once: bool) -> None:
+        while not stop_event.is_set():
+            try:
+                job = await self.queue.claim(self.worker_id, self.lease_seconds, self.job_types)
+            except Exception as e:
+                logger.error(f"Failed to claim job: {e}")
+                job = None
+
+            if job:
+                await self.run_job(job)
+                continue
+            if once:
+                return
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_job(self, job: Job) -> None:
+        """1ジョブを実行して結果を保存"""
+        handler = get_handler(job.job_type)
+        if handler is None:
+            await self.queue.fail(job, self.worker_id, f"Unknown job type: {job.job_type}")
+            return
+
+        logger.info(f"Running job {job.id} ({job.job_type}, attempt {job.attempts}/{job.max_attempts})")
+        latest_progress: Dict[str, Any] = {}
+
+        async def progress(update: Dict[str, Any]) -> None:
+            latest_progress.clear()
+            latest_progress.update(update)
+
+        async def heartbeat() -> None:
+            while True:
+                await asyncio.sleep(max(1.0, self.lease_seconds / 3))
+                try:
+                    if not await self.queue.heartbeat(job, self.worker_id, self.lease_seconds, dict(latest_progress)):
+                        logger.warning(f"Lost lease for job {job.id}")
+                except Exception as e:
+                    logger.warning(f"Job heartbeat failed for {job.id}: {e}")
+
+        task = asyncio.create_task(heartbeat())
+        try:
+            result = await handler(job.payload, progress)
+            error = None
+        except JobConflictError as e:
+            # 同種の実行が他で進行中: 再試行せず失敗として記録
+            job.attempts = job.max_attempts
+            result, error = None, str(e)
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            result, error = None, str(e)
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self.processed += 1
+
+        try:
+            if error is None:
+                await self.queue.complete(job, self.worker_id, result)
+            else:
+                await self.queue.fail(job, self.worker_id, error)
+        except Exception as e:
+            logger.error(f"Failed to save result for job {job.id}: {e}")
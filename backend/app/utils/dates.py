@@ -0,0 +1,25 @@
+"""
+日時ユーティリティ
+Supabase の戻り値（ISO 文字列 / datetime / None）を timezone 付き datetime に正規化します。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """ISO 文字列（末尾 Z 可）または datetime を UTC 既定の aware datetime に変換（解釈できない値は None）"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
@@ -0,0 +1,45 @@
+"""
+Instagram CDN メディア URL の期限
+media_url / thumbnail_url の `oe` パラメータ（hex の epoch 秒）から期限を求め、
+instagram_posts.media_url_expires_at として書き込み時に保存します。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# URL が無い投稿は期限切れ扱い（期限の近い投稿の検索で常に対象になる）
+MISSING_URL_EXPIRY = datetime.fromtimestamp(0, tz=timezone.utc)
+
+_URL_COLUMNS = ("media_url", "thumbnail_url")
+
+
+def extract_instagram_cdn_expiry(url: Optional[str]) -> Optional[datetime]:
+    """Instagram CDN URL の `oe`（hex の epoch 秒、例: 6975142D）から期限を取得"""
+    if not url:
+        return None
+    try:
+        qs = parse_qs(urlparse(url).query)
+        oe = (qs.get("oe") or qs.get("_nc_oe") or [None])[0]
+        if not oe:
+            return None
+        return datetime.fromtimestamp(int(oe, 16), tz=timezone.utc)
+    except Exception:
+        return None
+
+
+def media_url_expiry(post: Dict[str, Any]) -> Optional[datetime]:
+    """表示に使う URL（thumbnail_url → media_url）の期限（URL 無しは MISSING_URL_EXPIRY、期限不明は None）"""
+    url = (post.get("thumbnail_url") or post.get("media_url") or "").strip()
+    if not url:
+        return MISSING_URL_EXPIRY
+    return extract_instagram_cdn_expiry(url)
+
+
+def with_media_url_expiry(post_data: Dict[str, Any]) -> Dict[str, Any]:
+    """URL 列を含む書き込みデータに media_url_expires_at を付与（指定済みならそのまま）"""
+    if "media_url_expires_at" in post_data or not any(c in post_data for c in _URL_COLUMNS):
+        return post_data
+    return {**post_data, "media_url_expires_at": media_url_expiry(post_data)}
@@ -0,0 +1,140 @@
+"""
+時系列ユーティリティ
+投稿メトリクス履歴（累積値のスナップショット）をグラフ表示用に整形します。
+
+各点は {"t": epoch 秒, <metric>: 値, ...} の dict で、t の昇順に並んでいる前提です。
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+Point = Dict[str, Any]
+
+
+def _day_start(day: date) -> float:
+    return datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc).timestamp()
+
+
+def bucket_daily(points: Sequence[Point], metrics: Sequence[str]) -> List[Point]:
+    """UTC の日単位に集約（累積値のため各日の最後のスナップショットを採用）
+
+    返す点の t は日の開始時刻、date は YYYY-MM-DD、recorded_at は採用したスナップショットの時刻。
+    """
+    by_day: Dict[date, Point] = {}
+    for point in points:
+        day = datetime.fromtimestamp(point["t"], tz=timezone.utc).date()
+        by_day[day] = point
+    return [
+        {
+            "t": _day_start(day),
+            "date": day.isoformat(),
+            "recorded_at": point.get("recorded_at"),
+            "filled": False,
+            **{m: point.get(m) for m in metrics},
+        }
+        for day, point in sorted(by_day.items())
+    ]
+
+
+def forward_fill_daily(
+    points: Sequence[Point],
+    metrics: Sequence[str],
+    end: Optional[date] = None,
+) -> List[Point]:
+    """bucket_daily の結果の欠けた日を直前の値で埋める（filled=True、recorded_at=None）
+
+    end を指定するとその日まで延長する（最終スナップショット以降も値を保持）。
+    """
+    if not points:
+        return []
+    filled: List[Point] = []
+    day = date.fromisoformat(points[0]["date"])
+    last_day = max(date.fromisoformat(points[-1]["date"]), end or date.min)
+    by_date = {p["date"]: p for p in points}
+    previous: Optional[Point] = None
+    while day <= last_day:
+        point = by_date.get(day.isoformat())
+        if point is None and previous is not None:
+            point = {
+                "t": _day_start(day),
+                "date": day.isoformat(),
+                "recorded_at": None,
+                "filled": True,
+                **{m: previous.get(m) for m in metrics},
+            }
+        if point is not None:
+            filled.append(point)
+            previous = point
+        day += timedelta(days=1)
+    return filled
+
+
+def lttb(points: Sequence[Point], threshold: int, key: str) -> List[Point]:
+    """Largest-Triangle-Three-Buckets で threshold 点に間引く（最初と最後の点は必ず残す）
+
+    key の値（None は 0）を y、t を x として形状を保つ点を選ぶ。
+    """
+    n = len(points)
+    if threshold >= n or n <= 2:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]]
+
+    def y(point: Point) -> float:
+        return float(point.get(key) or 0)
+
+    sampled: List[Point] = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # 次のバケットの平均（最後のバケットは最終点）
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(p["t"] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(y(p) for p in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a]["t"], y(points[a])
+        best_area = -1.0
+        best_index = start
+        for j in range(start, min(end, n - 1)):
+            area = abs((ax - avg_x) * (y(points[j]) - ay) - (ax - points[j]["t"]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best_index = j
+        sampled.append(points[best_index])
+        a = best_index
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def add_deltas(points: Sequence[Point], metrics: Sequence[str]) -> List[Point]:
+    """直前の点からの増分（delta）と1時間あたりの増加速度（velocity_per_hour）を付与
+
+    先頭の点は比較対象が無いため None。
+    """
+    result: List[Point] = []
+    previous: Optional[Point] = None
+    for point in points:
+        deltas: Dict[str, Optional[float]] = {}
+        velocity: Dict[str, Optional[float]] = {}
+        hours = (point["t"] - previous["t"]) / 3600 if previous else 0
+        for m in metrics:
+            current = point.get(m)
+            before = previous.get(m) if previous else None
+            if current is None or before is None:
+                deltas[m] = None
+                velocity[m] = None
+                continue
+            delta = current - before
+            deltas[m] = round(delta, 2) if isinstance(delta, float) else delta
+            velocity[m] = round(delta / hours, 4) if hours > 0 else None
+        result.append({**point, "delta": deltas, "velocity_per_hour": velocity})
+        previous = point
+    return result
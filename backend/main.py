@@ -4,6 +4,7 @@ from fastapi.responses import RedirectResponse
 import re
 
 from app.api.v1 import api_v1_router
+from app.core.supabase_utils import shutdown_query_executor
 
 app = FastAPI(
     title="Instagram Analysis API",
@@ -34,8 +35,10 @@ app.add_middleware(
         "Accept",
         "Origin",
         "X-Requested-With",
+        "If-None-Match",
     ],
-    expose_headers=["*"],
+    # 認証情報付きリクエストでは "*" がワイルドカードとして扱われないため ETag は明示する
+    expose_headers=["*", "ETag"],
 )
 
 # HTTPS強制ミドルウェア（本番環境用）
@@ -60,6 +63,12 @@ async def force_https(request: Request, call_next):
 app.include_router(api_v1_router)
 
 
+@app.on_event("shutdown")
+async def shutdown_supabase_executor():
+    """Supabase クエリ用スレッドプールを解放"""
+    shutdown_query_executor()
+
+
 @app.get("/")
 async def root():
     return {"message": "Instagram Analysis API is running"}
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+API Concurrency Benchmark Script
+読み取り系 API に同時リクエストを投げ、スループットとレイテンシを計測する
+
+Usage:
+    python scripts/benchmark_api_concurrency.py --base-url http://localhost:8000 --account-id <ACCOUNT_ID>
+    python scripts/benchmark_api_concurrency.py --concurrency 50 --requests 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def parse_arguments():
+    """コマンドライン引数の解析"""
+    parser = argparse.ArgumentParser(description="Read API concurrency benchmark")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--account-id", help="投稿インサイト計測対象のアカウントID（省略時は accounts のみ）")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時実行数 (default: 20)")
+    parser.add_argument("--requests", type=int, default=200, help="エンドポイントごとの総リクエスト数 (default: 200)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="リクエストタイムアウト秒 (default: 30)")
+    return parser.parse_args()
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    path: str,
+    params: Optional[Dict[str, str]],
+    total_requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """単一エンドポイントを同時実行で計測"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                res = await client.get(path, params=params)
+                if res.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    p95_index = max(0, int(len(ordered) * 0.95) - 1)
+    return {
+        "requests": total_requests,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(statistics.median(ordered) * 1000, 1) if ordered else 0.0,
+        "latency_p95_ms": round(ordered[p95_index] * 1000, 1) if ordered else 0.0,
+    }
+
+
+async def main():
+    args = parse_arguments()
+
+    targets = [("/api/v1/accounts", {"include_metrics": "true"})]
+    if args.account_id:
+        targets.append(("/api/v1/posts/insights", {"account_id": args.account_id}))
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+        for path, params in targets:
+            result = await run_endpoint(client, path, params, args.requests, args.concurrency)
+            print(f"📊 {path} (concurrency={args.concurrency})")
+            for key, value in result.items():
+                print(f"   {key}: {value}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
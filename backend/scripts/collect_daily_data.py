@@ -22,6 +22,7 @@ import json
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from app.services.data_collection.daily_collector_service import create_daily_collector
+from app.services.data_collection.sharding import parse_shard
 from app.core.database import test_connection
 
 # ログ設定
@@ -56,6 +57,9 @@ Examples:
 
   # 詳細ログ出力
   python scripts/collect_daily_data.py --verbose
+
+  # 4分割のうちシャード0のアカウントのみ収集
+  python scripts/collect_daily_data.py --shard 0/4 --output shard0.json
         """
     )
     
@@ -92,6 +96,13 @@ Examples:
         metavar='output.json'
     )
     
+    parser.add_argument(
+        '--shard',
+        type=parse_shard,
+        help='担当シャード（instagram_user_id のハッシュで分割、0始まり）',
+        metavar='i/N'
+    )
+    
     return parser.parse_args()
 
 def validate_date(date_string: str) -> date:
@@ -117,10 +128,11 @@ def setup_logging(verbose: bool):
         logging.getLogger('app').setLevel(logging.DEBUG)
         logger.info("Verbose logging enabled")
 
-def format_summary_for_output(summary) -> dict:
+def format_summary_for_output(summary, shard=None) -> dict:
     """サマリーを出力用に整形"""
     return {
         'target_date': summary.target_date.isoformat(),
+        'shard': str(shard) if shard else None,
         'execution_summary': {
             'started_at': summary.started_at.isoformat(),
             'completed_at': summary.completed_at.isoformat() if summary.completed_at else None,
@@ -130,7 +142,8 @@ def format_summary_for_output(summary) -> dict:
             'total_accounts': summary.total_accounts,
             'successful_accounts': summary.successful_accounts,
             'failed_accounts': summary.failed_accounts,
-            'success_rate': round(summary.successful_accounts / summary.total_accounts * 100, 2) if summary.total_accounts > 0 else 0
+            'success_rate': round(summary.successful_accounts / summary.total_accounts * 100, 2) if summary.total_accounts > 0 else 0,
+            'skipped_writes': summary.skipped_writes
         },
         'account_results': [
             {
@@ -156,6 +169,7 @@ def print_summary(summary):
     print(f"🎯 Total Accounts: {summary.total_accounts}")
     print(f"✅ Successful: {summary.successful_accounts}")
     print(f"❌ Failed: {summary.failed_accounts}")
+    print(f"⏭️  Skipped Metric Writes (unchanged): {summary.skipped_writes}")
     
     if summary.total_accounts > 0:
         success_rate = (summary.successful_accounts / summary.total_accounts) * 100
@@ -214,6 +228,7 @@ async def main():
         logger.info(f"  Target Date: {target_date}")
         logger.info(f"  Account Filter: {account_filter or 'All active accounts'}")
         logger.info(f"  Dry Run: {args.dry_run}")
+        logger.info(f"  Shard: {args.shard or 'None'}")
         
         # データ収集実行
         collector = create_daily_collector()
@@ -222,7 +237,8 @@ async def main():
         summary = await collector.collect_daily_data(
             target_date=target_date,
             account_filter=account_filter,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            shard=args.shard
         )
         
         # 結果表示
@@ -230,7 +246,7 @@ async def main():
         
         # JSONファイル出力
         if args.output:
-            output_data = format_summary_for_output(summary)
+            output_data = format_summary_for_output(summary, args.shard)
             with open(args.output, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, indent=2, ensure_ascii=False)
             logger.info(f"Results saved to {args.output}")
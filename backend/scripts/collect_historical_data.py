@@ -10,6 +10,9 @@ Usage:
     # 全アカウントの指定期間のデータ収集
     python scripts/collect_historical_data.py --all-accounts --from 2025-01-01 --to 2025-07-01
 
+    # 全アカウントを4並列で収集（全体のAPI呼び出しは毎秒3回まで）
+    python scripts/collect_historical_data.py --all-accounts --from 2025-01-01 --to 2025-07-01 --parallel 4 --api-rate 3
+
     # メトリクス未取得投稿のみ収集
     python scripts/collect_historical_data.py --missing-metrics
 
@@ -18,6 +21,9 @@ Usage:
 
     # 日次統計のみ収集（新機能）
     python scripts/collect_historical_data.py --account 17841435735142253 --from 2025-01-01 --to 2025-07-01 --daily-stats-only
+
+    # ページ単位のストリーミング収集（取得したページから順次保存）
+    python scripts/collect_historical_data.py --account 17841435735142253 --from 2025-01-01 --to 2025-07-01 --stream
 """
 
 import asyncio
@@ -28,6 +34,7 @@ import os
 from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict, Any
 import json
+from collections import Counter, defaultdict
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -42,6 +49,8 @@ from app.core.database import test_connection, get_db_sync
 from app.repositories.instagram_account_repository import InstagramAccountRepository
 from app.repositories.instagram_daily_stats_repository import InstagramDailyStatsRepository
 from app.services.data_collection.instagram_api_client import InstagramAPIClient
+from app.services.data_collection.api_budget import configure_api_budget
+from app.services.data_collection.parallel_runner import run_accounts_parallel
 
 # ログ設定
 logging.basicConfig(
@@ -138,6 +147,28 @@ Examples:
         help='日次統計のみ作成（投稿データは既存データから集約）'
     )
     
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='取得したページごとに保存・メトリクス収集を行う（全件取得を待たない）'
+    )
+    
+    parser.add_argument(
+        '--parallel',
+        type=int,
+        default=1,
+        help='同時に収集するアカウント数（2以上で共有APIバジェット付きの並列収集）',
+        metavar='N'
+    )
+    
+    parser.add_argument(
+        '--api-rate',
+        type=float,
+        default=2.0,
+        help='並列収集時の全アカウント合計のAPI呼び出し上限（回/秒）',
+        metavar='CALLS_PER_SEC'
+    )
+    
     return parser.parse_args()
 
 def validate_date(date_string: str) -> date:
@@ -164,6 +195,12 @@ def validate_arguments(args):
     if args.from_date and args.to_date and args.from_date > args.to_date:
         raise ValueError("開始日付は終了日付より前か、同じでなければなりません。")
 
+    # 並列数の検証
+    if args.parallel < 1:
+        raise ValueError("--parallel は 1 以上を指定してください。")
+    if args.api_rate <= 0:
+        raise ValueError("--api-rate は 0 より大きい値を指定してください。")
+
 async def get_target_accounts(args) -> List[str]:
     """対象アカウントのリストを取得"""
     if args.account:
@@ -218,6 +255,12 @@ def print_collection_plan(args, target_accounts: List[str]):
         print(f"📅 期間: {args.from_date} から {args.to_date}")
         print(f"🔄 処理: 投稿データ収集 → メトリクス取得 → 日次統計作成")
     
+    if args.stream and not args.missing_metrics and not args.daily_stats_only:
+        print(f"🌊 ストリーミング: ページ単位で保存（開始日より古いページで打ち切り）")
+    
+    if args.parallel > 1 and len(target_accounts) > 1:
+        print(f"⚡ 並列収集: {args.parallel} アカウント同時 (API上限 {args.api_rate} 回/秒)")
+    
     print("="*60)
 
 def generate_output_filename(operation_type: str, account_info: str = None) -> str:
@@ -312,6 +355,7 @@ def format_single_result(result, operation_type: str, execution_time: float) ->
                 "processed_items": result.processed_items,
                 "success_items": result.success_items,
                 "failed_items": result.failed_items,
+                "skipped_writes": getattr(result, 'skipped_writes', 0),
                 "success_rate_percent": round(result.success_items / result.total_items * 100, 1) if result.total_items > 0 else 0
             },
             "timing": {
@@ -334,6 +378,7 @@ def format_bulk_results(all_results: List, target_accounts: List[str], operation
     total_items = sum(r.total_items for r in all_results if r)
     total_success = sum(r.success_items for r in all_results if r)
     total_failed = sum(r.failed_items for r in all_results if r)
+    total_skipped_writes = sum(getattr(r, 'skipped_writes', 0) for r in all_results if r)
     
     return {
         "metadata": {
@@ -350,6 +395,7 @@ def format_bulk_results(all_results: List, target_accounts: List[str], operation
             "total_data_items": total_items,
             "successful_data_items": total_success,
             "failed_data_items": total_failed,
+            "skipped_writes": total_skipped_writes,
             "data_success_rate_percent": round(total_success / total_items * 100, 1) if total_items > 0 else 0
         },
         "account_results": [
@@ -360,6 +406,7 @@ def format_bulk_results(all_results: List, target_accounts: List[str], operation
                 "total_items": result.total_items,
                 "success_items": result.success_items,
                 "failed_items": result.failed_items,
+                "skipped_writes": getattr(result, 'skipped_writes', 0),
                 "duration_seconds": result.duration_seconds,
                 "error_message": result.error_message
             }
@@ -429,6 +476,32 @@ def print_result_summary(result_data: Dict[str, Any]):
     print(f"⏱️ 合計実行時間: {result_data['metadata']['execution_time_seconds']}s")
     print("="*60)
 
+def _empty_daily_bucket() -> Dict[str, Any]:
+    """日次集計の初期値"""
+    return {'posts_count': 0, 'total_likes': 0, 'total_comments': 0, 'media_types': Counter()}
+
+def bucket_posts_by_date(
+    posts: List[Dict[str, Any]],
+    start_date: date,
+    end_date: date
+) -> Dict[date, Dict[str, Any]]:
+    """投稿を投稿日ごとに1パスで集約（期間外・タイムスタンプ不正の投稿は除外）"""
+    buckets: Dict[date, Dict[str, Any]] = defaultdict(_empty_daily_bucket)
+    for post in posts:
+        timestamp = post.get('timestamp') or ''
+        try:
+            post_date = date.fromisoformat(timestamp.split('T')[0])
+        except ValueError:
+            continue
+        if post_date < start_date or post_date > end_date:
+            continue
+        bucket = buckets[post_date]
+        bucket['posts_count'] += 1
+        bucket['total_likes'] += post.get('like_count') or 0
+        bucket['total_comments'] += post.get('comments_count') or 0
+        bucket['media_types'][post.get('media_type', 'UNKNOWN')] += 1
+    return buckets
+
 async def collect_daily_stats_from_posts(
     account_id: str, 
     start_date: date, 
@@ -514,78 +587,49 @@ async def collect_daily_stats_from_posts(
             
             logger.info(f"取得完了: {len(all_posts)} 件の投稿")
         
-        # 日付ごとに投稿データを集約
+        # 投稿を1パスで日付ごとに集約
+        daily_buckets = bucket_posts_by_date(all_posts, start_date, end_date)
+        
+        # 期間内の全日分の行を構築（投稿のない日も0件として保存）
+        stats_rows = []
         current_date = start_date
         while current_date <= end_date:
-            result['total_days'] += 1
-            result['processed_days'] += 1
-            
-            try:
-                # その日の投稿をフィルタリング
-                daily_posts = []
-                for post in all_posts:
-                    timestamp = post.get('timestamp', '')
-                    if timestamp:
-                        try:
-                            post_date_str = timestamp.split('T')[0]
-                            post_date = date.fromisoformat(post_date_str)
-                            if post_date == current_date:
-                                daily_posts.append(post)
-                        except:
-                            continue
-                
-                # 日次統計計算
-                posts_count = len(daily_posts)
-                total_likes = sum(p.get('like_count', 0) for p in daily_posts)
-                total_comments = sum(p.get('comments_count', 0) for p in daily_posts)
-                
-                # メディアタイプ分布
-                media_types = {}
-                for post in daily_posts:
-                    media_type = post.get('media_type', 'UNKNOWN')
-                    media_types[media_type] = media_types.get(media_type, 0) + 1
-                
-                # データベース保存
-                stats_data = {
-                    'account_id': account.id,
-                    'stats_date': current_date,
-                    'followers_count': current_basic_data.get('followers_count', 0),  # 現在値
-                    'following_count': current_basic_data.get('follows_count', 0),    # 現在値
-                    'media_count': current_basic_data.get('media_count', 0),          # 現在値
-                    'posts_count': posts_count,
-                    'total_likes': total_likes,
-                    'total_comments': total_comments,
-                    'media_type_distribution': json.dumps(media_types),
-                    'data_sources': json.dumps(['posts_aggregation'])
-                }
-                
-                # 既存データチェックして作成または更新
-                existing_stats = await daily_stats_repo.get_by_specific_date(account.id, current_date)
-                
-                if existing_stats:
-                    # 更新
-                    updated_stats = await daily_stats_repo.update(existing_stats.id, stats_data)
-                    logger.debug(f"✅ 更新: {current_date} - {posts_count}投稿, {total_likes}いいね, {total_comments}コメント")
-                else:
-                    # 新規作成
-                    new_stats = await daily_stats_repo.create(stats_data)
-                    logger.debug(f"✅ 新規: {current_date} - {posts_count}投稿, {total_likes}いいね, {total_comments}コメント")
-                
-                result['success_days'] += 1
-                result['daily_stats'].append({
-                    'date': current_date.isoformat(),
-                    'posts_count': posts_count,
-                    'total_likes': total_likes,
-                    'total_comments': total_comments,
-                    'media_types': media_types
-                })
-                
-            except Exception as e:
-                logger.error(f"❌ 日次統計作成失敗: {current_date} - {str(e)}")
-                result['failed_days'] += 1
-            
+            bucket = daily_buckets.get(current_date) or _empty_daily_bucket()
+            stats_rows.append({
+                'account_id': account.id,
+                'stats_date': current_date,
+                'followers_count': current_basic_data.get('followers_count', 0),  # 現在値
+                'following_count': current_basic_data.get('follows_count', 0),    # 現在値
+                'media_count': current_basic_data.get('media_count', 0),          # 現在値
+                'posts_count': bucket['posts_count'],
+                'total_likes': bucket['total_likes'],
+                'total_comments': bucket['total_comments'],
+                'media_type_distribution': json.dumps(dict(bucket['media_types'])),
+                'data_sources': json.dumps(['posts_aggregation'])
+            })
             current_date += timedelta(days=1)
         
+        result['total_days'] = len(stats_rows)
+        result['processed_days'] = len(stats_rows)
+        
+        # 期間全体を一括 upsert
+        try:
+            await daily_stats_repo.bulk_upsert(stats_rows)
+            result['success_days'] = len(stats_rows)
+            result['daily_stats'] = [
+                {
+                    'date': row['stats_date'].isoformat(),
+                    'posts_count': row['posts_count'],
+                    'total_likes': row['total_likes'],
+                    'total_comments': row['total_comments'],
+                    'media_types': json.loads(row['media_type_distribution'])
+                }
+                for row in stats_rows
+            ]
+        except Exception as e:
+            logger.error(f"❌ 日次統計の一括保存失敗: {start_date} から {end_date} - {str(e)}")
+            result['failed_days'] = len(stats_rows)
+        
         logger.info(f"✅ 日次統計作成完了: {result['success_days']}/{result['total_days']} 日")
         return result
         
@@ -594,6 +638,14 @@ async def collect_daily_stats_from_posts(
         result['error_message'] = str(e)
         return result
 
+def log_stream_progress(event: Dict[str, Any]):
+    """ストリーミング収集の進捗表示"""
+    logger.info(
+        f"📄 {event['account_id']} page {event['page']}: "
+        f"{event['matched']}/{event['fetched']} 件が対象, 累計 {event['processed_total']} 件 "
+        f"(新規 {event['new_posts']}, 更新 {event['updated_posts']}, メトリクス {event['metrics_collected']})"
+    )
+
 async def collect_single_account(account_id: str, args) -> Optional[any]:
     """単一アカウントのデータ収集"""
     logger.info(f"🚀 アカウント: {account_id} のデータ収集を開始します")
@@ -624,7 +676,9 @@ async def collect_single_account(account_id: str, args) -> Optional[any]:
                     start_date=args.from_date,
                     end_date=args.to_date,
                     include_metrics=include_metrics,
-                    chunk_size=50
+                    chunk_size=50,
+                    stream=args.stream,
+                    progress_callback=log_stream_progress if args.stream else None
                 )
             
             # 投稿データ収集後、日次統計も作成（posts-onlyでない場合）
@@ -647,9 +701,19 @@ async def collect_single_account(account_id: str, args) -> Optional[any]:
         return None
 
 async def collect_multiple_accounts(target_accounts: List[str], args) -> List:
-    """複数アカウントの順次データ収集"""
+    """複数アカウントのデータ収集（--parallel 指定時は並列、それ以外は順次）"""
     logger.info(f"🏁 {len(target_accounts)} アカウントのデータ収集を開始します")
     
+    if args.parallel > 1:
+        budget = configure_api_budget(max_concurrent=args.parallel, calls_per_second=args.api_rate)
+        results = await run_accounts_parallel(
+            target_accounts,
+            lambda account_id: collect_single_account(account_id, args),
+            parallel=args.parallel,
+            budget=budget
+        )
+        return [result for result in results if result]
+    
     all_results = []
     
     for i, account_id in enumerate(target_accounts, 1):
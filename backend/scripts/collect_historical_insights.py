@@ -10,6 +10,9 @@ Usage:
     # 全アカウントの指定期間のインサイト収集
     python scripts/collect_historical_insights.py --all-accounts --from 2025-01-01 --to 2025-07-01
 
+    # 全アカウントを4並列で収集（全体のAPI呼び出しは毎秒3回まで）
+    python scripts/collect_historical_insights.py --all-accounts --from 2025-01-01 --to 2025-03-31 --parallel 4 --api-rate 3
+
     # 単一アカウントの過去93日間のインサイト収集
     python scripts/collect_historical_insights.py --account 17841435735142253 --days-back 93
 """
@@ -35,6 +38,8 @@ from app.core.database import test_connection, get_db_sync
 from app.repositories.instagram_account_repository import InstagramAccountRepository
 from app.repositories.instagram_daily_stats_repository import InstagramDailyStatsRepository
 from app.services.data_collection.instagram_api_client import InstagramAPIClient, InstagramAPIError
+from app.services.data_collection.api_budget import configure_api_budget
+from app.services.data_collection.parallel_runner import run_accounts_parallel
 
 # ログ設定
 logging.basicConfig(
@@ -118,6 +123,22 @@ Examples:
         help='確認プロンプトをスキップ'
     )
     
+    parser.add_argument(
+        '--parallel',
+        type=int,
+        default=1,
+        help='同時に収集するアカウント数（2以上で共有APIバジェット付きの並列収集）',
+        metavar='N'
+    )
+    
+    parser.add_argument(
+        '--api-rate',
+        type=float,
+        default=2.0,
+        help='並列収集時の全アカウント合計のAPI呼び出し上限（回/秒）',
+        metavar='CALLS_PER_SEC'
+    )
+    
     return parser.parse_args()
 
 def validate_date(date_string: str) -> date:
@@ -155,6 +176,12 @@ def validate_arguments(args):
     if period_days > 93:
         raise ValueError("Instagram API の制限により、インサイトデータは最大93日間までしか取得できません。")
 
+    # 並列数の検証
+    if args.parallel < 1:
+        raise ValueError("--parallel は 1 以上を指定してください。")
+    if args.api_rate <= 0:
+        raise ValueError("--api-rate は 0 より大きい値を指定してください。")
+
 async def get_target_accounts(args) -> List[str]:
     """対象アカウントのリストを取得"""
     if args.account:
@@ -198,6 +225,10 @@ def print_collection_plan(args, target_accounts: List[str]):
     print(f"📋 データ種別: アカウントレベルインサイト")
     print(f"   - follower_count: 日別フォロワー数変化")
     print(f"   - reach: 日別リーチ数")
+    
+    if args.parallel > 1 and len(target_accounts) > 1:
+        print(f"⚡ 並列収集: {args.parallel} アカウント同時 (API上限 {args.api_rate} 回/秒)")
+    
     print("="*60)
 
 class InsightsCollectionResult:
@@ -252,6 +283,7 @@ async def collect_account_insights(
         result.total_days = len(target_dates)
         logger.info(f"   対象日数: {result.total_days} 日")
         
+        stats_rows = []
         async with InstagramAPIClient() as api_client:
             for target_date in target_dates:
                 result.processed_days += 1
@@ -259,11 +291,6 @@ async def collect_account_insights(
                 try:
                     logger.debug(f"   処理中: {target_date} ({result.processed_days}/{result.total_days})")
                     
-                    # 既存データチェック
-                    existing_stats = await daily_stats_repo.get_by_specific_date(
-                        account.id, target_date
-                    )
-                    
                     # インサイトデータ取得
                     insights_data = await api_client.get_insights_metrics(
                         account.instagram_user_id,
@@ -271,33 +298,19 @@ async def collect_account_insights(
                         target_date
                     )
                     
-                    # データベース保存
-                    if existing_stats:
-                        # 既存データの更新（現在のテーブル定義ではreach等は保持しない）
-                        update_data = {
-                            "followers_count": insights_data.get("follower_count", 0),
-                            "data_sources": json.dumps(["api_insights"], ensure_ascii=False),
-                        }
-                        await daily_stats_repo.update(existing_stats.id, update_data)
-                        logger.debug(f"     ✅ 更新: {target_date} - followers: {insights_data.get('follower_count', 0)}")
-                    else:
-                        # 新規データ作成
-                        create_data = {
-                            "account_id": account.id,
-                            "stats_date": target_date,
-                            "followers_count": insights_data.get("follower_count", 0),
-                            "following_count": 0,
-                            "media_count": 0,
-                            "posts_count": 0,
-                            "total_likes": 0,
-                            "total_comments": 0,
-                            "media_type_distribution": "{}",
-                            "data_sources": json.dumps(["api_insights"], ensure_ascii=False),
-                        }
-                        await daily_stats_repo.create(create_data)
-                        logger.debug(f"     ✅ 新規: {target_date} - followers: {insights_data.get('follower_count', 0)}")
-                    
-                    result.success_days += 1
+                    # 新規作成時の値（既存行は followers_count / data_sources のみ上書き）
+                    stats_rows.append({
+                        "account_id": account.id,
+                        "stats_date": target_date,
+                        "followers_count": insights_data.get("follower_count", 0),
+                        "following_count": 0,
+                        "media_count": 0,
+                        "posts_count": 0,
+                        "total_likes": 0,
+                        "total_comments": 0,
+                        "media_type_distribution": "{}",
+                        "data_sources": json.dumps(["api_insights"], ensure_ascii=False),
+                    })
                     result.collected_insights.append({
                         'date': target_date.isoformat(),
                         'reach': insights_data.get('reach', 0),
@@ -311,6 +324,21 @@ async def collect_account_insights(
                     logger.warning(f"     ❌ 失敗: {target_date} - {str(e)}")
                     result.failed_days += 1
         
+        # 期間分をまとめてマージ保存（既存行の他の列は維持）
+        if stats_rows:
+            try:
+                await daily_stats_repo.merge_upsert_range(
+                    account.id,
+                    stats_rows,
+                    merge_fields=("followers_count", "data_sources")
+                )
+                result.success_days += len(stats_rows)
+                logger.debug(f"     ✅ 保存: {len(stats_rows)} 日分")
+            except Exception as e:
+                logger.warning(f"     ❌ 保存失敗: {len(stats_rows)} 日分 - {str(e)}")
+                result.failed_days += len(stats_rows)
+                result.collected_insights = []
+        
         result.completed_at = datetime.now()
         result.duration_seconds = (result.completed_at - result.started_at).total_seconds()
         
@@ -533,24 +561,34 @@ async def main():
             # 複数アカウント処理
             all_results = []
             
-            for i, account_id in enumerate(target_accounts, 1):
-                logger.info(f"アカウント: {i}/{len(target_accounts)}: {account_id} のインサイト収集を開始します")
+            if args.parallel > 1:
+                budget = configure_api_budget(max_concurrent=args.parallel, calls_per_second=args.api_rate)
+                results = await run_accounts_parallel(
+                    target_accounts,
+                    lambda account_id: collect_account_insights(account_id, args.from_date, args.to_date),
+                    parallel=args.parallel,
+                    budget=budget
+                )
+                all_results = [result for result in results if result]
+            else:
+                for i, account_id in enumerate(target_accounts, 1):
+                    logger.info(f"アカウント: {i}/{len(target_accounts)}: {account_id} のインサイト収集を開始します")
                 
-                try:
-                    result = await collect_account_insights(
-                        account_id, 
-                        args.from_date, 
-                        args.to_date
-                    )
-                    all_results.append(result)
+                    try:
+                        result = await collect_account_insights(
+                            account_id, 
+                            args.from_date, 
+                            args.to_date
+                        )
+                        all_results.append(result)
                     
-                    # アカウント間の待機（最後以外）
-                    if i < len(target_accounts):
-                        logger.info("⏱️ 次のアカウントへの移行を10秒待ちます...")
-                        await asyncio.sleep(10)
+                        # アカウント間の待機（最後以外）
+                        if i < len(target_accounts):
+                            logger.info("⏱️ 次のアカウントへの移行を10秒待ちます...")
+                            await asyncio.sleep(10)
                         
-                except Exception as e:
-                    logger.error(f"アカウント: {account_id} のインサイト収集に失敗しました: {e}")
+                    except Exception as e:
+                        logger.error(f"アカウント: {account_id} のインサイト収集に失敗しました: {e}")
             
             execution_time = (datetime.now() - start_time).total_seconds()
             
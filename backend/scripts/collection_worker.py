@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Collection Worker Script
+COLLECTION_QUEUE_MODE=worker で API が登録した収集ジョブを実行するワーカー
+
+Usage:
+    python scripts/collection_worker.py
+    python scripts/collection_worker.py --concurrency 2 --job-types recent_post_sync
+    python scripts/collection_worker.py --once
+"""
+
+import asyncio
+import sys
+import argparse
+import logging
+import os
+import signal
+
+# プロジェクトルートディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.jobs.handlers import registered_job_types
+from app.services.jobs.job_queue import get_job_queue
+from app.services.jobs.worker import CollectionWorker, DEFAULT_JOB_LEASE_SECONDS
+
+# ログ設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+def parse_arguments():
+    """コマンドライン引数の解析"""
+    parser = argparse.ArgumentParser(
+        description='Instagram Collection Job Worker',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # ワーカー起動（SIGTERM / Ctrl+C で実行中ジョブの完了後に停止）
+  python scripts/collection_worker.py
+
+  # 2ジョブ同時実行
+  python scripts/collection_worker.py --concurrency 2
+
+  # 直近投稿同期のみ処理
+  python scripts/collection_worker.py --job-types recent_post_sync
+
+  # キューが空になったら終了（cron / CI 向け）
+  python scripts/collection_worker.py --once
+        """
+    )
+
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='同時実行ジョブ数 (デフォルト: 1)'
+    )
+
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=5.0,
+        help='キューが空のときのポーリング間隔（秒、デフォルト: 5.0）'
+    )
+
+    parser.add_argument(
+        '--lease-seconds',
+        type=int,
+        default=DEFAULT_JOB_LEASE_SECONDS,
+        help=f'ジョブのリース期間（秒、デフォルト: {DEFAULT_JOB_LEASE_SECONDS}）'
+    )
+
+    parser.add_argument(
+        '--job-types',
+        type=str,
+        help='処理するジョブ種別 (カンマ区切り、未指定時は全種別)',
+        metavar='type1,type2'
+    )
+
+    parser.add_argument(
+        '--once',
+        action='store_true',
+        help='キューが空になった時点で終了'
+    )
+
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='詳細ログ出力'
+    )
+
+    return parser.parse_args()
+
+async def main():
+    """メイン実行関数"""
+    args = parse_arguments()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    if args.concurrency < 1:
+        logger.error("--concurrency must be >= 1")
+        return 1
+
+    job_types = None
+    if args.job_types:
+        job_types = [t.strip() for t in args.job_types.split(',') if t.strip()]
+        unknown = [t for t in job_types if t not in registered_job_types()]
+        if unknown:
+            logger.error(f"Unknown job types: {', '.join(unknown)} (available: {', '.join(registered_job_types())})")
+            return 1
+
+    worker = CollectionWorker(
+        get_job_queue(),
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        lease_seconds=args.lease_seconds,
+        job_types=job_types,
+    )
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        processed = await worker.run(stop_event=stop_event, once=args.once)
+        logger.info(f"Worker finished: {processed} jobs processed")
+        return 0
+    except Exception as e:
+        logger.error(f"Critical error in collection worker: {str(e)}", exc_info=True)
+        return 1
+
+def cli_entry_point():
+    """CLI エントリーポイント"""
+    try:
+        exit_code = asyncio.run(main())
+        sys.exit(exit_code)
+    except KeyboardInterrupt:
+        print("\n⚠️  Worker interrupted by user")
+        sys.exit(130)
+
+if __name__ == "__main__":
+    cli_entry_point()
@@ -7,6 +7,7 @@ Account Insights Collector for GitHub Actions
     python account_insights_collector.py --notify-slack
     python account_insights_collector.py --target-date 2025-07-01
     python account_insights_collector.py --target-accounts "123,456" --force-update
+    python account_insights_collector.py --shard 0/4 --output insights_shard0.json
 """
 
 import asyncio
@@ -26,6 +27,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from app.repositories.instagram_account_repository import InstagramAccountRepository
 from app.repositories.instagram_daily_stats_repository import InstagramDailyStatsRepository
 from app.services.data_collection.instagram_api_client import InstagramAPIClient
+from app.services.data_collection.monthly_rollup_service import create_monthly_rollup_service
+from app.services.data_collection.sharding import Shard, parse_shard
 
 from shared.base_collector import BaseCollector
 from shared.notification_service import NotificationService
@@ -56,8 +59,9 @@ class AccountInsightsResult:
 class AccountInsightsCollector(BaseCollector):
     """アカウントインサイト収集クラス"""
     
-    def __init__(self):
+    def __init__(self, shard: Optional[Shard] = None):
         super().__init__("account_insights")
+        self.shard = shard
         self.notification = NotificationService()
         self.error_handler = ErrorHandler()
         
@@ -84,7 +88,7 @@ class AccountInsightsCollector(BaseCollector):
             await self._init_database()
             
             # 対象アカウント取得
-            accounts = await self._get_target_accounts(target_accounts)
+            accounts = await self._get_target_accounts(target_accounts, self.shard)
             result.total_accounts = len(accounts)
             
             self.logger.info(f"🎯 Target accounts: {result.total_accounts}")
@@ -113,6 +117,11 @@ class AccountInsightsCollector(BaseCollector):
                 # アカウント間の待機（API制限対応）
                 await asyncio.sleep(5)
             
+            # 保存した月の月次統計だけを再計算
+            await create_monthly_rollup_service(self.db).rollup(
+                (r['account_id'], target_date) for r in result.account_results if r.get('stats_saved')
+            )
+            
             result.completed_at = datetime.now()
             
             # 実行結果ログ
@@ -150,6 +159,7 @@ class AccountInsightsCollector(BaseCollector):
             'username': account.username,
             'success': False,
             'created': False,
+            'stats_saved': False,
             'api_calls': 0,
             'error': None
         }
@@ -204,6 +214,7 @@ class AccountInsightsCollector(BaseCollector):
                     account_result['created'] = True
                     self.logger.info(f"✨ Created stats for {account.username}: {target_date}")
                 
+                account_result['stats_saved'] = True
                 account_result['success'] = True
                 
         except Exception as e:
@@ -245,6 +256,28 @@ class AccountInsightsCollector(BaseCollector):
             'data_sources': json.dumps(['github_actions_daily_collection'])
         }
 
+def format_result_for_output(result: AccountInsightsResult, shard: Optional[Shard] = None) -> Dict[str, Any]:
+    """結果をJSON出力用に整形"""
+    return {
+        'execution_id': result.execution_id,
+        'target_date': result.target_date.isoformat(),
+        'shard': str(shard) if shard else None,
+        'execution_summary': {
+            'started_at': result.started_at.isoformat(),
+            'completed_at': result.completed_at.isoformat() if result.completed_at else None,
+        },
+        'collection_summary': {
+            'total_accounts': result.total_accounts,
+            'successful_accounts': result.successful_accounts,
+            'failed_accounts': result.failed_accounts,
+            'stats_created': result.stats_created,
+            'stats_updated': result.stats_updated,
+            'api_calls_made': result.api_calls_made,
+        },
+        'account_results': result.account_results,
+        'errors': result.errors,
+    }
+
 # CLI エントリーポイント
 async def main():
     parser = argparse.ArgumentParser(description='Account Insights Collector')
@@ -252,6 +285,8 @@ async def main():
     parser.add_argument('--target-accounts', help='対象アカウント (カンマ区切り)')
     parser.add_argument('--force-update', action='store_true', help='既存データの強制上書き')
     parser.add_argument('--notify-slack', action='store_true', help='Slack通知を送信')
+    parser.add_argument('--shard', type=parse_shard, help='担当シャード i/N（instagram_user_id のハッシュで分割、0始まり）')
+    parser.add_argument('--output', help='結果をJSONファイルに出力')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], 
                        default='INFO', help='ログレベル')
     
@@ -276,7 +311,7 @@ async def main():
     logging.getLogger().setLevel(getattr(logging, args.log_level))
     
     # 収集実行
-    collector = AccountInsightsCollector()
+    collector = AccountInsightsCollector(shard=args.shard)
     result = await collector.collect_daily_stats(
         target_date=target_date,
         target_accounts=target_accounts,
@@ -302,6 +337,11 @@ async def main():
     print(f"⏱️ Duration: {duration:.1f}s")
     print(f"{'='*60}")
     
+    # JSONファイル出力
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(format_result_for_output(result, args.shard), f, indent=2, ensure_ascii=False, default=str)
+    
     # Slack通知
     if args.notify_slack:
         await collector.notification.send_account_insights_result(result)
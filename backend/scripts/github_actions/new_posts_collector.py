@@ -2,11 +2,13 @@
 """
 New Posts Collector for GitHub Actions
 24時間以内の新規投稿検出・収集
+アカウント別の高水位マーク（last_seen_post_at / last_seen_post_id）以降のみを確認する
 
 実行例:
     python new_posts_collector.py --notify-new-posts
     python new_posts_collector.py --target-accounts "123,456" --check-hours-back 6
     python new_posts_collector.py --force-reprocess
+    python new_posts_collector.py --shard 0/4 --output new_posts_shard0.json
 """
 
 import asyncio
@@ -27,6 +29,10 @@ from app.repositories.instagram_account_repository import InstagramAccountReposi
 from app.repositories.instagram_post_repository import InstagramPostRepository
 from app.repositories.instagram_post_metrics_repository import InstagramPostMetricsRepository
 from app.services.data_collection.instagram_api_client import InstagramAPIClient
+from app.services.data_collection.freshness_ledger import POST_INSIGHTS, create_freshness_ledger
+from app.services.data_collection.media_type_rollup_service import create_media_type_rollup_service
+from app.services.data_collection.sharding import Shard, parse_shard
+from app.utils.dates import parse_datetime
 
 from shared.base_collector import BaseCollector
 from shared.notification_service import NotificationService
@@ -51,6 +57,7 @@ class NewPostsResult:
     new_posts_found: int = 0
     new_posts_saved: int = 0
     insights_collected: int = 0
+    skipped_writes: int = 0
     
     # API使用統計
     api_calls_made: int = 0
@@ -63,12 +70,15 @@ class NewPostsResult:
 class NewPostsCollector(BaseCollector):
     """新規投稿収集クラス"""
     
-    def __init__(self):
+    def __init__(self, shard: Optional[Shard] = None):
         super().__init__("new_posts")
+        self.shard = shard
         self.notification = NotificationService()
         self.post_detector = PostDetector()
         self.post_processor = PostProcessor()
-        self.execution_tracker = ExecutionTracker()
+        # シャードごとに実行状態を分離（並列実行時の上書き防止）
+        state_name = f"new_posts_shard{shard.index}of{shard.count}" if shard else "new_posts"
+        self.execution_tracker = ExecutionTracker(state_name)
         
     async def detect_and_collect(
         self,
@@ -87,28 +97,30 @@ class NewPostsCollector(BaseCollector):
         try:
             self.logger.info(f"🚀 New posts detection started: {execution_id}")
             
-            # 前回実行時刻の取得
+            # 前回実行時刻の取得（高水位マーク未設定アカウントのフォールバック）
             last_execution_time = self.execution_tracker.get_last_execution_time()
             
-            # チェック開始時刻の決定
+            # フォールバック用チェック開始時刻の決定
             if last_execution_time and not force_reprocess:
-                check_from = last_execution_time
-                self.logger.info(f"📅 Checking posts since last execution: {check_from}")
+                fallback_check_from = last_execution_time
+                self.logger.info(f"📅 Fallback window: since last execution {fallback_check_from}")
             else:
-                check_from = datetime.now(timezone.utc) - timedelta(hours=check_hours_back)
-                self.logger.info(f"📅 Checking posts from {check_hours_back} hours back: {check_from}")
+                fallback_check_from = datetime.now(timezone.utc) - timedelta(hours=check_hours_back)
+                self.logger.info(f"📅 Fallback window: {check_hours_back} hours back {fallback_check_from}")
             
             # データベース接続初期化
             await self._init_database()
+            self.freshness = create_freshness_ledger(self.db, "new_posts")
             
             # 対象アカウント取得
-            accounts = await self._get_target_accounts(target_accounts)
+            accounts = await self._get_target_accounts(target_accounts, self.shard)
             result.total_accounts = len(accounts)
             
             self.logger.info(f"🎯 Target accounts: {result.total_accounts}")
             
             # アカウント別処理
             for account in accounts:
+                check_from = self._resolve_check_from(account, fallback_check_from, force_reprocess)
                 account_result = await self._detect_account_new_posts(
                     account, check_from, force_reprocess
                 )
@@ -135,7 +147,13 @@ class NewPostsCollector(BaseCollector):
                 # アカウント間の待機（API制限対応）
                 await asyncio.sleep(3)
             
+            # 新規投稿を保存したアカウントのメディアタイプ別ロールアップを再集計
+            await create_media_type_rollup_service(self.db).refresh(
+                r['account_id'] for r in result.account_results if r.get('new_posts_saved')
+            )
+            
             result.completed_at = datetime.now(timezone.utc)
+            result.skipped_writes = self.post_processor.skipped_writes
             
             # 実行時刻の更新
             self.execution_tracker.update_last_execution_time(result.started_at)
@@ -149,6 +167,7 @@ class NewPostsCollector(BaseCollector):
             self.logger.info(f"🆕 New posts found: {result.new_posts_found}")
             self.logger.info(f"💾 New posts saved: {result.new_posts_saved}")
             self.logger.info(f"📈 Insights collected: {result.insights_collected}")
+            self.logger.info(f"⏭️ Skipped metric writes (unchanged): {result.skipped_writes}")
             self.logger.info(f"📞 API calls made: {result.api_calls_made}")
             
             return result
@@ -163,6 +182,20 @@ class NewPostsCollector(BaseCollector):
         finally:
             await self._cleanup_database()
 
+    def _resolve_check_from(
+        self,
+        account,
+        fallback_check_from: datetime,
+        force_reprocess: bool
+    ) -> datetime:
+        """アカウント別チェック開始時刻（高水位マーク優先）"""
+        if not force_reprocess:
+            watermark = parse_datetime(getattr(account, 'last_seen_post_at', None))
+            if watermark:
+                self.logger.info(f"📅 {account.username}: checking posts since watermark {watermark}")
+                return watermark
+        return fallback_check_from
+
     async def _detect_account_new_posts(
         self, 
         account, 
@@ -189,75 +222,108 @@ class NewPostsCollector(BaseCollector):
             self.logger.info(f"🔍 Checking account: {account.username}")
             
             async with InstagramAPIClient() as api_client:
-                # 最新投稿データ取得（最大50件）
-                recent_posts = await self._fetch_recent_posts(api_client, account, limit=50)
+                # 高水位マーク以降の投稿を ID・タイムスタンプのみで取得（最大50件）
+                candidates = await api_client.get_posts_since(
+                    account.instagram_user_id,
+                    account.access_token_encrypted,
+                    check_from,
+                    max_posts=50,
+                    fields=api_client.config.get_media_id_fields()
+                )
                 account_result['api_calls'] += 1
-                account_result['posts_checked'] = len(recent_posts)
+                account_result['posts_checked'] = len(candidates)
+                
+                # マーク位置の投稿自体は処理済み
+                last_seen_post_id = getattr(account, 'last_seen_post_id', None)
+                if last_seen_post_id and not force_reprocess:
+                    candidates = [p for p in candidates if p.get('id') != last_seen_post_id]
                 
                 # 新規投稿の検出
                 new_posts = await self.post_detector.detect_new_posts(
-                    recent_posts, 
+                    candidates, 
                     check_from, 
                     account.id,
                     force_reprocess
                 )
                 account_result['new_posts_found'] = len(new_posts)
+                failed_post_ids = set()
                 
                 if new_posts:
                     self.logger.info(f"🆕 Found {len(new_posts)} new posts for {account.username}")
                     
-                    # 新規投稿の処理
-                    for post_data in new_posts:
+                    # 他ジョブが直近に取得済みのインサイトは再取得しない
+                    fresh_insights = set()
+                    if not force_reprocess:
+                        fresh_insights = await self.freshness.fresh_subjects(
+                            account.id, POST_INSIGHTS, [p['id'] for p in new_posts]
+                        )
+                    
+                    # 新規投稿の処理（フルフィールドは新規分のみ取得）
+                    for candidate in new_posts:
                         try:
+                            post_data = await api_client.get_media(
+                                candidate['id'],
+                                account.access_token_encrypted
+                            )
+                            account_result['api_calls'] += 1
+                            
                             # 投稿データ保存
                             saved_post = await self.post_processor.save_post_data(
                                 account.id, post_data
                             )
                             
-                            if saved_post:
-                                account_result['new_posts_saved'] += 1
-                                
-                                # 投稿インサイト収集
+                            if not saved_post:
+                                failed_post_ids.add(candidate['id'])
+                                continue
+                            
+                            account_result['new_posts_saved'] += 1
+                            
+                            # 投稿インサイト収集
+                            insights = None
+                            if str(post_data['id']) not in fresh_insights:
                                 insights = await api_client.get_post_insights(
                                     post_data['id'],
                                     account.access_token_encrypted,
                                     post_data.get('media_type', 'IMAGE')
                                 )
                                 account_result['api_calls'] += 1
-                                
-                                if insights:
-                                    await self.post_processor.save_post_insights(
-                                        saved_post.id, insights
-                                    )
-                                    account_result['insights_collected'] += 1
-                                
-                                # 新規投稿詳細を記録
-                                post_detail = {
-                                    'account_username': account.username,
-                                    'post_id': post_data['id'],
-                                    'media_type': post_data.get('media_type'),
-                                    'timestamp': post_data.get('timestamp'),
-                                    'permalink': post_data.get('permalink'),
-                                    'caption_preview': (post_data.get('caption', '') or '')[:100] + '...' if post_data.get('caption') else None,
-                                    'insights_collected': insights is not None
-                                }
-                                account_result['new_posts_details'].append(post_detail)
-                                
-                                self.logger.info(
-                                    f"✅ Saved new post: {post_data['id']} "
-                                    f"({post_data.get('media_type')}) "
-                                    f"- insights: {'✓' if insights else '✗'}"
+                            
+                            if insights:
+                                await self.post_processor.save_post_insights(
+                                    saved_post.id, insights
                                 )
-                                
-                                # API制限対応（投稿間の待機）
-                                await asyncio.sleep(2)
+                                await self.freshness.record(account.id, POST_INSIGHTS, [post_data['id']])
+                                account_result['insights_collected'] += 1
+                            
+                            # 新規投稿詳細を記録
+                            post_detail = {
+                                'account_username': account.username,
+                                'post_id': post_data['id'],
+                                'media_type': post_data.get('media_type'),
+                                'timestamp': post_data.get('timestamp'),
+                                'permalink': post_data.get('permalink'),
+                                'caption_preview': (post_data.get('caption', '') or '')[:100] + '...' if post_data.get('caption') else None,
+                                'insights_collected': insights is not None
+                            }
+                            account_result['new_posts_details'].append(post_detail)
+                            
+                            self.logger.info(
+                                f"✅ Saved new post: {post_data['id']} "
+                                f"({post_data.get('media_type')}) "
+                                f"- insights: {'✓' if insights else '✗'}"
+                            )
+                            
+                            # API制限対応（投稿間の待機）
+                            await asyncio.sleep(2)
                                 
                         except Exception as e:
-                            self.logger.error(f"❌ Failed to process new post {post_data['id']}: {e}")
+                            failed_post_ids.add(candidate['id'])
+                            self.logger.error(f"❌ Failed to process new post {candidate['id']}: {e}")
                             continue
                 else:
                     self.logger.info(f"📭 No new posts found for {account.username}")
                 
+                await self._advance_watermark(account, candidates, failed_post_ids)
                 account_result['success'] = True
                 
         except Exception as e:
@@ -266,32 +332,61 @@ class NewPostsCollector(BaseCollector):
         
         return account_result
 
-    async def _fetch_recent_posts(
-        self, 
-        api_client: InstagramAPIClient, 
-        account, 
-        limit: int = 50
-    ) -> List[Dict]:
-        """最新投稿データ取得"""
+    async def _advance_watermark(
+        self,
+        account,
+        candidates: List[Dict],
+        failed_post_ids: set
+    ) -> None:
+        """高水位マークを処理済みの最新投稿まで進める
+
+        候補は新しい順。失敗した投稿より新しい位置へは進めず、次回再試行させる。
+        """
+        watermark_post = None
+        for post in reversed(candidates):
+            if post.get('id') in failed_post_ids:
+                break
+            watermark_post = post
         
-        url = api_client.config.get_user_media_url(account.instagram_user_id)
+        if not watermark_post:
+            return
         
-        params = {
-            'fields': 'id,media_type,permalink,caption,timestamp,like_count,comments_count,media_url,thumbnail_url',
-            'access_token': account.access_token_encrypted,
-            'limit': min(limit, 100)  # API制限に合わせる
-        }
+        watermark_at = parse_datetime(watermark_post.get('timestamp'))
+        if not watermark_at:
+            return
         
-        try:
-            response = await api_client._make_request(url, params)
-            posts = response.get('data', [])
-            
-            self.logger.debug(f"Retrieved {len(posts)} recent posts for {account.username}")
-            return posts
-            
-        except Exception as e:
-            self.logger.error(f"Failed to fetch recent posts for {account.username}: {e}")
-            return []
+        current = parse_datetime(getattr(account, 'last_seen_post_at', None))
+        if current and watermark_at < current:
+            return
+        
+        account_repo = InstagramAccountRepository(self.db)
+        await account_repo.update_post_watermark(account.id, watermark_at, watermark_post['id'])
+        self.logger.info(f"🔖 Watermark for {account.username}: {watermark_post['id']} @ {watermark_at}")
+
+def format_result_for_output(result: NewPostsResult, shard: Optional[Shard] = None) -> Dict[str, Any]:
+    """結果をJSON出力用に整形"""
+    return {
+        'execution_id': result.execution_id,
+        'shard': str(shard) if shard else None,
+        'execution_summary': {
+            'started_at': result.started_at.isoformat(),
+            'completed_at': result.completed_at.isoformat() if result.completed_at else None,
+        },
+        'collection_summary': {
+            'total_accounts': result.total_accounts,
+            'successful_accounts': result.successful_accounts,
+            'failed_accounts': result.failed_accounts,
+            'total_posts_checked': result.total_posts_checked,
+            'new_posts_found': result.new_posts_found,
+            'new_posts_saved': result.new_posts_saved,
+            'insights_collected': result.insights_collected,
+            'skipped_writes': result.skipped_writes,
+            'api_calls_made': result.api_calls_made,
+        },
+        'account_results': result.account_results,
+        'new_posts_details': result.new_posts_details,
+        'errors': result.errors,
+    }
 
 # CLI エントリーポイント
 async def main():
@@ -300,6 +395,8 @@ async def main():
     parser.add_argument('--check-hours-back', type=int, default=8, help='遡及時間 (時間)')
     parser.add_argument('--force-reprocess', action='store_true', help='既存投稿の再処理を強制実行')
     parser.add_argument('--notify-new-posts', action='store_true', help='新規投稿をSlack通知')
+    parser.add_argument('--shard', type=parse_shard, help='担当シャード i/N（instagram_user_id のハッシュで分割、0始まり）')
+    parser.add_argument('--output', help='結果をJSONファイルに出力')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], 
                        default='INFO', help='ログレベル')
     
@@ -314,7 +411,7 @@ async def main():
     logging.getLogger().setLevel(getattr(logging, args.log_level))
     
     # 検出・収集実行
-    collector = NewPostsCollector()
+    collector = NewPostsCollector(shard=args.shard)
     result = await collector.detect_and_collect(
         target_accounts=target_accounts,
         check_hours_back=args.check_hours_back,
@@ -330,6 +427,7 @@ async def main():
     print(f"🆕 New posts found: {result.new_posts_found}")
     print(f"💾 New posts saved: {result.new_posts_saved}")
     print(f"📈 Insights collected: {result.insights_collected}")
+    print(f"⏭️ Skipped metric writes: {result.skipped_writes}")
     print(f"📞 API calls: {result.api_calls_made}")
     
     # 新規投稿詳細表示
@@ -347,6 +445,11 @@ async def main():
     print(f"\n⏱️ Duration: {duration:.1f}s")
     print(f"{'='*60}")
     
+    # JSONファイル出力
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(format_result_for_output(result, args.shard), f, indent=2, ensure_ascii=False, default=str)
+    
     # Slack通知（新規投稿があった場合のみ）
     if args.notify_new_posts and result.new_posts_found > 0:
         await collector.notification.send_new_posts_notification(result)
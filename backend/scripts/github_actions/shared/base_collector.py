@@ -12,6 +12,7 @@ import os
 
 from app.core.database import get_db_sync
 from app.repositories.instagram_account_repository import InstagramAccountRepository
+from app.services.data_collection.sharding import Shard, filter_accounts_for_shard
 
 class BaseCollector:
     """GitHub Actions用コレクターの基底クラス"""
@@ -48,8 +49,12 @@ class BaseCollector:
         """データベース接続クリーンアップ"""
         self.db = None
             
-    async def _get_target_accounts(self, target_accounts: Optional[List[str]] = None):
-        """対象アカウント取得"""
+    async def _get_target_accounts(
+        self,
+        target_accounts: Optional[List[str]] = None,
+        shard: Optional[Shard] = None
+    ):
+        """対象アカウント取得（shard 指定時は担当分のみ）"""
         account_repo = InstagramAccountRepository(self.db)
         
         if target_accounts:
@@ -64,6 +69,10 @@ class BaseCollector:
         else:
             # 全アクティブアカウント
             accounts = await account_repo.get_active_accounts()
+        
+        if shard:
+            accounts = filter_accounts_for_shard(accounts, shard)
+            self.logger.info(f"Shard {shard}: {len(accounts)} accounts assigned")
             
         self.logger.info(f"Target accounts retrieved: {len(accounts)}")
         return accounts
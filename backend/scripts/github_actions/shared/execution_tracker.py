@@ -12,9 +12,9 @@ import logging
 class ExecutionTracker:
     """実行状態追跡クラス"""
     
-    def __init__(self):
+    def __init__(self, state_name: str = "new_posts"):
         self.logger = logging.getLogger(__name__)
-        self.state_file = Path(__file__).parent.parent.parent.parent / "data" / "execution_state" / "new_posts_last_execution.json"
+        self.state_file = Path(__file__).parent.parent.parent.parent / "data" / "execution_state" / f"{state_name}_last_execution.json"
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
     
     def get_last_execution_time(self) -> Optional[datetime]:
@@ -3,7 +3,7 @@ Post Processor
 投稿データとインサイトの保存処理
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 import logging
 
@@ -15,6 +15,7 @@ class PostProcessor:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        self.skipped_writes = 0
     
     async def save_post_data(self, account_id: str, post_data: Dict) -> Optional[Any]:
         """投稿データの保存"""
@@ -74,15 +75,19 @@ class PostProcessor:
                 'video_view_total_time': insights_data.get('ig_reels_video_view_total_time', 0),
                 'avg_watch_time': insights_data.get('ig_reels_avg_watch_time', 0),
                 'engagement_rate': self._calculate_engagement_rate(insights_data),
-                'recorded_at': datetime.now()
+                'recorded_at': datetime.now(timezone.utc)
             }
             
             from app.core.database import get_db_sync
             supabase = get_db_sync()
             metrics_repo = InstagramPostMetricsRepository(supabase)
-            await metrics_repo.create(metrics_data)
+            await metrics_repo.create_or_update_daily(metrics_data)
 
-            self.logger.info(f"📊 Saved post insights: {post_id}")
+            if metrics_repo.skipped_writes:
+                self.skipped_writes += metrics_repo.skipped_writes
+                self.logger.info(f"⏭️ Post insights unchanged, write skipped: {post_id}")
+            else:
+                self.logger.info(f"📊 Saved post insights: {post_id}")
             return True
                 
         except Exception as e:
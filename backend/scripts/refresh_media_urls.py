@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Media URL Refresh Script
+期限（Instagram CDN の oe）が近い media_url / thumbnail_url を事前に更新する（cron 向け）
+
+Usage:
+    python scripts/refresh_media_urls.py
+    python scripts/refresh_media_urls.py --accounts user1,user2 --horizon-minutes 120
+    python scripts/refresh_media_urls.py --dry-run
+"""
+
+import asyncio
+import sys
+import argparse
+import logging
+import os
+from datetime import timedelta
+
+# プロジェクトルートディレクトリをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import get_db_sync
+from app.services.data_collection.media_url_refresher import (
+    DEFAULT_MAX_POSTS,
+    DEFAULT_REFRESH_HORIZON,
+    create_media_url_refresher,
+)
+
+# ログ設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+def parse_arguments():
+    """コマンドライン引数の解析"""
+    parser = argparse.ArgumentParser(
+        description='Instagram Media URL Refresh',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # 全アクティブアカウント（期限まで60分未満の URL を更新）
+  python scripts/refresh_media_urls.py
+
+  # 特定アカウントのみ、期限まで2時間未満を対象
+  python scripts/refresh_media_urls.py --accounts user123,user456 --horizon-minutes 120
+
+  # 対象件数の確認のみ（API 呼び出し・DB 更新なし）
+  python scripts/refresh_media_urls.py --dry-run
+        """
+    )
+
+    parser.add_argument(
+        '--accounts',
+        type=str,
+        help='対象アカウントのInstagram User ID (カンマ区切り)',
+        metavar='user1,user2'
+    )
+
+    parser.add_argument(
+        '--horizon-minutes',
+        type=int,
+        default=int(DEFAULT_REFRESH_HORIZON.total_seconds() // 60),
+        help='期限までの残りがこの分数未満の URL を更新 (デフォルト: MEDIA_URL_REFRESH_HORIZON_MINUTES または 60)'
+    )
+
+    parser.add_argument(
+        '--max-posts',
+        type=int,
+        default=DEFAULT_MAX_POSTS,
+        help=f'1アカウントあたりの更新対象（期限の近い順、デフォルト: {DEFAULT_MAX_POSTS}）'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='対象件数の確認のみ'
+    )
+
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='詳細ログ出力'
+    )
+
+    return parser.parse_args()
+
+async def main():
+    """メイン実行関数"""
+    args = parse_arguments()
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    if args.horizon_minutes < 1 or args.max_posts < 1:
+        logger.error("--horizon-minutes and --max-posts must be >= 1")
+        return 1
+
+    account_filter = None
+    if args.accounts:
+        account_filter = [a.strip() for a in args.accounts.split(',') if a.strip()]
+
+    refresher = create_media_url_refresher(get_db_sync(), horizon=timedelta(minutes=args.horizon_minutes))
+
+    try:
+        result = await refresher.refresh_accounts(
+            account_filter=account_filter,
+            max_posts=args.max_posts,
+            dry_run=args.dry_run,
+        )
+    except Exception as e:
+        logger.error(f"Critical error in media URL refresh: {str(e)}", exc_info=True)
+        return 1
+
+    logger.info(
+        f"Media URL refresh finished: {result.accounts_processed} accounts, "
+        f"{result.posts_checked} checked, {result.posts_expiring} expiring, "
+        f"{result.posts_refreshed} refreshed, {result.posts_deferred} deferred{' (dry run)' if args.dry_run else ''}"
+    )
+    for error in result.errors:
+        logger.warning(error)
+    return 1 if result.errors else 0
+
+def cli_entry_point():
+    """CLI エントリーポイント"""
+    try:
+        exit_code = asyncio.run(main())
+        sys.exit(exit_code)
+    except KeyboardInterrupt:
+        print("\n⚠️  Refresh interrupted by user")
+        sys.exit(130)
+
+if __name__ == "__main__":
+    cli_entry_point()
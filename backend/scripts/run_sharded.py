@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Sharded Collector Runner
+収集スクリプトを --shard i/N 付きで複数プロセス起動し、各シャードの結果JSONをマージする
+
+Usage:
+    python scripts/run_sharded.py --script daily --workers 4 -- --date 2024-01-20
+    python scripts/run_sharded.py --script account-insights --workers 3 --output merged.json
+    python scripts/run_sharded.py --script new-posts --workers 2 -- --check-hours-back 6
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+SCRIPT_PATHS = {
+    "daily": SCRIPTS_DIR / "collect_daily_data.py",
+    "account-insights": SCRIPTS_DIR / "github_actions" / "account_insights_collector.py",
+    "new-posts": SCRIPTS_DIR / "github_actions" / "new_posts_collector.py",
+}
+
+
+def parse_arguments():
+    """コマンドライン引数の解析（'--' 以降は各シャードへそのまま渡す）"""
+    argv = sys.argv[1:]
+    passthrough: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, passthrough = argv[:split], argv[split + 1:]
+
+    parser = argparse.ArgumentParser(description="Run a collector script across N shard processes")
+    parser.add_argument("--script", required=True, choices=sorted(SCRIPT_PATHS), help="実行する収集スクリプト")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="シャード（プロセス）数")
+    parser.add_argument("--output", help="マージ結果のJSON出力先（未指定時は scripts/output に保存）")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    args.passthrough = passthrough
+    return args
+
+
+async def _relay_output(stream: asyncio.StreamReader, prefix: str) -> None:
+    """子プロセスの出力を接頭辞付きで中継"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        sys.stdout.write(f"{prefix} {line.decode('utf-8', errors='replace')}")
+        sys.stdout.flush()
+
+
+async def run_shard(script: Path, index: int, count: int, output_path: Path, passthrough: List[str]) -> int:
+    """単一シャードのプロセスを実行し、終了コードを返す"""
+    cmd = [
+        sys.executable,
+        str(script),
+        "--shard",
+        f"{index}/{count}",
+        "--output",
+        str(output_path),
+        *passthrough,
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=str(SCRIPTS_DIR.parent),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    await _relay_output(process.stdout, f"[shard {index}/{count}]")
+    return await process.wait()
+
+
+def _merge_values(key: str, values: List[Any]) -> Any:
+    """同一キーの値をマージ（数値は合算、リストは連結、日時は最小/最大）"""
+    present = [v for v in values if v is not None]
+    if not present:
+        return None
+    first = present[0]
+    if isinstance(first, bool):
+        return all(present)
+    if isinstance(first, (int, float)):
+        if "rate" in key:
+            return None  # 比率はマージ後に再計算
+        if key.endswith("duration_seconds"):
+            return max(present)
+        return sum(present)
+    if isinstance(first, list):
+        return [item for value in present for item in value]
+    if isinstance(first, dict):
+        keys: List[str] = []
+        for value in present:
+            keys.extend(k for k in value if k not in keys)
+        return {k: _merge_values(k, [value.get(k) for value in present]) for k in keys}
+    if key == "started_at":
+        return min(present)
+    if key == "completed_at":
+        return max(present)
+    return first
+
+
+def merge_shard_outputs(outputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """シャード結果JSONをマージ"""
+    merged = _merge_values("", outputs) or {}
+    merged.pop("shard", None)
+
+    summary = merged.get("collection_summary")
+    if isinstance(summary, dict) and "success_rate" in summary:
+        total = summary.get("total_accounts") or 0
+        success = summary.get("successful_accounts") or 0
+        summary["success_rate"] = round(success / total * 100, 2) if total > 0 else 0
+    return merged
+
+
+def load_shard_output(path: Path) -> Optional[Dict[str, Any]]:
+    """シャード結果JSONを読み込み（存在しない場合は None）"""
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def main():
+    args = parse_arguments()
+    script = SCRIPT_PATHS[args.script]
+    started_at = datetime.now()
+
+    print(f"🚀 Running {args.script} across {args.workers} shards")
+
+    with tempfile.TemporaryDirectory(prefix="sharded_") as tmp_dir:
+        output_paths = [Path(tmp_dir) / f"shard_{i}.json" for i in range(args.workers)]
+        exit_codes = await asyncio.gather(
+            *(
+                run_shard(script, i, args.workers, output_paths[i], args.passthrough)
+                for i in range(args.workers)
+            )
+        )
+        shard_outputs = [load_shard_output(path) for path in output_paths]
+
+    merged = merge_shard_outputs([o for o in shard_outputs if o is not None])
+    merged["sharding"] = {
+        "script": args.script,
+        "workers": args.workers,
+        "started_at": started_at.isoformat(),
+        "completed_at": datetime.now().isoformat(),
+        "shards": [
+            {
+                "shard": f"{i}/{args.workers}",
+                "exit_code": exit_codes[i],
+                "output_collected": shard_outputs[i] is not None,
+            }
+            for i in range(args.workers)
+        ],
+    }
+
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        output_dir = SCRIPTS_DIR / "output"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / f"sharded_{args.script.replace('-', '_')}_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=2, ensure_ascii=False, default=str)
+
+    failed_shards = [i for i, code in enumerate(exit_codes) if code != 0]
+    print(f"📁 Merged result saved to {output_path}")
+    if failed_shards:
+        print(f"❌ Shards failed: {', '.join(f'{i}/{args.workers}' for i in failed_shards)}")
+        return 1
+    print("✅ All shards completed successfully")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
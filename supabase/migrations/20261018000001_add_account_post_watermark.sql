@@ -0,0 +1,7 @@
+-- Per-account high-water mark for new post detection
+
+alter table public.instagram_accounts add column if not exists last_seen_post_at timestamptz;
+alter table public.instagram_accounts add column if not exists last_seen_post_id varchar(50);
+
+comment on column public.instagram_accounts.last_seen_post_at is 'Timestamp of the newest post already processed by new post detection';
+comment on column public.instagram_accounts.last_seen_post_id is 'Instagram media ID of the newest post already processed';
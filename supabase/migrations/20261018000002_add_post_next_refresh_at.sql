@@ -0,0 +1,8 @@
+-- Per-post insight refresh schedule
+
+alter table public.instagram_posts add column if not exists next_refresh_at timestamptz;
+
+create index if not exists idx_instagram_posts_account_next_refresh
+  on public.instagram_posts(account_id, next_refresh_at);
+
+comment on column public.instagram_posts.next_refresh_at is 'Next time post insights should be re-fetched (NULL = due now)';
@@ -0,0 +1,18 @@
+-- Freshness ledger shared by collection jobs (skip data another job fetched recently)
+
+create table if not exists public.collection_freshness (
+  account_id uuid not null references public.instagram_accounts(id) on delete cascade,
+  data_kind text not null,
+  subject_id text not null default '',
+  fetched_at timestamptz not null,
+  fetched_by text,
+
+  constraint pk_collection_freshness primary key (account_id, data_kind, subject_id)
+);
+
+alter table public.collection_freshness enable row level security;
+
+comment on table public.collection_freshness is 'Last API fetch time per account/subject and data kind, shared by all collection jobs';
+comment on column public.collection_freshness.data_kind is 'Fetched data kind (e.g. post_insights)';
+comment on column public.collection_freshness.subject_id is 'Subject within the account (instagram_post_id, or empty for account-level data)';
+comment on column public.collection_freshness.fetched_by is 'Job that performed the fetch (daily, recent_sync, new_posts, ...)';
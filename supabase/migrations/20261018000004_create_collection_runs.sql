@@ -0,0 +1,59 @@
+-- Lease-based run locks and status for collection jobs (shared by all API replicas)
+
+create table if not exists public.collection_runs (
+  name text primary key,
+  owner text,
+  lease_expires_at timestamptz,
+  heartbeat_at timestamptz,
+  acquired_at timestamptz,
+  status jsonb not null default '{}'::jsonb,
+  updated_at timestamptz default now()
+);
+
+alter table public.collection_runs enable row level security;
+
+-- Take the lease (only when free or expired); returns the row on success
+create or replace function public.acquire_collection_run(p_name text, p_owner text, p_ttl_seconds integer)
+returns setof public.collection_runs
+language sql
+as $$
+  insert into public.collection_runs (name, owner, lease_expires_at, heartbeat_at, acquired_at, updated_at)
+  values (p_name, p_owner, now() + make_interval(secs => p_ttl_seconds), now(), now(), now())
+  on conflict (name) do update
+    set owner = excluded.owner,
+        lease_expires_at = excluded.lease_expires_at,
+        heartbeat_at = excluded.heartbeat_at,
+        acquired_at = excluded.acquired_at,
+        updated_at = excluded.updated_at
+    where public.collection_runs.owner is null
+       or public.collection_runs.lease_expires_at is null
+       or public.collection_runs.lease_expires_at < now()
+  returning *;
+$$;
+
+-- Extend the lease (holder only, DB clock)
+create or replace function public.renew_collection_run(p_name text, p_owner text, p_ttl_seconds integer)
+returns boolean
+language sql
+as $$
+  with renewed as (
+    update public.collection_runs
+    set lease_expires_at = now() + make_interval(secs => p_ttl_seconds),
+        heartbeat_at = now(),
+        updated_at = now()
+    where name = p_name and owner = p_owner
+    returning 1
+  )
+  select exists (select 1 from renewed);
+$$;
+
+-- Leases are taken by the backend only (service role)
+revoke execute on function public.acquire_collection_run(text, text, integer) from public, anon, authenticated;
+revoke execute on function public.renew_collection_run(text, text, integer) from public, anon, authenticated;
+grant execute on function public.acquire_collection_run(text, text, integer) to service_role;
+grant execute on function public.renew_collection_run(text, text, integer) to service_role;
+
+comment on table public.collection_runs is 'Collection job leases (one row per job or account lock) and last run status';
+comment on column public.collection_runs.owner is 'Lease holder (host:pid:token), NULL when released';
+comment on column public.collection_runs.lease_expires_at is 'Lease expiry; an expired lease may be taken over by another replica';
+comment on column public.collection_runs.status is 'Last run status reported by the job (running, started_at, completed_at, last_error, last_summary)';
@@ -0,0 +1,147 @@
+-- Durable queue for collection jobs consumed by worker processes
+
+create table if not exists public.collection_jobs (
+  id uuid primary key default gen_random_uuid(),
+  job_type text not null,
+  dedupe_key text not null default '',
+  payload jsonb not null default '{}'::jsonb,
+  status text not null default 'queued'
+    check (status in ('queued', 'running', 'succeeded', 'failed')),
+  attempts integer not null default 0,
+  max_attempts integer not null default 1,
+  run_after timestamptz not null default now(),
+  locked_by text,
+  locked_until timestamptz,
+  progress jsonb,
+  result jsonb,
+  error text,
+  created_at timestamptz not null default now(),
+  started_at timestamptz,
+  completed_at timestamptz,
+  updated_at timestamptz not null default now()
+);
+
+alter table public.collection_jobs enable row level security;
+
+create index if not exists idx_collection_jobs_claimable
+  on public.collection_jobs(run_after, created_at)
+  where status in ('queued', 'running');
+create index if not exists idx_collection_jobs_type_created
+  on public.collection_jobs(job_type, created_at desc);
+
+-- At most one queued / running job per (job_type, dedupe_key)
+create unique index if not exists uq_collection_jobs_active
+  on public.collection_jobs(job_type, dedupe_key)
+  where status in ('queued', 'running');
+
+-- Fail running jobs whose lease expired with no attempts left
+-- (otherwise they stay running forever and block jobs of the same type)
+create or replace function public.fail_expired_collection_jobs(p_job_type text default null)
+returns integer
+language sql
+as $$
+  with failed as (
+    update public.collection_jobs
+    set status = 'failed',
+        error = coalesce(error, 'Worker lease expired'),
+        completed_at = now(),
+        locked_by = null,
+        locked_until = null,
+        updated_at = now()
+    where status = 'running'
+      and locked_until < now()
+      and attempts >= max_attempts
+      and (p_job_type is null or job_type = p_job_type)
+    returning 1
+  )
+  select count(*)::integer from failed;
+$$;
+
+-- Enqueue unless an active job of the same kind exists (returns no row then);
+-- check and insert are one statement, so concurrent requests cannot both enqueue
+create or replace function public.enqueue_collection_job(
+  p_job_type text,
+  p_payload jsonb,
+  p_max_attempts integer default 1,
+  p_dedupe_key text default ''
+)
+returns setof public.collection_jobs
+language sql
+as $$
+  select public.fail_expired_collection_jobs(p_job_type);
+
+  insert into public.collection_jobs (job_type, payload, max_attempts, dedupe_key)
+  values (p_job_type, coalesce(p_payload, '{}'::jsonb), p_max_attempts, coalesce(p_dedupe_key, ''))
+  on conflict (job_type, dedupe_key) where status in ('queued', 'running') do nothing
+  returning *;
+$$;
+
+-- Lock one queued job, or an expired running job with attempts left
+create or replace function public.claim_collection_job(
+  p_worker text,
+  p_lease_seconds integer,
+  p_job_types text[] default null
+)
+returns setof public.collection_jobs
+language sql
+as $$
+  select public.fail_expired_collection_jobs();
+
+  update public.collection_jobs as j
+  set status = 'running',
+      locked_by = p_worker,
+      locked_until = now() + make_interval(secs => p_lease_seconds),
+      attempts = j.attempts + 1,
+      started_at = coalesce(j.started_at, now()),
+      updated_at = now()
+  where j.id = (
+    select c.id
+    from public.collection_jobs as c
+    where (
+        (c.status = 'queued' and c.run_after <= now())
+        or (c.status = 'running' and c.locked_until < now() and c.attempts < c.max_attempts)
+      )
+      and (p_job_types is null or c.job_type = any(p_job_types))
+    order by c.run_after, c.created_at
+    limit 1
+    for update skip locked
+  )
+  returning j.*;
+$$;
+
+-- Extend the lease and store progress (holding worker only)
+create or replace function public.heartbeat_collection_job(
+  p_id uuid,
+  p_worker text,
+  p_lease_seconds integer,
+  p_progress jsonb default null
+)
+returns boolean
+language sql
+as $$
+  with renewed as (
+    update public.collection_jobs
+    set locked_until = now() + make_interval(secs => p_lease_seconds),
+        progress = coalesce(p_progress, progress),
+        updated_at = now()
+    where id = p_id and locked_by = p_worker and status = 'running'
+    returning 1
+  )
+  select exists (select 1 from renewed);
+$$;
+
+-- Jobs are enqueued and run by the backend only (service role); the worker calls the Graph API with stored tokens
+revoke execute on function public.fail_expired_collection_jobs(text) from public, anon, authenticated;
+revoke execute on function public.enqueue_collection_job(text, jsonb, integer, text) from public, anon, authenticated;
+revoke execute on function public.claim_collection_job(text, integer, text[]) from public, anon, authenticated;
+revoke execute on function public.heartbeat_collection_job(uuid, text, integer, jsonb) from public, anon, authenticated;
+grant execute on function public.fail_expired_collection_jobs(text) to service_role;
+grant execute on function public.enqueue_collection_job(text, jsonb, integer, text) to service_role;
+grant execute on function public.claim_collection_job(text, integer, text[]) to service_role;
+grant execute on function public.heartbeat_collection_job(uuid, text, integer, jsonb) to service_role;
+
+comment on table public.collection_jobs is 'Collection job queue (enqueued by the API, consumed by scripts/collection_worker.py)';
+comment on column public.collection_jobs.dedupe_key is 'Jobs with the same job_type and dedupe_key are mutually exclusive while queued or running (empty = one per job_type)';
+comment on column public.collection_jobs.locked_by is 'Worker currently holding the job';
+comment on column public.collection_jobs.locked_until is 'Worker lease expiry; expired running jobs can be reclaimed while attempts remain';
+comment on column public.collection_jobs.progress is 'Latest progress reported by the job handler';
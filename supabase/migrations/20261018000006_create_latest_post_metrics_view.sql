@@ -0,0 +1,14 @@
+-- Latest metrics row per post (DISTINCT ON) backed by a (post_id, recorded_at desc) index
+
+create index if not exists idx_instagram_post_metrics_post_recorded
+  on public.instagram_post_metrics(post_id, recorded_at desc);
+
+-- A post_id filter is pushed down into the view, so `post_id in (...)` returns one row per post.
+-- security_invoker keeps the RLS of instagram_post_metrics in effect for callers of the view.
+create or replace view public.latest_post_metrics
+with (security_invoker = true) as
+select distinct on (post_id) *
+from public.instagram_post_metrics
+order by post_id, recorded_at desc;
+
+comment on view public.latest_post_metrics is 'Most recent instagram_post_metrics row per post';
@@ -0,0 +1,111 @@
+-- Server-side aggregation of post insight / post metrics summaries (called via supabase.rpc)
+
+-- Engagement rate of a metrics row (same definition as the API:
+-- (likes + comments + shares + saved) / reach * 100, 0 when reach is 0)
+create or replace function public.post_engagement_rate(m public.instagram_post_metrics)
+returns numeric
+language sql
+immutable
+as $$
+  select case
+    when coalesce(m.reach, 0) = 0 then 0
+    else round(
+      (coalesce(m.likes, 0) + coalesce(m.comments, 0) + coalesce(m.shares, 0) + coalesce(m.saved, 0))::numeric
+        / m.reach * 100,
+      2
+    )
+  end;
+$$;
+
+-- Insight summary of the posts of an account filtered by period and media type
+-- (same JSON shape as the summary of GET /api/v1/posts/insights)
+create or replace function public.post_insight_summary(
+  p_account_id uuid,
+  p_from timestamptz default null,
+  p_to timestamptz default null,
+  p_media_type text default null,
+  p_limit integer default null
+)
+returns jsonb
+language sql
+stable
+as $$
+  with posts as (
+    select p.id, p.instagram_post_id, p.media_type, p.posted_at
+    from public.instagram_posts p
+    where p.account_id = p_account_id
+      and (p_from is null or p.posted_at >= p_from)
+      and (p_to is null or p.posted_at < p_to)
+      and (p_media_type is null or p.media_type = p_media_type)
+    -- same order as the posts endpoint, so a limit cuts at the same post on posted_at ties
+    order by p.posted_at desc, p.id desc
+    limit p_limit
+  ),
+  scored as (
+    select
+      posts.instagram_post_id,
+      posts.media_type,
+      posts.posted_at,
+      coalesce(m.reach, 0) as reach,
+      coalesce(m.engagement, 0) as engagement,
+      coalesce(m.engagement_rate, 0) as engagement_rate
+    from posts
+    -- Read only the first row of the (post_id, recorded_at desc) index per post
+    -- (a join with the latest_post_metrics view is not pushed inside DISTINCT ON and aggregates every row)
+    left join lateral (
+      select
+        pm.reach,
+        coalesce(pm.likes, 0) + coalesce(pm.comments, 0) + coalesce(pm.shares, 0) + coalesce(pm.saved, 0) as engagement,
+        public.post_engagement_rate(pm) as engagement_rate
+      from public.instagram_post_metrics pm
+      where pm.post_id = posts.id
+      order by pm.recorded_at desc
+      limit 1
+    ) m on true
+  ),
+  best as (
+    select instagram_post_id, engagement_rate, media_type
+    from scored
+    order by engagement_rate desc, posted_at desc
+    limit 1
+  ),
+  distribution as (
+    select coalesce(jsonb_object_agg(coalesce(media_type, 'UNKNOWN'), cnt), '{}'::jsonb) as value
+    from (select media_type, count(*) as cnt from scored group by media_type) d
+  )
+  select jsonb_build_object(
+    'total_posts', (select count(*) from scored),
+    'avg_engagement_rate', (select coalesce(avg(engagement_rate), 0) from scored),
+    'total_reach', (select coalesce(sum(reach), 0) from scored),
+    'total_engagement', (select coalesce(sum(engagement), 0) from scored),
+    'best_performing_post', (
+      select jsonb_build_object('id', instagram_post_id, 'engagement_rate', engagement_rate, 'type', media_type)
+      from best
+    ),
+    'media_type_distribution', (select value from distribution)
+  );
+$$;
+
+-- Latest metrics totals of the given posts (InstagramPostMetricsRepository.get_metrics_summary)
+create or replace function public.post_metrics_summary(p_post_ids uuid[])
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'total_posts', count(*),
+    'total_likes', coalesce(sum(likes), 0),
+    'total_comments', coalesce(sum(comments), 0),
+    'total_saved', coalesce(sum(saved), 0),
+    'total_shares', coalesce(sum(shares), 0),
+    'total_views', coalesce(sum(views), 0),
+    'total_reach', coalesce(sum(reach), 0),
+    'avg_engagement_rate', coalesce(avg(coalesce(engagement_rate, 0)), 0)
+  )
+  from public.latest_post_metrics
+  where post_id = any(p_post_ids);
+$$;
+
+comment on function public.post_insight_summary(uuid, timestamptz, timestamptz, text, integer)
+  is 'Post insight summary (totals, average engagement, best post, media type distribution) for an account and date range';
+comment on function public.post_metrics_summary(uuid[]) is 'Totals and average engagement over the latest metrics of the given posts';
@@ -0,0 +1,69 @@
+-- Per-account data version bumped whenever posts / post metrics are written (response cache invalidation)
+
+alter table public.instagram_accounts add column if not exists data_version bigint not null default 0;
+alter table public.instagram_accounts add column if not exists data_updated_at timestamptz;
+
+-- Bump each written account once per statement (once for a bulk upsert too)
+create or replace function public.bump_account_data_version_from_posts()
+returns trigger
+language plpgsql
+as $$
+begin
+  update public.instagram_accounts
+  set data_version = data_version + 1,
+      data_updated_at = now()
+  where id in (select distinct account_id from changed_rows);
+  return null;
+end;
+$$;
+
+create or replace function public.bump_account_data_version_from_post_metrics()
+returns trigger
+language plpgsql
+as $$
+begin
+  update public.instagram_accounts
+  set data_version = data_version + 1,
+      data_updated_at = now()
+  where id in (
+    select distinct p.account_id
+    from changed_rows c
+    join public.instagram_posts p on p.id = c.post_id
+  );
+  return null;
+end;
+$$;
+
+-- Triggers with transition tables need one trigger per event
+drop trigger if exists trg_posts_data_version_insert on public.instagram_posts;
+create trigger trg_posts_data_version_insert
+after insert on public.instagram_posts
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_posts();
+
+drop trigger if exists trg_posts_data_version_update on public.instagram_posts;
+create trigger trg_posts_data_version_update
+after update on public.instagram_posts
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_posts();
+
+drop trigger if exists trg_posts_data_version_delete on public.instagram_posts;
+create trigger trg_posts_data_version_delete
+after delete on public.instagram_posts
+referencing old table as changed_rows
+for each statement execute function public.bump_account_data_version_from_posts();
+
+drop trigger if exists trg_post_metrics_data_version_insert on public.instagram_post_metrics;
+create trigger trg_post_metrics_data_version_insert
+after insert on public.instagram_post_metrics
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_post_metrics();
+
+drop trigger if exists trg_post_metrics_data_version_update on public.instagram_post_metrics;
+create trigger trg_post_metrics_data_version_update
+after update on public.instagram_post_metrics
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_post_metrics();
+
+comment on column public.instagram_accounts.data_version is 'Incremented whenever posts or post metrics of the account are written; part of API response cache keys';
+comment on column public.instagram_accounts.data_updated_at is 'Time of the last post / post metrics write for the account';
@@ -0,0 +1,21 @@
+-- Instagram CDN expiry of post media URLs, so expiring URLs can be selected by index
+
+alter table public.instagram_posts add column if not exists media_url_expires_at timestamptz;
+
+-- Backfill: `oe` / `_nc_oe` of the displayed URL is hex epoch seconds; posts without a URL count as expired
+update public.instagram_posts p
+set media_url_expires_at = case
+  when nullif(coalesce(nullif(p.thumbnail_url, ''), p.media_url), '') is null then to_timestamp(0)
+  when oe.hex is not null then to_timestamp(('x' || lpad(oe.hex, 16, '0'))::bit(64)::bigint)
+end
+from (
+  select id, substring(coalesce(nullif(thumbnail_url, ''), media_url) from '[?&](?:_nc_)?oe=([0-9A-Fa-f]{1,15})(?:&|$)') as hex
+  from public.instagram_posts
+) oe
+where oe.id = p.id
+  and p.media_url_expires_at is null;
+
+create index if not exists idx_instagram_posts_account_media_url_expires
+  on public.instagram_posts(account_id, media_url_expires_at);
+
+comment on column public.instagram_posts.media_url_expires_at is 'Expiry (oe) of the displayed media URL; epoch when the post has no URL, NULL when unknown';
@@ -0,0 +1,27 @@
+-- Update media URLs of many posts in one statement (called via supabase.rpc)
+
+-- Update only the URL columns keyed by id
+-- (an upsert keyed by id would hit the insert-side NOT NULL constraints such as account_id, so use update ... from)
+create or replace function public.bulk_update_post_media_urls(p_rows jsonb)
+returns integer
+language sql
+as $$
+  with updated as (
+    update public.instagram_posts p
+    set media_url = r.media_url,
+        thumbnail_url = r.thumbnail_url,
+        media_url_expires_at = r.media_url_expires_at
+    from jsonb_to_recordset(p_rows) as r(
+      id uuid,
+      media_url text,
+      thumbnail_url text,
+      media_url_expires_at timestamptz
+    )
+    where p.id = r.id
+    returning 1
+  )
+  select count(*)::integer from updated;
+$$;
+
+comment on function public.bulk_update_post_media_urls(jsonb)
+  is 'Set media_url, thumbnail_url and media_url_expires_at for the posts in [{id, media_url, thumbnail_url, media_url_expires_at}]; returns the number of updated posts';
@@ -0,0 +1,97 @@
+-- Per-account, per-media-type post rollup (refreshed by collectors) for GET /api/v1/posts/insights/summary
+
+create table if not exists public.instagram_media_type_rollups (
+  account_id uuid not null references public.instagram_accounts(id) on delete cascade,
+  media_type varchar(20) not null,
+
+  -- All posts (including posts without metrics) / posts with latest metrics
+  post_count integer not null default 0,
+  posts_with_metrics integer not null default 0,
+
+  -- Totals of the latest metrics
+  total_reach bigint not null default 0,
+  total_likes bigint not null default 0,
+  total_comments bigint not null default 0,
+  total_saved bigint not null default 0,
+  total_shares bigint not null default 0,
+  total_views bigint not null default 0,
+
+  -- Averages over posts with latest metrics
+  avg_reach numeric(14,2) not null default 0,
+  avg_views numeric(14,2) not null default 0,
+  avg_engagement_rate numeric(8,2) not null default 0,
+
+  best_instagram_post_id varchar(50),
+  best_engagement_rate numeric(8,2),
+  latest_posted_at timestamptz,
+  refreshed_at timestamptz not null default now(),
+
+  primary key (account_id, media_type)
+);
+
+alter table public.instagram_media_type_rollups enable row level security;
+
+-- Recompute every media type of one account (called only for accounts a collector wrote posts / metrics for)
+create or replace function public.refresh_media_type_rollups(p_account_id uuid)
+returns integer
+language plpgsql
+as $$
+declare
+  v_count integer;
+begin
+  -- Serialise concurrent refreshes of the same account
+  perform pg_advisory_xact_lock(hashtext('media_type_rollups:' || p_account_id::text));
+
+  delete from public.instagram_media_type_rollups where account_id = p_account_id;
+
+  insert into public.instagram_media_type_rollups (
+    account_id, media_type, post_count, posts_with_metrics,
+    total_reach, total_likes, total_comments, total_saved, total_shares, total_views,
+    avg_reach, avg_views, avg_engagement_rate,
+    best_instagram_post_id, best_engagement_rate, latest_posted_at, refreshed_at
+  )
+  select
+    p.account_id,
+    coalesce(p.media_type, 'UNKNOWN'),
+    count(*),
+    count(m.post_id),
+    coalesce(sum(m.reach), 0),
+    coalesce(sum(m.likes), 0),
+    coalesce(sum(m.comments), 0),
+    coalesce(sum(m.saved), 0),
+    coalesce(sum(m.shares), 0),
+    coalesce(sum(m.views), 0),
+    coalesce(round(avg(m.reach), 2), 0),
+    coalesce(round(avg(m.views), 2), 0),
+    coalesce(round(avg(m.engagement_rate), 2), 0),
+    (array_agg(p.instagram_post_id order by m.engagement_rate desc, p.posted_at desc)
+      filter (where m.post_id is not null))[1],
+    max(m.engagement_rate),
+    max(p.posted_at),
+    now()
+  from public.instagram_posts p
+  -- Read only the first row of the (post_id, recorded_at desc) index per post (as in post_insight_summary)
+  left join lateral (
+    select
+      pm.post_id, pm.reach, pm.likes, pm.comments, pm.saved, pm.shares, pm.views,
+      public.post_engagement_rate(pm) as engagement_rate
+    from public.instagram_post_metrics pm
+    where pm.post_id = p.id
+    order by pm.recorded_at desc
+    limit 1
+  ) m on true
+  where p.account_id = p_account_id
+  group by p.account_id, coalesce(p.media_type, 'UNKNOWN');
+
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+-- Initial rollup of existing accounts
+select public.refresh_media_type_rollups(id) from public.instagram_accounts;
+
+comment on table public.instagram_media_type_rollups is 'Post counts and latest-metrics totals/averages per account and media type; refreshed by collectors';
+comment on column public.instagram_media_type_rollups.posts_with_metrics is 'Posts that have at least one metrics row (averages are over these posts)';
+comment on column public.instagram_media_type_rollups.refreshed_at is 'Time the account rollup was last recomputed';
+comment on function public.refresh_media_type_rollups(uuid) is 'Recompute all media type rows of one account; returns the number of media type rows';
@@ -0,0 +1,43 @@
+-- Also bump instagram_accounts.data_version on daily stats / media type rollup writes (HTTP ETag revalidation)
+
+-- Bump once per statement from rows that carry account_id
+create or replace function public.bump_account_data_version_from_account_rows()
+returns trigger
+language plpgsql
+as $$
+begin
+  update public.instagram_accounts
+  set data_version = data_version + 1,
+      data_updated_at = now()
+  where id in (select distinct account_id from changed_rows);
+  return null;
+end;
+$$;
+
+-- Daily stats (follower counts etc. in account detail / list)
+drop trigger if exists trg_daily_stats_data_version_insert on public.instagram_daily_stats;
+create trigger trg_daily_stats_data_version_insert
+after insert on public.instagram_daily_stats
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_account_rows();
+
+drop trigger if exists trg_daily_stats_data_version_update on public.instagram_daily_stats;
+create trigger trg_daily_stats_data_version_update
+after update on public.instagram_daily_stats
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_account_rows();
+
+drop trigger if exists trg_daily_stats_data_version_delete on public.instagram_daily_stats;
+create trigger trg_daily_stats_data_version_delete
+after delete on public.instagram_daily_stats
+referencing old table as changed_rows
+for each statement execute function public.bump_account_data_version_from_account_rows();
+
+-- Media type rollups (recomputed after post writes, so bump on recompute too)
+drop trigger if exists trg_media_type_rollups_data_version_insert on public.instagram_media_type_rollups;
+create trigger trg_media_type_rollups_data_version_insert
+after insert on public.instagram_media_type_rollups
+referencing new table as changed_rows
+for each statement execute function public.bump_account_data_version_from_account_rows();
+
+comment on column public.instagram_accounts.data_version is 'Incremented whenever posts, post metrics, daily stats or media type rollups of the account are written; part of API response cache keys and ETags';